@@ -9,14 +9,15 @@ routes, and middleware components.
 import os
 from flask import Flask
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager
 from flask_bcrypt import Bcrypt
 from flask_pymongo import PyMongo
 
+from app.auth.token_cache import CachingJWTManager
+
 # Initialize extensions
 mongo = PyMongo()
 bcrypt = Bcrypt()
-jwt = JWTManager()
+jwt = CachingJWTManager()
 
 
 def create_app(config_name=None):
@@ -52,12 +53,50 @@ def create_app(config_name=None):
     # Initialize extensions with the app
     init_extensions(app)
     
+    # Initialize the database backend and model indexes
+    init_database(app)
+    
+    # Track refresh token families for rotation and reuse detection
+    from app.auth.refresh_tokens import init_refresh_tokens
+    init_refresh_tokens(app)
+    
+    # Let users read their own writes when models read from secondaries
+    from app.models.causal_sessions import init_causal_sessions
+    init_causal_sessions(app)
+    
+    # Share identical concurrent reads
+    from app.models.read_coalescing import init_read_coalescing
+    init_read_coalescing(app)
+    
+    # Follow database changes made by any process
+    from app.models.change_feed import init_change_feed
+    init_change_feed(app)
+    
+    # Maintain in-memory catalog facet counters
+    from app.models.product_facets import init_product_facets
+    init_product_facets(app)
+    
+    # Keep the hottest product list pages pre-rendered
+    from app.api.products.snapshots import init_product_snapshots
+    init_product_snapshots(app)
+    
+    # Move old soft-deleted documents out of the hot collections
+    from app.models.archiver import init_archiver
+    init_archiver(app)
+    
     # Register middlewares
     register_middlewares(app)
     
     # Register error handlers
     register_error_handlers(app)
     
+    # Keep error storms from flooding the logs
+    from app.utils.log_limiter import init_log_rate_limit
+    init_log_rate_limit(app)
+    
+    # Register URL converters, which blueprint routes rely on
+    register_url_converters(app)
+    
     # Register blueprints (routes)
     register_blueprints(app)
     
@@ -70,18 +109,65 @@ def init_extensions(app):
     Args:
         app (Flask): The Flask application instance.
     """
-    # Initialize MongoDB
-    mongo.init_app(app)
+    # Initialize MongoDB, with the command listener used for per-request tracing
+    from app.middlewares.db_tracing import command_tracer
+    if app.config.get('DB_TRACING_ENABLED', True):
+        mongo.init_app(app, event_listeners=[command_tracer])
+    else:
+        mongo.init_app(app)
     
     # Initialize Bcrypt for password hashing
     bcrypt.init_app(app)
     
-    # Initialize JWT for authentication
+    # Initialize JWT for authentication, with the signing keys for RS256/EdDSA
+    from app.auth.keys import init_jwt_keys
+    init_jwt_keys(app)
     jwt.init_app(app)
     
     # Import and register jwt callbacks from auth module
     from app.auth.jwt_callbacks import register_jwt_callbacks
     register_jwt_callbacks(jwt)
+    
+    # Verify each access token's signature once per worker
+    from app.auth.token_cache import init_token_cache
+    init_token_cache(app)
+
+
+def init_database(app):
+    """Initialize the database backend used by the models.
+    
+    The 'mongo' backend uses the Flask-PyMongo client. The 'memory' backend is
+    an in-process stand-in for tests and benchmarks that need no MongoDB server.
+    
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    from app.models.user import User
+    from app.models.product import Product
+    from app.models.reservation import Reservation
+    models = (User, Product, Reservation)
+    
+    if app.config.get('DATABASE_BACKEND', 'mongo') == 'memory':
+        from app.models.memory_store import MemoryDatabase
+        app.extensions['database'] = MemoryDatabase(app.config['MONGO_DBNAME'])
+        ensure_indexes = True
+    else:
+        # MONGO_URI may omit the database name, in which case mongo.db is None
+        database = mongo.db if mongo.db is not None else mongo.cx[app.config['MONGO_DBNAME']]
+        app.extensions['database'] = database
+        ensure_indexes = app.config.get('MONGO_ENSURE_INDEXES', True)
+    
+    # Open the models' collection handles once
+    from app.models.base_model import init_collections
+    init_collections(app, models)
+    
+    if ensure_indexes:
+        with app.app_context():
+            for model in models:
+                try:
+                    model.ensure_indexes()
+                except Exception as e:
+                    app.logger.warning("Could not ensure indexes for %s: %s", model.collection_name, e)
 
 
 def register_middlewares(app):
@@ -90,14 +176,28 @@ def register_middlewares(app):
     Args:
         app (Flask): The Flask application instance.
     """
+    # Configure response compression. Registered first so it runs after the
+    # other after_request handlers and compresses the final body.
+    from app.middlewares.compression import configure_compression
+    configure_compression(app)
+    
     # Configure CORS
     cors_origins = app.config.get('CORS_ALLOWED_ORIGINS', '*').split(',')
-    CORS(app, resources={r"/api/*": {"origins": cors_origins}})
+    CORS(app, resources={r"/api/*": {"origins": cors_origins, "expose_headers": ["X-Causal-Position"]}})
+    
+    # Configure request profiling. Registered before request logging so the
+    # profiler starts as early as possible in the request.
+    from app.middlewares.profiler import configure_profiling
+    configure_profiling(app)
     
     # Configure request logging
     from app.middlewares.request_logger import configure_request_logging
     configure_request_logging(app)
     
+    # Configure per-request database command tracing
+    from app.middlewares.db_tracing import configure_db_tracing
+    configure_db_tracing(app)
+    
     # Add security headers middleware
     from app.middlewares.security_headers import add_security_headers
     app.after_request(add_security_headers)
@@ -128,6 +228,17 @@ def register_error_handlers(app):
     app.register_error_handler(422, handle_validation_error)
 
 
+def register_url_converters(app):
+    """Register URL converters for route arguments.
+    
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    from app.utils.converters import ObjectIdConverter
+    
+    app.url_map.converters['objectid'] = ObjectIdConverter
+
+
 def register_blueprints(app):
     """Register blueprints (route handlers) with the application.
     
@@ -138,8 +249,12 @@ def register_blueprints(app):
     from app.auth.routes import auth_bp
     from app.api.users.routes import users_bp
     from app.api.products.routes import products_bp
+    from app.api.admin.routes import admin_bp
+    from app.auth.routes import well_known_bp
     
     # Register blueprints with URL prefixes
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(users_bp, url_prefix='/api/users')
     app.register_blueprint(products_bp, url_prefix='/api/products')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(well_known_bp, url_prefix='/.well-known')
@@ -0,0 +1,6 @@
+# app/api/admin/__init__.py
+
+"""Admin API package.
+
+This package contains API endpoints for operational administration.
+"""
@@ -0,0 +1,64 @@
+# app/api/admin/routes.py
+
+"""Admin API routes.
+
+This module defines operational API routes for administrators, such as
+listing and downloading request profiles captured by the profiling middleware.
+"""
+
+from flask import Blueprint, current_app, send_file
+
+from app.auth.authorization import admin_required
+from app.utils.response import success_response, error_response
+
+# Create blueprint
+admin_bp = Blueprint('admin', __name__)
+
+
+@admin_bp.route('/profiles', methods=['GET'])
+@admin_required
+def list_profiles():
+    """List recent request profiles (admin only).
+    
+    Returns the profiles currently held in the on-disk ring, newest first.
+    
+    Returns:
+        tuple: A JSON response with the list of profiles.
+    """
+    try:
+        store = current_app.extensions['profile_store']
+        return success_response({'profiles': store.list()})
+    
+    except Exception as e:
+        current_app.logger.error("Error listing profiles: %s", e)
+        return error_response(
+            "An error occurred while listing profiles", 
+            status_code=500
+        )
+
+
+@admin_bp.route('/profiles/<name>', methods=['GET'])
+@admin_required
+def download_profile(name):
+    """Download a request profile (admin only).
+    
+    Profiles ending in '.prof' are pstats files; profiles ending in
+    '.collapsed' are collapsed stacks ready for flamegraph tooling.
+    
+    Args:
+        name (str): The profile name.
+    
+    Returns:
+        Response: The profile file as an attachment.
+    """
+    store = current_app.extensions['profile_store']
+    path = store.path_for(name)
+    if not path:
+        return error_response(
+            "Profile not found", 
+            code="profile_not_found", 
+            status_code=404
+        )
+    
+    mimetype = 'text/plain' if name.endswith('.collapsed') else 'application/octet-stream'
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=name)
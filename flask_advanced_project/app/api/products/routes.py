@@ -6,124 +6,95 @@ This module defines the API routes for product management, including
 creating, retrieving, updating, and deleting products.
 """
 
-from flask import Blueprint, request, current_app
-from flask_jwt_extended import jwt_required, current_user, get_jwt
+from flask import Blueprint, request, current_app, g
 from marshmallow import ValidationError
-from bson import ObjectId
 
-from app.models.product import Product, ProductSchema
+from app.auth.authorization import authorize, admin_required, current_identity, has_role
+from app.models.product import (
+    Product, ProductSchema, InventoryError, ReservationSchema, CartReservationSchema
+)
+from app.models.reservation import Reservation, ReservationError
+from app.models.base_model import VersionConflict
+from app.models.query_compiler import InvalidQuery
 from app.utils.response import success_response, error_response, pagination_response
+from app.utils.conditional import (
+    get_expected_version, with_etag, invalid_precondition_response, version_conflict_response
+)
 
 # Create blueprint
 products_bp = Blueprint('products', __name__)
 
 # Initialize schemas
 product_schema = ProductSchema()
-
-# Define a decorator for admin-only routes
-def admin_required(fn):
-    """Decorator that checks if the current user has admin role.
-    
-    Args:
-        fn (function): The function to wrap.
-    
-    Returns:
-        function: The wrapped function that includes an admin check.
-    """
-    @jwt_required()
-    def wrapper(*args, **kwargs):
-        # Get current user's role from the JWT claims
-        claims = get_jwt()
-        identity = claims.get('sub', {})
-        
-        if isinstance(identity, dict) and identity.get('role') == 'admin':
-            return fn(*args, **kwargs)
-        else:
-            return error_response(
-                "Admin privileges required", 
-                code="admin_required", 
-                status_code=403
-            )
-    
-    # Preserve the wrapped function's metadata
-    wrapper.__name__ = fn.__name__
-    wrapper.__doc__ = fn.__doc__
-    
-    return wrapper
+reservation_schema = ReservationSchema()
+cart_reservation_schema = CartReservationSchema()
 
 
 @products_bp.route('', methods=['GET'])
 def get_products():
     """Get a list of products.
     
-    Retrieves a paginated list of products, with optional filtering by category.
+    Retrieves a paginated list of products, with optional filtering by category,
+    active status and price range, and sorting by creation date or price.
     
     Returns:
         tuple: A JSON response with the list of products and pagination metadata.
     """
     try:
-        # Get pagination parameters from query string
-        page = int(request.args.get('page', 1))
-        per_page = min(int(request.args.get('per_page', 20)), 100)  # Max 100 per page
+        # Compile pagination, filter and sort parameters from the query string
+        query = Product.compile_query(request.args)
+        g.query_shape = query.shape
         
-        # Get filter parameters
-        category = request.args.get('category')
-        active_only = request.args.get('active', '').lower() == 'true'
-        min_price = float(request.args.get('min_price', 0))
-        max_price = float(request.args.get('max_price', 1000000)) if request.args.get('max_price') else None
-        
-        # Build filter
-        filter_dict = {}
-        if category:
-            filter_dict['category'] = category
-        if active_only:
-            filter_dict['active'] = True
-        if min_price > 0:
-            filter_dict['price'] = {'$gte': min_price}
-        if max_price:
-            if 'price' in filter_dict:
-                filter_dict['price']['$lte'] = max_price
-            else:
-                filter_dict['price'] = {'$lte': max_price}
+        # The first pages without a price filter are served pre-rendered
+        snapshots = current_app.extensions.get('product_snapshots')
+        if snapshots is not None:
+            snapshot = snapshots.get(query)
+            if snapshot is not None:
+                return snapshot.to_response()
         
         # Get products with pagination
-        skip = (page - 1) * per_page
         products = Product.find(
-            filter_dict=filter_dict, 
-            sort=[('created_at', -1)],
-            skip=skip,
-            limit=per_page
+            filter_dict=query.filter, 
+            sort=query.sort,
+            skip=query.skip,
+            limit=query.per_page
         )
         
-        # Count total products for pagination metadata
-        total_products = Product.count(filter_dict)
+        # Count total products for pagination metadata; totals may be a few
+        # seconds old, so concurrent and repeated pages share one count
+        total_products = Product.count(
+            query.filter, max_age=current_app.config.get('PRODUCT_LIST_COUNT_MAX_AGE', 0)
+        )
         
         # Serialize the products
         serialized_products = [product_schema.dump(product) for product in products]
         
         return pagination_response(
             items=serialized_products,
-            page=page,
-            per_page=per_page,
+            page=query.page,
+            per_page=query.per_page,
             total=total_products
         )
     
+    except InvalidQuery as e:
+        return error_response(str(e), details=e.details, code=e.code, status_code=400)
+    
     except Exception as e:
-        current_app.logger.error(f"Error getting products: {str(e)}")
+        current_app.logger.error("Error getting products: %s", e)
         return error_response(
             "An error occurred while retrieving products", 
             status_code=500
         )
 
 
-@products_bp.route('/<product_id>', methods=['GET'])
+@products_bp.route('/<objectid:product_id>', methods=['GET'])
 def get_product(product_id):
     """Get a specific product.
     
     Retrieves detailed information about a specific product.
     
     Args:
-        product_id (str): The ID of the product to retrieve.
+        product_id (ObjectId): The ID of the product to retrieve.
     
     Returns:
         tuple: A JSON response with the product's information.
@@ -141,10 +112,10 @@ def get_product(product_id):
         # Serialize the product
         product_data = product_schema.dump(product)
         
-        return success_response({'product': product_data})
+        return with_etag(success_response({'product': product_data}), product)
     
     except Exception as e:
-        current_app.logger.error(f"Error getting product {product_id}: {str(e)}")
+        current_app.logger.error("Error getting product %s: %s", product_id, e)
         return error_response(
             "An error occurred while retrieving product information", 
             status_code=500
@@ -176,11 +147,11 @@ def create_product():
         # Serialize the created product
         product_data = product_schema.dump(new_product)
         
-        return success_response(
+        return with_etag(success_response(
             {'product': product_data}, 
             "Product created successfully", 
             status_code=201
-        )
+        ), new_product)
     
     except ValidationError as err:
         return error_response(
@@ -190,58 +161,66 @@ def create_product():
             status_code=422
         )
     except Exception as e:
-        current_app.logger.error(f"Error creating product: {str(e)}")
+        current_app.logger.error("Error creating product: %s", e)
         return error_response(
             "An error occurred while creating product", 
             status_code=500
         )
 
 
-@products_bp.route('/<product_id>', methods=['PUT'])
+@products_bp.route('/<objectid:product_id>', methods=['PUT'])
 @admin_required
 def update_product(product_id):
     """Update a product (admin only).
     
-    Updates a product's information with the provided data.
+    Updates a product's information with the provided data. When the request
+    carries an If-Match header with the product version (its ETag), the update
+    only applies if the product has not changed since, and fails with 412
+    otherwise.
     
     Args:
-        product_id (str): The ID of the product to update.
+        product_id (ObjectId): The ID of the product to update.
     
     Returns:
         tuple: A JSON response with the updated product's information.
     """
     try:
-        # Check if product exists
-        product = Product.find_by_id(product_id)
-        if not product:
-            return error_response(
-                "Product not found", 
-                code="product_not_found", 
-                status_code=404
-            )
-        
+        expected_version = get_expected_version()
+    except ValueError as err:
+        return invalid_precondition_response(err)
+    
+    try:
         # Get update data
         json_data = request.get_json()
         if not json_data:
             return error_response("No input data provided", status_code=400)
         
-        # Validate and process input data
-        update_data = {}
-        for key, value in json_data.items():
-            if key not in ['id', '_id', 'created_at']:
-                update_data[key] = value
+        # Validate only the submitted fields
+        update_data = ProductSchema.load_partial(json_data)
+        if not update_data:
+            return error_response("No updatable fields provided", status_code=400)
         
         # Update the product
-        updated_product = Product.update(product['_id'], update_data)
+        updated_product = Product.update(
+            product_id, update_data, expected_version=expected_version
+        )
+        if not updated_product:
+            return error_response(
+                "Product not found", 
+                code="product_not_found", 
+                status_code=404
+            )
         
         # Serialize the updated product
         product_data = product_schema.dump(updated_product)
         
-        return success_response(
+        return with_etag(success_response(
             {'product': product_data}, 
             "Product updated successfully"
-        )
+        ), updated_product)
     
+    except VersionConflict as err:
+        return version_conflict_response(err)
     except ValidationError as err:
         return error_response(
             "Validation error", 
@@ -250,56 +229,271 @@ def update_product(product_id):
             status_code=422
         )
     except Exception as e:
-        current_app.logger.error(f"Error updating product {product_id}: {str(e)}")
+        current_app.logger.error("Error updating product %s: %s", product_id, e)
         return error_response(
             "An error occurred while updating product", 
             status_code=500
         )
 
 
-@products_bp.route('/<product_id>', methods=['DELETE'])
+@products_bp.route('/<objectid:product_id>', methods=['DELETE'])
 @admin_required
 def delete_product(product_id):
     """Delete a product (admin only).
     
-    Permanently deletes a product from the system.
+    Soft-deletes a product; it is archived after the retention period.
     
     Args:
-        product_id (str): The ID of the product to delete.
+        product_id (ObjectId): The ID of the product to delete.
     
     Returns:
         tuple: A JSON response confirming the deletion.
     """
     try:
-        # Check if product exists
-        product = Product.find_by_id(product_id)
-        if not product:
+        # Delete the product; nothing deleted means it did not exist
+        if not Product.delete(product_id):
             return error_response(
                 "Product not found", 
                 code="product_not_found", 
                 status_code=404
             )
         
-        # Delete the product
-        success = Product.delete(product['_id'])
-        
-        if success:
-            return success_response(message="Product deleted successfully")
-        else:
-            return error_response(
-                "Failed to delete product", 
-                code="deletion_failed", 
-                status_code=500
-            )
+        return success_response(message="Product deleted successfully")
     
     except Exception as e:
-        current_app.logger.error(f"Error deleting product {product_id}: {str(e)}")
+        current_app.logger.error("Error deleting product %s: %s", product_id, e)
         return error_response(
             "An error occurred while deleting product", 
             status_code=500
         )
 
 
+def inventory_error_response(error):
+    """Build the error response for a failed reservation.
+    
+    Args:
+        error (InventoryError): The reservation error.
+    
+    Returns:
+        tuple: A JSON error response (404 or 409).
+    """
+    details = {'product_id': error.product_id}
+    if error.available is not None:
+        details['available'] = error.available
+    return error_response(
+        str(error),
+        details=details,
+        code=error.code,
+        status_code=404 if error.code == 'product_not_found' else 409
+    )
+
+
+def reservation_error_response(error):
+    """Build the error response for a reservation that cannot be made or released.
+    
+    Args:
+        error (ReservationError): The reservation error.
+    
+    Returns:
+        tuple: A JSON error response (404 or 429).
+    """
+    return error_response(
+        str(error),
+        code=error.code,
+        status_code=404 if error.code == 'reservation_not_found' else 429
+    )
+
+
+def hold_reservation(items):
+    """Reserve items for the current user with the configured expiry and limit.
+    
+    Args:
+        items (list): (product_id, quantity) pairs.
+    
+    Returns:
+        dict: The reservation.
+    """
+    return Reservation.hold(
+        current_identity()['id'],
+        items,
+        ttl=current_app.config.get('RESERVATION_TTL', 900),
+        max_active=current_app.config.get('RESERVATION_MAX_ACTIVE', 5)
+    )
+
+
+@products_bp.route('/<objectid:product_id>/reserve', methods=['POST'])
+@authorize()
+def reserve_inventory(product_id):
+    """Reserve units of a product.
+    
+    Decrements the product's inventory atomically, failing instead of
+    overselling when not enough units are left. The units are held for the
+    user until the reservation is released or expires.
+    
+    Args:
+        product_id (ObjectId): The ID of the product to reserve.
+    
+    Returns:
+        tuple: A JSON response with the reservation.
+    """
+    try:
+        json_data = request.get_json()
+        if not json_data:
+            return error_response("No input data provided", status_code=400)
+        
+        reservation = reservation_schema.load(json_data)
+        held = hold_reservation([(product_id, reservation['quantity'])])
+        
+        return success_response(
+            {
+                'reservation_id': str(held['_id']),
+                'product_id': str(product_id),
+                'reserved': reservation['quantity'],
+                'expires_at': held['expires_at'].isoformat()
+            },
+            "Inventory reserved successfully"
+        )
+    
+    except ValidationError as err:
+        return error_response(
+            "Validation error", 
+            details=err.messages, 
+            code="validation_error", 
+            status_code=422
+        )
+    except InventoryError as err:
+        return inventory_error_response(err)
+    except ReservationError as err:
+        return reservation_error_response(err)
+    except Exception as e:
+        current_app.logger.error("Error reserving product %s: %s", product_id, e)
+        return error_response(
+            "An error occurred while reserving inventory", 
+            status_code=500
+        )
+
+
+@products_bp.route('/<objectid:product_id>/release', methods=['POST'])
+@admin_required
+def release_inventory(product_id):
+    """Release reserved units of a product back to inventory (admin only).
+    
+    Args:
+        product_id (ObjectId): The ID of the product to release.
+    
+    Returns:
+        tuple: A JSON response with the updated inventory.
+    """
+    try:
+        json_data = request.get_json()
+        if not json_data:
+            return error_response("No input data provided", status_code=400)
+        
+        reservation = reservation_schema.load(json_data)
+        inventory = Product.release(product_id, reservation['quantity'])
+        
+        return success_response(
+            {'product_id': str(product_id), 'released': reservation['quantity'], 'inventory': inventory},
+            "Inventory released successfully"
+        )
+    
+    except ValidationError as err:
+        return error_response(
+            "Validation error", 
+            details=err.messages, 
+            code="validation_error", 
+            status_code=422
+        )
+    except InventoryError as err:
+        return inventory_error_response(err)
+    except Exception as e:
+        current_app.logger.error("Error releasing product %s: %s", product_id, e)
+        return error_response(
+            "An error occurred while releasing inventory", 
+            status_code=500
+        )
+
+
+@products_bp.route('/reserve', methods=['POST'])
+@authorize()
+def reserve_cart():
+    """Reserve inventory for every item of a cart.
+    
+    The cart is reserved in a single batch: either every item is reserved or
+    none is. The units are held for the user until the reservation is
+    released or expires.
+    
+    Returns:
+        tuple: A JSON response with the reservation and its items.
+    """
+    try:
+        json_data = request.get_json()
+        if not json_data:
+            return error_response("No input data provided", status_code=400)
+        
+        cart = cart_reservation_schema.load(json_data)
+        held = hold_reservation([(item['product_id'], item['quantity']) for item in cart['items']])
+        
+        return success_response(
+            {
+                'reservation_id': str(held['_id']),
+                'items': cart['items'],
+                'expires_at': held['expires_at'].isoformat()
+            },
+            "Cart reserved successfully"
+        )
+    
+    except ValidationError as err:
+        return error_response(
+            "Validation error", 
+            details=err.messages, 
+            code="validation_error", 
+            status_code=422
+        )
+    except InventoryError as err:
+        return inventory_error_response(err)
+    except ReservationError as err:
+        return reservation_error_response(err)
+    except Exception as e:
+        current_app.logger.error("Error reserving cart: %s", e)
+        return error_response(
+            "An error occurred while reserving the cart", 
+            status_code=500
+        )
+
+
+@products_bp.route('/reservations/<objectid:reservation_id>/release', methods=['POST'])
+@authorize()
+def release_reservation(reservation_id):
+    """Release a reservation, returning its units to inventory.
+    
+    Users can release their own reservations; admins can release any.
+    
+    Args:
+        reservation_id (ObjectId): The ID of the reservation to release.
+    
+    Returns:
+        tuple: A JSON response with the released items.
+    """
+    try:
+        user_id = None if has_role('admin') else current_identity()['id']
+        released = Reservation.release(reservation_id, user_id=user_id)
+        
+        return success_response(
+            {'reservation_id': str(released['_id']), 'items': released['items']},
+            "Reservation released successfully"
+        )
+    
+    except ReservationError as err:
+        return reservation_error_response(err)
+    except Exception as e:
+        current_app.logger.error("Error releasing reservation %s: %s", reservation_id, e)
+        return error_response(
+            "An error occurred while releasing the reservation", 
+            status_code=500
+        )
+
+
 @products_bp.route('/search', methods=['GET'])
 def search_products():
     """Search for products.
@@ -319,14 +513,15 @@ def search_products():
                 status_code=400
             )
         
-        # Get pagination parameters
-        page = int(request.args.get('page', 1))
-        per_page = min(int(request.args.get('per_page', 20)), 100)  # Max 100 per page
+        # Parse pagination and price arguments like the list endpoint does
+        compiler = Product.query_compiler()
+        page, per_page = compiler.parse_pagination(request.args)
+        price_range = compiler.filter_condition('price', request.args) or {}
         
         # Get filter parameters
         category = request.args.get('category')
-        min_price = float(request.args.get('min_price', 0))
-        max_price = float(request.args.get('max_price', 1000000)) if request.args.get('max_price') else None
+        min_price = price_range.get('$gte', 0)
+        max_price = price_range.get('$lte')
         
         # Calculate pagination offset
         skip = (page - 1) * per_page
@@ -359,14 +554,40 @@ def search_products():
             'count': len(serialized_products)
         })
     
+    except InvalidQuery as e:
+        return error_response(str(e), details=e.details, code=e.code, status_code=400)
+    
     except Exception as e:
-        current_app.logger.error(f"Error searching products: {str(e)}")
+        current_app.logger.error("Error searching products: %s", e)
         return error_response(
             "An error occurred while searching for products", 
             status_code=500
         )
 
 
+@products_bp.route('/facets', methods=['GET'])
+def get_facets():
+    """Get catalog facet counts.
+    
+    Returns product counts per category, per price range and per status,
+    served from in-memory counters instead of one count query per category.
+    
+    Returns:
+        tuple: A JSON response with the facet counts.
+    """
+    try:
+        return success_response({
+            'facets': current_app.extensions['product_facets'].get()
+        })
+    
+    except Exception as e:
+        current_app.logger.error("Error getting facets: %s", e)
+        return error_response(
+            "An error occurred while retrieving facets", 
+            status_code=500
+        )
+
+
 @products_bp.route('/categories', methods=['GET'])
 def get_categories():
     """Get all product categories.
@@ -382,7 +603,7 @@ def get_categories():
         })
     
     except Exception as e:
-        current_app.logger.error(f"Error getting categories: {str(e)}")
+        current_app.logger.error("Error getting categories: %s", e)
         return error_response(
             "An error occurred while retrieving categories", 
             status_code=500
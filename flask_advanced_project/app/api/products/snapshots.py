@@ -0,0 +1,298 @@
+# app/api/products/snapshots.py
+
+"""Pre-rendered product list pages.
+
+This module keeps the first pages of `GET /api/products` for every category,
+with and without the active filter, as ready-to-send JSON bytes along with
+their compressed variants. Hot list requests are served from these snapshots
+without querying, serializing or compressing anything per request.
+"""
+
+import threading
+import time
+from pymongo import ReadPreference
+
+from app.middlewares.compression import PrecompressedBody
+from app.models.base_model import get_version, register_write_listener
+from app.models.memory_store import matches
+from app.models.product import Product, ProductSchema
+from app.utils.response import pagination_response
+
+
+def _list_filter(category, active_only):
+    """Build the product filter of a list request, as the list route does."""
+    filter_dict = {}
+    if category:
+        filter_dict['category'] = category
+    if active_only:
+        filter_dict['active'] = True
+    return filter_dict
+
+
+class _ListSnapshot:
+    """The materialized first pages of one filter combination.
+
+    Snapshots are never modified once published; updates build a new one.
+    """
+
+    def __init__(self, ids, versions, items, total, oldest, bodies=None, built_at=None):
+        self.ids = ids
+        self.positions = {document_id: position for position, document_id in enumerate(ids)}
+        self.versions = versions
+        self.items = items
+        self.total = total
+        self.oldest = oldest  # created_at of the last listed product
+        self.bodies = bodies or []
+        self.built_at = built_at if built_at is not None else time.monotonic()
+
+
+class ProductListSnapshots:
+    """Pre-rendered first pages of the product list per filter combination.
+
+    A combination is a category (or none) and whether only active products
+    are listed. Its snapshot holds the products on the first `pages` pages,
+    their serialized form and one PrecompressedBody per page, and is built
+    on first use with one query and one count.
+
+    Writes made through the model layer keep snapshots current: a product
+    entering or leaving a combination (created, deleted, moved to another
+    category, (de)activated) invalidates it, and an update to a listed
+    product re-renders only the page showing it. Writes reported by the
+    change feed invalidate the snapshots they visibly touch. Writes that
+    are not reported, such as inventory reservations and bulk writes, show
+    up when a snapshot reaches `max_age`.
+    """
+
+    def __init__(self, pages=5, per_page=20, max_age=60, precompress=True):
+        """Initialize the snapshots.
+
+        Args:
+            pages (int, optional): Pages kept per combination. Defaults to 5.
+            per_page (int, optional): The page size served from snapshots;
+                other page sizes are queried as usual. Defaults to 20.
+            max_age (float, optional): Seconds after which a snapshot is
+                rebuilt. 0 keeps snapshots until a write invalidates them.
+                Defaults to 60.
+            precompress (bool, optional): Compute the compressed variants
+                when a page is rendered. Defaults to True.
+        """
+        self.pages = pages
+        self.per_page = per_page
+        self.max_age = max_age
+        self.precompress = precompress
+        self._schema = ProductSchema()
+        self._filters = {
+            (category, active_only): Product._live(_list_filter(category, active_only))
+            for category in [None] + Product.CATEGORIES
+            for active_only in (False, True)
+        }
+        self._snapshots = {}
+        # Bumped by every invalidation, so builds that raced a write are discarded
+        self._generations = dict.fromkeys(self._filters, 0)
+        self._build_locks = {key: threading.Lock() for key in self._filters}
+        self._lock = threading.Lock()
+
+    def get(self, query):
+        """Get a pre-rendered list page.
+
+        Args:
+            query (CompiledQuery): The compiled list request.
+
+        Returns:
+            PrecompressedBody or None: The page, or None if this request is
+                not served from snapshots.
+        """
+        filter_dict = query.filter
+        if (query.sort != Product.default_sort or query.per_page != self.per_page
+                or not 1 <= query.page <= self.pages
+                or not set(filter_dict) <= {'category', 'active'}
+                or filter_dict.get('active', True) is not True):
+            return None
+        key = (filter_dict.get('category'), 'active' in filter_dict)
+        if key not in self._filters:
+            return None
+
+        snapshot = self._snapshots.get(key)
+        if snapshot is None or self._expired(snapshot):
+            snapshot = self._build(key)
+        return snapshot.bodies[query.page - 1]
+
+    def clear(self):
+        """Drop every snapshot."""
+        with self._lock:
+            for key in self._filters:
+                self._invalidate(key)
+
+    def _expired(self, snapshot):
+        return bool(self.max_age) and time.monotonic() - snapshot.built_at >= self.max_age
+
+    def _invalidate(self, key):
+        # Callers hold self._lock
+        self._snapshots.pop(key, None)
+        self._generations[key] += 1
+
+    def _publish(self, key, snapshot, generation):
+        with self._lock:
+            if self._generations[key] == generation:
+                self._snapshots[key] = snapshot
+
+    # Rendering
+
+    def _build(self, key):
+        """Build a combination's snapshot, one caller at a time."""
+        with self._build_locks[key]:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None and not self._expired(snapshot):
+                return snapshot
+
+            generation = self._generations[key]
+            filter_dict = _list_filter(*key)
+            # Snapshots are kept until the next write or max_age, so they are
+            # built from the primary rather than a possibly lagging secondary
+            products = Product.find(
+                filter_dict=filter_dict,
+                sort=[('created_at', -1)],
+                limit=self.pages * self.per_page,
+                read_preference=ReadPreference.PRIMARY
+            )
+            snapshot = _ListSnapshot(
+                ids=[product['_id'] for product in products],
+                versions=[get_version(product) for product in products],
+                items=[self._schema.dump(product) for product in products],
+                total=Product.count(filter_dict, read_preference=ReadPreference.PRIMARY),
+                oldest=products[-1].get('created_at') if products else None
+            )
+            snapshot.bodies = [self._render(snapshot, page) for page in range(1, self.pages + 1)]
+            self._publish(key, snapshot, generation)
+            return snapshot
+
+    def _render(self, snapshot, page):
+        """Render one page exactly as the list route would."""
+        start = (page - 1) * self.per_page
+        response, status_code = pagination_response(
+            items=snapshot.items[start:start + self.per_page],
+            page=page,
+            per_page=self.per_page,
+            total=snapshot.total
+        )
+        body = PrecompressedBody(response.get_data(), response.mimetype, status_code)
+        if self.precompress:
+            body.precompress()
+        return body
+
+    def _patch(self, key, product):
+        """Re-render the page showing an updated product."""
+        with self._build_locks[key]:
+            snapshot = self._snapshots.get(key)
+            position = snapshot.positions.get(product['_id']) if snapshot is not None else None
+            if position is None:
+                return
+            # Listeners of concurrent writes may run out of order; never let
+            # an older version of the product overwrite a newer one
+            if get_version(product) <= snapshot.versions[position]:
+                return
+            generation = self._generations[key]
+
+            items = list(snapshot.items)
+            items[position] = self._schema.dump(product)
+            versions = list(snapshot.versions)
+            versions[position] = get_version(product)
+            patched = _ListSnapshot(
+                snapshot.ids, versions, items, snapshot.total, snapshot.oldest,
+                bodies=list(snapshot.bodies), built_at=snapshot.built_at
+            )
+            page = position // self.per_page + 1
+            patched.bodies[page - 1] = self._render(patched, page)
+            self._publish(key, patched, generation)
+
+    # Write notifications
+
+    def on_write(self, before, after):
+        """Update the snapshots affected by a product write.
+
+        Args:
+            before (dict or None): The product before the write.
+            after (dict or None): The product after the write.
+        """
+        document_id = (after or before)['_id']
+        patches = []
+        with self._lock:
+            for key, filter_dict in self._filters.items():
+                listed_before = before is not None and matches(before, filter_dict)
+                listed_after = after is not None and matches(after, filter_dict)
+                if not listed_before and not listed_after:
+                    continue
+                snapshot = self._snapshots.get(key)
+                if listed_before != listed_after or snapshot is None:
+                    # The total and possibly every page changes
+                    self._invalidate(key)
+                elif document_id in snapshot.positions:
+                    patches.append(key)
+
+        for key in patches:
+            self._patch(key, after)
+
+    def on_change(self, event):
+        """Handle a change feed event.
+
+        The feed also reports this process's own writes, which on_write has
+        already applied; those are recognised by their version and skipped.
+
+        Args:
+            event (dict): The change event.
+        """
+        if event['operation'] == 'invalidate':
+            self.clear()
+            return
+
+        document = event['document']
+        with self._lock:
+            for key, filter_dict in self._filters.items():
+                snapshot = self._snapshots.get(key)
+                if snapshot is None:
+                    continue
+                position = snapshot.positions.get(event['document_id'])
+                if position is not None:
+                    if document is None or snapshot.versions[position] != get_version(document):
+                        self._invalidate(key)
+                elif document is not None and matches(document, filter_dict) and (
+                    len(snapshot.ids) < self.pages * self.per_page
+                    or _newer(document.get('created_at'), snapshot.oldest)
+                ):
+                    # The product belongs on one of the snapshot's pages
+                    self._invalidate(key)
+
+
+def _newer(created_at, oldest):
+    """Check whether a product sorts before the last listed one."""
+    try:
+        return created_at is not None and created_at > oldest
+    except TypeError:
+        return True
+
+
+def init_product_snapshots(app):
+    """Create the application's product list snapshots, if enabled.
+
+    Args:
+        app (Flask): The Flask application instance.
+
+    Returns:
+        ProductListSnapshots or None: The snapshots, or None when disabled.
+    """
+    if not app.config.get('PRODUCT_SNAPSHOTS_ENABLED', True):
+        return None
+
+    snapshots = ProductListSnapshots(
+        pages=app.config.get('PRODUCT_SNAPSHOT_PAGES', 5),
+        per_page=app.config.get('PRODUCT_SNAPSHOT_PER_PAGE', 20),
+        max_age=app.config.get('PRODUCT_SNAPSHOT_MAX_AGE', 60),
+        precompress=app.config.get('COMPRESS_ENABLED', True)
+    )
+    app.extensions['product_snapshots'] = snapshots
+    register_write_listener(app, Product.collection_name, snapshots.on_write)
+
+    feed = app.extensions.get('change_feed')
+    if feed is not None:
+        feed.subscribe(snapshots.on_change, [Product.collection_name])
+    return snapshots
@@ -6,13 +6,19 @@ This module defines the API routes for user management, including
 retrieving user information and user administration.
 """
 
-from flask import Blueprint, request, current_app
-from flask_jwt_extended import jwt_required, current_user, get_jwt
+from flask import Blueprint, request, current_app, g
 from marshmallow import ValidationError
-from bson import ObjectId
 
+from app.auth.authorization import (
+    Policy, authorize, admin_required, current_identity, has_role
+)
 from app.models.user import User, UserSchema, PublicUserSchema
+from app.models.base_model import VersionConflict, WriteOutcome
+from app.models.query_compiler import InvalidQuery
 from app.utils.response import success_response, error_response, pagination_response
+from app.utils.conditional import (
+    get_expected_version, with_etag, invalid_precondition_response, version_conflict_response
+)
 
 # Create blueprint
 users_bp = Blueprint('users', __name__)
@@ -21,36 +27,15 @@ users_bp = Blueprint('users', __name__)
 user_schema = UserSchema()
 public_user_schema = PublicUserSchema()
 
-# Define a decorator for admin-only routes
-def admin_required(fn):
-    """Decorator that checks if the current user has admin role.
-    
-    Args:
-        fn (function): The function to wrap.
-    
-    Returns:
-        function: The wrapped function that includes an admin check.
-    """
-    @jwt_required()
-    def wrapper(*args, **kwargs):
-        # Get current user's role from the JWT claims
-        claims = get_jwt()
-        identity = claims.get('sub', {})
-        
-        if isinstance(identity, dict) and identity.get('role') == 'admin':
-            return fn(*args, **kwargs)
-        else:
-            return error_response(
-                "Admin privileges required", 
-                code="admin_required", 
-                status_code=403
-            )
-    
-    # Preserve the wrapped function's metadata
-    wrapper.__name__ = fn.__name__
-    wrapper.__doc__ = fn.__doc__
-    
-    return wrapper
+# Users may read and update their own profile; admins any profile
+READ_PROFILE = Policy(
+    roles=['admin'], owner_arg='user_id',
+    message="You can only access your own profile", code="permission_denied"
+)
+UPDATE_PROFILE = Policy(
+    roles=['admin'], owner_arg='user_id',
+    message="You can only update your own profile", code="permission_denied"
+)
 
 
 @users_bp.route('', methods=['GET'])
@@ -58,56 +43,51 @@ def admin_required(fn):
 def get_users():
     """Get all users (admin only).
     
-    Retrieves a paginated list of all users.
+    Retrieves a paginated list of all users, with optional filtering by
+    active status and role, and sorting by creation date or username.
     
     Returns:
         tuple: A JSON response with the list of users and pagination metadata.
     """
     try:
-        # Get pagination parameters from query string
-        page = int(request.args.get('page', 1))
-        per_page = min(int(request.args.get('per_page', 20)), 100)  # Max 100 per page
-        
-        # Get filter parameter
-        active_only = request.args.get('active', '').lower() == 'true'
-        
-        # Build filter
-        filter_dict = {}
-        if active_only:
-            filter_dict['active'] = True
+        # Compile pagination, filter and sort parameters from the query string
+        query = User.compile_query(request.args)
+        g.query_shape = query.shape
         
         # Get users with pagination
-        skip = (page - 1) * per_page
         users = User.find(
-            filter_dict=filter_dict, 
-            sort=[('created_at', -1)],
-            skip=skip,
-            limit=per_page
+            filter_dict=query.filter, 
+            sort=query.sort,
+            skip=query.skip,
+            limit=query.per_page
         )
         
         # Count total users for pagination metadata
-        total_users = User.count(filter_dict)
+        total_users = User.count(query.filter)
         
         # Serialize the users
         serialized_users = [user_schema.dump(user) for user in users]
         
         return pagination_response(
             items=serialized_users,
-            page=page,
-            per_page=per_page,
+            page=query.page,
+            per_page=query.per_page,
             total=total_users
         )
     
+    except InvalidQuery as e:
+        return error_response(str(e), details=e.details, code=e.code, status_code=400)
+    
     except Exception as e:
-        current_app.logger.error(f"Error getting users: {str(e)}")
+        current_app.logger.error("Error getting users: %s", e)
         return error_response(
             "An error occurred while retrieving users", 
             status_code=500
         )
 
 
-@users_bp.route('/<user_id>', methods=['GET'])
-@jwt_required()
+@users_bp.route('/<objectid:user_id>', methods=['GET'])
+@authorize(READ_PROFILE)
 def get_user(user_id):
     """Get a specific user's information.
     
@@ -115,24 +95,15 @@ def get_user(user_id):
     their own information, while admins can access any user's information.
     
     Args:
-        user_id (str): The ID of the user to retrieve.
+        user_id (ObjectId): The ID of the user to retrieve.
     
     Returns:
         tuple: A JSON response with the user's information.
     """
     try:
-        # Check if the requested user is the current user or if current user is admin
-        claims = get_jwt()
-        identity = claims.get('sub', {})
-        is_admin = isinstance(identity, dict) and identity.get('role') == 'admin'
-        is_self = str(current_user.get('_id')) == user_id
-        
-        if not is_admin and not is_self:
-            return error_response(
-                "You can only access your own profile", 
-                code="permission_denied", 
-                status_code=403
-            )
+        # The route's policy only admits admins and the user themselves
+        is_admin = has_role('admin')
+        is_self = current_identity()['id'] == str(user_id)
         
         # Get the user
         user = User.find_by_id(user_id)
@@ -149,52 +120,40 @@ def get_user(user_id):
         else:
             user_data = public_user_schema.dump(user)
         
-        return success_response({'user': user_data})
+        return with_etag(success_response({'user': user_data}), user)
     
     except Exception as e:
-        current_app.logger.error(f"Error getting user {user_id}: {str(e)}")
+        current_app.logger.error("Error getting user %s: %s", user_id, e)
         return error_response(
             "An error occurred while retrieving user information", 
             status_code=500
         )
 
 
-@users_bp.route('/<user_id>', methods=['PUT'])
-@jwt_required()
+@users_bp.route('/<objectid:user_id>', methods=['PUT'])
+@authorize(UPDATE_PROFILE)
 def update_user(user_id):
     """Update a user's information.
     
     Updates a user's profile information. Regular users can only update
     their own information, while admins can update any user's information.
+    An If-Match header with the user version (its ETag) makes the update
+    conditional, failing with 412 if the user changed in the meantime.
     
     Args:
-        user_id (str): The ID of the user to update.
+        user_id (ObjectId): The ID of the user to update.
     
     Returns:
         tuple: A JSON response with the updated user information.
     """
     try:
-        # Check if the requested user is the current user or if current user is admin
-        claims = get_jwt()
-        identity = claims.get('sub', {})
-        is_admin = isinstance(identity, dict) and identity.get('role') == 'admin'
-        is_self = str(current_user.get('_id')) == user_id
-        
-        if not is_admin and not is_self:
-            return error_response(
-                "You can only update your own profile", 
-                code="permission_denied", 
-                status_code=403
-            )
-        
-        # Get the user
-        user = User.find_by_id(user_id)
-        if not user:
-            return error_response(
-                "User not found", 
-                code="user_not_found", 
-                status_code=404
-            )
+        expected_version = get_expected_version()
+    except ValueError as err:
+        return invalid_precondition_response(err)
+    
+    try:
+        # The route's policy only admits admins and the user themselves
+        is_admin = has_role('admin')
         
         # Get update data
         json_data = request.get_json()
@@ -216,20 +175,20 @@ def update_user(user_id):
                     status_code=403
                 )
         
-        # Do not allow changing username if it already exists
-        if 'username' in json_data and json_data['username'].lower() != user['username']:
+        # Do not allow changing username if another user already has it
+        if 'username' in json_data:
             existing_user = User.find_by_username(json_data['username'])
-            if existing_user:
+            if existing_user and existing_user['_id'] != user_id:
                 return error_response(
                     "Username already taken", 
                     code="username_exists", 
                     status_code=409
                 )
         
-        # Do not allow changing email if it already exists
-        if 'email' in json_data and json_data['email'].lower() != user['email']:
+        # Do not allow changing email if another user already has it
+        if 'email' in json_data:
             existing_user = User.find_by_email(json_data['email'])
-            if existing_user:
+            if existing_user and existing_user['_id'] != user_id:
                 return error_response(
                     "Email already registered", 
                     code="email_exists", 
@@ -247,12 +206,23 @@ def update_user(user_id):
             json_data['username'] = json_data['username'].lower().strip()
         
         # Update the user
-        updated_user = User.update(user['_id'], json_data)
+        updated_user = User.update(user_id, json_data, expected_version=expected_version)
+        if not updated_user:
+            return error_response(
+                "User not found", 
+                code="user_not_found", 
+                status_code=404
+            )
         
         # Return the updated user info
         user_data = user_schema.dump(updated_user)
-        return success_response({'user': user_data}, "User updated successfully")
+        return with_etag(
+            success_response({'user': user_data}, "User updated successfully"),
+            updated_user
+        )
     
+    except VersionConflict as err:
+        return version_conflict_response(err)
     except ValidationError as err:
         return error_response(
             "Validation error", 
@@ -261,65 +231,54 @@ def update_user(user_id):
             status_code=422
         )
     except Exception as e:
-        current_app.logger.error(f"Error updating user {user_id}: {str(e)}")
+        current_app.logger.error("Error updating user %s: %s", user_id, e)
         return error_response(
             "An error occurred while updating user information", 
             status_code=500
         )
 
 
-@users_bp.route('/<user_id>', methods=['DELETE'])
+@users_bp.route('/<objectid:user_id>', methods=['DELETE'])
 @admin_required
 def delete_user(user_id):
     """Delete a user (admin only).
     
-    Permanently deletes a user from the system.
+    Soft-deletes a user; the account is archived after the retention period.
     
     Args:
-        user_id (str): The ID of the user to delete.
+        user_id (ObjectId): The ID of the user to delete.
     
     Returns:
         tuple: A JSON response confirming the deletion.
     """
     try:
         # Check if trying to delete self
-        if str(current_user.get('_id')) == user_id:
+        if current_identity()['id'] == str(user_id):
             return error_response(
                 "You cannot delete your own account", 
                 code="self_deletion_prevented", 
                 status_code=400
             )
         
-        # Get the user to check if it exists
-        user = User.find_by_id(user_id)
-        if not user:
+        # Delete the user; nothing deleted means it did not exist
+        if not User.delete(user_id):
             return error_response(
                 "User not found", 
                 code="user_not_found", 
                 status_code=404
             )
         
-        # Delete the user
-        success = User.delete(user['_id'])
-        
-        if success:
-            return success_response(message="User deleted successfully")
-        else:
-            return error_response(
-                "Failed to delete user", 
-                code="deletion_failed", 
-                status_code=500
-            )
+        return success_response(message="User deleted successfully")
     
     except Exception as e:
-        current_app.logger.error(f"Error deleting user {user_id}: {str(e)}")
+        current_app.logger.error("Error deleting user %s: %s", user_id, e)
         return error_response(
             "An error occurred while deleting user", 
             status_code=500
         )
 
 
-@users_bp.route('/<user_id>/activate', methods=['PUT'])
+@users_bp.route('/<objectid:user_id>/activate', methods=['PUT'])
 @admin_required
 def activate_user(user_id):
     """Activate a user account (admin only).
@@ -327,40 +286,35 @@ def activate_user(user_id):
     Changes a user's status to active, allowing them to log in.
     
     Args:
-        user_id (str): The ID of the user to activate.
+        user_id (ObjectId): The ID of the user to activate.
     
     Returns:
         tuple: A JSON response confirming the activation.
     """
     try:
-        # Get the user
-        user = User.find_by_id(user_id)
-        if not user:
+        # Only inactive users are updated; users without the field are active
+        outcome = User.update_if(user_id, {'active': False}, {'active': True})
+        
+        if outcome == WriteOutcome.NOT_FOUND:
             return error_response(
                 "User not found", 
                 code="user_not_found", 
                 status_code=404
             )
-        
-        # Check if already active
-        if user.get('active', True):
+        if outcome == WriteOutcome.NOOP:
             return success_response(message="User is already active")
         
-        # Update user status
-        updated_user = User.update(user['_id'], {'active': True})
-        
-        # Return success
         return success_response(message="User activated successfully")
     
     except Exception as e:
-        current_app.logger.error(f"Error activating user {user_id}: {str(e)}")
+        current_app.logger.error("Error activating user %s: %s", user_id, e)
         return error_response(
             "An error occurred while activating user", 
             status_code=500
         )
 
 
-@users_bp.route('/<user_id>/deactivate', methods=['PUT'])
+@users_bp.route('/<objectid:user_id>/deactivate', methods=['PUT'])
 @admin_required
 def deactivate_user(user_id):
     """Deactivate a user account (admin only).
@@ -368,41 +322,36 @@ def deactivate_user(user_id):
     Changes a user's status to inactive, preventing them from logging in.
     
     Args:
-        user_id (str): The ID of the user to deactivate.
+        user_id (ObjectId): The ID of the user to deactivate.
     
     Returns:
         tuple: A JSON response confirming the deactivation.
     """
     try:
         # Check if trying to deactivate self
-        if str(current_user.get('_id')) == user_id:
+        if current_identity()['id'] == str(user_id):
             return error_response(
                 "You cannot deactivate your own account", 
                 code="self_deactivation_prevented", 
                 status_code=400
             )
         
-        # Get the user
-        user = User.find_by_id(user_id)
-        if not user:
+        # Only active users are updated; users without the field are active
+        outcome = User.update_if(user_id, {'active': {'$ne': False}}, {'active': False})
+        
+        if outcome == WriteOutcome.NOT_FOUND:
             return error_response(
                 "User not found", 
                 code="user_not_found", 
                 status_code=404
             )
-        
-        # Check if already inactive
-        if not user.get('active', True):
+        if outcome == WriteOutcome.NOOP:
             return success_response(message="User is already inactive")
         
-        # Update user status
-        updated_user = User.update(user['_id'], {'active': False})
-        
-        # Return success
         return success_response(message="User deactivated successfully")
     
     except Exception as e:
-        current_app.logger.error(f"Error deactivating user {user_id}: {str(e)}")
+        current_app.logger.error("Error deactivating user %s: %s", user_id, e)
         return error_response(
             "An error occurred while deactivating user", 
             status_code=500
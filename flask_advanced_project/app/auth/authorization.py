@@ -0,0 +1,139 @@
+# app/auth/authorization.py
+
+"""Route authorization policies.
+
+This module replaces per-blueprint permission decorators with declarative
+policies. A route states who may call it (roles, or the owner of the
+resource named by a URL argument) and whether it needs the user's database
+record. Policies are compiled into a check when the route is registered, and
+routes that only need the token's claims skip the user lookup that
+`jwt_required` performs on every request.
+"""
+
+from functools import wraps
+from flask import g
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+
+from app.utils.response import error_response
+
+
+class Policy:
+    """Who may call a route.
+
+    A request is allowed when the token's role is one of `roles`, or when the
+    token's user ID equals the URL argument named by `owner_arg`. A policy
+    with neither admits every authenticated user.
+    """
+
+    def __init__(self, roles=None, owner_arg=None, load_user=False,
+                 message="Admin privileges required", code="admin_required"):
+        """Initialize the policy.
+
+        Args:
+            roles (list, optional): Roles allowed to call the route. Defaults to None.
+            owner_arg (str, optional): URL argument holding a user ID; that user
+                may call the route. Defaults to None.
+            load_user (bool, optional): Whether the route uses `current_user`,
+                which requires reading the user from the database. Defaults to False.
+            message (str, optional): Message of the 403 response.
+                Defaults to "Admin privileges required".
+            code (str, optional): Error code of the 403 response.
+                Defaults to "admin_required".
+        """
+        self.roles = frozenset(roles or ())
+        self.owner_arg = owner_arg
+        self.load_user = load_user
+        self.message = message
+        self.code = code
+
+    def compile(self):
+        """Compile the policy into a check.
+
+        Returns:
+            function: Takes the token identity and the view arguments and
+                returns whether the request is allowed.
+        """
+        roles = self.roles
+        owner_arg = self.owner_arg
+
+        if not roles and owner_arg is None:
+            return lambda identity, view_args: True
+        if owner_arg is None:
+            return lambda identity, view_args: identity['role'] in roles
+        return lambda identity, view_args: (
+            identity['role'] in roles or identity['id'] == str(view_args.get(owner_arg))
+        )
+
+
+# Common policies
+AUTHENTICATED = Policy()
+ADMIN = Policy(roles=['admin'])
+
+
+def _identity(claims):
+    """Extract the {'id', 'role'} identity from verified token claims."""
+    identity = claims.get('sub')
+    if isinstance(identity, dict):
+        return {'id': identity.get('id'), 'role': identity.get('role')}
+    return {'id': identity, 'role': None}
+
+
+def authorize(policy=AUTHENTICATED):
+    """Decorator that protects a route with a policy.
+
+    The token is verified as with `jwt_required`, including revocation. The
+    token identity is available to the route through `current_identity`, and
+    `current_user` holds the database record only for policies with
+    `load_user`.
+
+    Args:
+        policy (Policy, optional): The policy. Defaults to AUTHENTICATED.
+
+    Returns:
+        function: The decorator.
+    """
+    check = policy.compile()
+    claims_only = not policy.load_user
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            # Read by the user lookup callback, which skips the database for claims-only routes
+            g.claims_only = claims_only
+            verify_jwt_in_request()
+
+            identity = _identity(get_jwt())
+            if not check(identity, kwargs):
+                return error_response(policy.message, code=policy.code, status_code=403)
+
+            g.identity = identity
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def current_identity():
+    """Get the identity of the token authorizing the current request.
+
+    Returns:
+        dict: The user's 'id' and 'role' from the token claims.
+    """
+    return g.identity
+
+
+def has_role(role):
+    """Check the role of the token authorizing the current request.
+
+    Args:
+        role (str): The role.
+
+    Returns:
+        bool: True if the token carries this role.
+    """
+    return g.identity['role'] == role
+
+
+# Decorator for admin-only routes
+admin_required = authorize(ADMIN)
@@ -7,9 +7,12 @@ like token creation, expiration, and validation.
 """
 
 import json
-from flask import jsonify
+from flask import g, current_app
 from datetime import datetime, timezone
 
+from app.auth.keys import get_keyring
+from app.utils.response import error_response
+
 
 def register_jwt_callbacks(jwt):
     """Register JWT callback functions.
@@ -49,11 +52,17 @@ def register_jwt_callbacks(jwt):
             
         Returns:
             dict: The user object from the database, or None if not found.
+                For claims-only routes, the token identity.
         """
         from app.models.user import User
         
         identity = jwt_data["sub"]
         
+        # Routes whose authorization policy only needs the token's claims
+        # skip the database read; current_user is then the token identity
+        if g.get('claims_only'):
+            return identity
+        
         # If identity is a dict with an 'id' field (from our identity_lookup)
         if isinstance(identity, dict) and 'id' in identity:
             user_id = identity['id']
@@ -70,6 +79,53 @@ def register_jwt_callbacks(jwt):
             
         return user
     
+    @jwt.encode_key_loader
+    def encode_key_callback(_identity):
+        """Get the key that signs new tokens.
+        
+        Args:
+            _identity (Any): The token identity (not used).
+            
+        Returns:
+            The active private key with asymmetric signing, otherwise the
+            shared secret.
+        """
+        keyring = get_keyring(current_app)
+        if keyring is None:
+            return current_app.config['JWT_SECRET_KEY']
+        return keyring.signing_key()
+    
+    @jwt.decode_key_loader
+    def decode_key_callback(jwt_header, _jwt_data):
+        """Get the key that verifies a token, selected by its 'kid' header.
+        
+        Args:
+            jwt_header (dict): The unverified JWT header.
+            _jwt_data (dict): The unverified JWT payload (not used).
+            
+        Returns:
+            The public key with asymmetric signing, otherwise the shared secret.
+        """
+        keyring = get_keyring(current_app)
+        if keyring is None:
+            return current_app.config['JWT_SECRET_KEY']
+        return keyring.verification_key(jwt_header.get('kid'), jwt_header.get('alg'))
+    
+    @jwt.additional_headers_loader
+    def additional_headers_callback(_identity):
+        """Add the signing key's ID to the headers of new tokens.
+        
+        Args:
+            _identity (Any): The token identity (not used).
+            
+        Returns:
+            dict: The additional JWT headers.
+        """
+        keyring = get_keyring(current_app)
+        if keyring is None:
+            return {}
+        return {'kid': keyring.active.kid}
+    
     @jwt.expired_token_loader
     def expired_token_callback(_jwt_header, _jwt_data):
         """Handle expired tokens.
@@ -81,11 +137,7 @@ def register_jwt_callbacks(jwt):
         Returns:
             tuple: A response with an error message and 401 status code.
         """
-        return jsonify({
-            'status': 'error',
-            'message': 'Token has expired',
-            'code': 'token_expired'
-        }), 401
+        return error_response("Token has expired", code="token_expired", status_code=401)
     
     @jwt.invalid_token_loader
     def invalid_token_callback(error_string):
@@ -97,12 +149,9 @@ def register_jwt_callbacks(jwt):
         Returns:
             tuple: A response with an error message and 401 status code.
         """
-        return jsonify({
-            'status': 'error',
-            'message': 'Signature verification failed',
-            'details': error_string,
-            'code': 'invalid_token'
-        }), 401
+        return error_response(
+            "Signature verification failed", details=error_string, code="invalid_token", status_code=401
+        )
     
     @jwt.unauthorized_loader
     def missing_token_callback(error_string):
@@ -114,12 +163,9 @@ def register_jwt_callbacks(jwt):
         Returns:
             tuple: A response with an error message and 401 status code.
         """
-        return jsonify({
-            'status': 'error',
-            'message': 'Authorization token is missing',
-            'details': error_string,
-            'code': 'missing_token'
-        }), 401
+        return error_response(
+            "Authorization token is missing", details=error_string, code="missing_token", status_code=401
+        )
     
     @jwt.token_in_blocklist_loader
     def check_if_token_is_revoked(_jwt_header, jwt_payload):
@@ -0,0 +1,235 @@
+# app/auth/keys.py
+
+"""Asymmetric JWT signing keys.
+
+This module manages the keys used when tokens are signed with RS256 or EdDSA
+instead of the shared HS256 secret. Every key has an ID (`kid`) carried in
+the token header; one key signs new tokens while older ones keep verifying
+the tokens they signed, and the public halves are published as a JSON Web
+Key Set so other services can verify tokens without calling this
+application.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import uuid
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+from jwt.exceptions import InvalidTokenError
+
+# Create a dedicated logger for key management
+key_logger = logging.getLogger('jwt_keys')
+
+# Asymmetric algorithms, with the key types they sign with
+ASYMMETRIC_ALGORITHMS = {
+    'RS256': rsa.RSAPublicKey,
+    'RS384': rsa.RSAPublicKey,
+    'RS512': rsa.RSAPublicKey,
+    'EdDSA': ed25519.Ed25519PublicKey,
+}
+
+
+class SigningKey:
+    """A key pair, or a public key kept to verify tokens it signed."""
+
+    def __init__(self, kid, algorithm, public_key, private_key=None):
+        """Initialize the key.
+
+        Args:
+            kid (str): The key ID.
+            algorithm (str): The JWT algorithm, such as 'RS256' or 'EdDSA'.
+            public_key: The cryptography public key.
+            private_key (optional): The cryptography private key, for keys
+                that can sign. Defaults to None.
+
+        Raises:
+            ValueError: If the algorithm does not match the key type.
+        """
+        if not isinstance(public_key, ASYMMETRIC_ALGORITHMS.get(algorithm, ())):
+            raise ValueError(f"Key {kid} cannot be used with {algorithm}")
+        self.kid = kid
+        self.algorithm = algorithm
+        self.public_key = public_key
+        self.private_key = private_key
+
+    def to_jwk(self):
+        """Export the public key as a JSON Web Key.
+
+        Returns:
+            dict: The JWK.
+        """
+        if self.algorithm == 'EdDSA':
+            jwk = OKPAlgorithm.to_jwk(self.public_key, as_dict=True)
+        else:
+            jwk = RSAAlgorithm.to_jwk(self.public_key, as_dict=True)
+        jwk.update({'kid': self.kid, 'alg': self.algorithm, 'use': 'sig'})
+        return jwk
+
+
+def generate_key(algorithm, kid=None):
+    """Generate a new signing key.
+
+    Args:
+        algorithm (str): 'RS256', 'RS384', 'RS512' or 'EdDSA'.
+        kid (str, optional): The key ID. Defaults to a random one.
+
+    Returns:
+        SigningKey: The key.
+    """
+    if algorithm == 'EdDSA':
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return SigningKey(kid or uuid.uuid4().hex, algorithm, private_key.public_key(), private_key)
+
+
+def _key_algorithm(public_key, algorithm):
+    """Get the JWT algorithm of a loaded key.
+
+    Ed25519 keys use EdDSA, and RSA keys the configured RSA algorithm, or
+    RS256 while migrating to EdDSA.
+    """
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        return 'EdDSA'
+    return algorithm if algorithm.startswith('RS') else 'RS256'
+
+
+def load_keys(directory, algorithm):
+    """Load the keys stored in a directory.
+
+    `<kid>.pem` files hold private keys in PEM format; `<kid>.pub.pem` files
+    hold public keys of retired keys that only verify tokens. RSA and Ed25519
+    keys can be mixed while migrating from one algorithm to the other.
+
+    Args:
+        directory (str): The directory.
+        algorithm (str): The configured JWT algorithm.
+
+    Returns:
+        list: The SigningKeys, ordered by key ID.
+    """
+    keys = []
+    for filename in sorted(os.listdir(directory)):
+        path = os.path.join(directory, filename)
+        with open(path, 'rb') as key_file:
+            data = key_file.read()
+        if filename.endswith('.pub.pem'):
+            public_key = serialization.load_pem_public_key(data)
+            keys.append(SigningKey(
+                filename[:-len('.pub.pem')], _key_algorithm(public_key, algorithm), public_key
+            ))
+        elif filename.endswith('.pem'):
+            private_key = serialization.load_pem_private_key(data, password=None)
+            public_key = private_key.public_key()
+            keys.append(SigningKey(
+                filename[:-len('.pem')], _key_algorithm(public_key, algorithm), public_key, private_key
+            ))
+    return keys
+
+
+class Keyring:
+    """The application's signing keys.
+
+    The active key signs new tokens. Every key verifies tokens carrying its
+    `kid`, so rotating keys does not invalidate tokens already issued.
+    """
+
+    def __init__(self, keys, active_kid=None):
+        """Initialize the keyring.
+
+        Args:
+            keys (list): The SigningKeys.
+            active_kid (str, optional): ID of the key that signs new tokens.
+                Defaults to the last private key.
+
+        Raises:
+            ValueError: If no key can sign.
+        """
+        self.keys = {key.kid: key for key in keys}
+        signing = [key for key in keys if key.private_key is not None]
+        if active_kid is None and signing:
+            active_kid = signing[-1].kid
+        if active_kid not in self.keys or self.keys[active_kid].private_key is None:
+            raise ValueError(f"No private key for the active key ID {active_kid}")
+        self.active = self.keys[active_kid]
+
+        # The key set never changes, so it is rendered once
+        self.jwks = json.dumps(
+            {'keys': [key.to_jwk() for key in self.keys.values()]}, sort_keys=True
+        ).encode('utf-8')
+        self.jwks_etag = hashlib.sha256(self.jwks).hexdigest()[:32]
+
+    @property
+    def algorithms(self):
+        """The algorithms of all keys, accepted when decoding."""
+        return sorted({key.algorithm for key in self.keys.values()})
+
+    def signing_key(self):
+        """Get the private key that signs new tokens."""
+        return self.active.private_key
+
+    def verification_key(self, kid, algorithm):
+        """Get the public key that verifies a token.
+
+        Args:
+            kid (str): The key ID from the token header.
+            algorithm (str): The algorithm from the token header.
+
+        Returns:
+            The cryptography public key.
+
+        Raises:
+            InvalidTokenError: If no key has this ID, or the key does not
+                use this algorithm.
+        """
+        key = self.keys.get(kid)
+        if key is None:
+            raise InvalidTokenError("Unknown signing key")
+        if key.algorithm != algorithm:
+            raise InvalidTokenError("The signing key does not use this algorithm")
+        return key.public_key
+
+
+def get_keyring(app):
+    """Get an application's keyring, or None when tokens use HS256."""
+    return app.extensions.get('jwt_keyring')
+
+
+def init_jwt_keys(app):
+    """Create the application's keyring when an asymmetric algorithm is configured.
+
+    Keys are loaded from `JWT_KEYS_DIR`. Without a key directory an
+    ephemeral key is generated, which is only suitable for development: its
+    tokens do not survive restarts and are not accepted by other workers.
+
+    Args:
+        app (Flask): The Flask application instance.
+
+    Returns:
+        Keyring or None: The keyring, or None when tokens use HS256.
+
+    Raises:
+        ValueError: If the algorithm is unsupported or the keys are unusable.
+    """
+    algorithm = app.config.get('JWT_ALGORITHM', 'HS256')
+    if algorithm.startswith('HS'):
+        return None
+    if algorithm not in ASYMMETRIC_ALGORITHMS:
+        raise ValueError(f"Unsupported JWT algorithm {algorithm}")
+
+    directory = app.config.get('JWT_KEYS_DIR')
+    if directory:
+        keys = load_keys(directory, algorithm)
+    else:
+        key_logger.warning("JWT_KEYS_DIR is not set; signing tokens with an ephemeral %s key", algorithm)
+        keys = [generate_key(algorithm)]
+
+    keyring = Keyring(keys, app.config.get('JWT_ACTIVE_KID') or None)
+    if keyring.active.algorithm != algorithm:
+        raise ValueError(f"The active key {keyring.active.kid} cannot sign with {algorithm}")
+    app.config['JWT_DECODE_ALGORITHMS'] = keyring.algorithms
+    app.extensions['jwt_keyring'] = keyring
+    return keyring
@@ -0,0 +1,331 @@
+# app/auth/refresh_tokens.py
+
+"""Refresh token rotation.
+
+This module tracks refresh tokens by family: a login starts a family, and
+every refresh replaces the family's refresh token with a new one. Only the
+latest token of a family is accepted. Presenting an earlier one means the
+token was copied, so the whole family is revoked, logging out both the
+thief and the user. A family is stored as a single document that a TTL
+index removes once its last token expires, so storage is bounded by the
+number of live sessions.
+
+Refresh tokens issued before families were tracked carry no family. The
+first use of such a token starts a family that records the token's ID, so a
+second use is detected as reuse like any other, and a password change
+rejects them as well.
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app
+from flask_jwt_extended import create_access_token, create_refresh_token
+from flask_jwt_extended.config import config as jwt_config
+from pymongo.collection import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+class RefreshTokenError(Exception):
+    """Raised when a refresh token cannot be used.
+
+    Attributes:
+        code (str): 'refresh_token_reused' when an already rotated token is
+            presented, or 'refresh_token_revoked' when its family was revoked
+            or has expired.
+    """
+
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+class RefreshTokenStore:
+    """Refresh token families, stored in MongoDB.
+
+    Rotating a token is a single conditional update of the family document
+    by its `_id`; the reason a rotation failed is only looked up on failure.
+    Families revoked through this worker are remembered in a bounded
+    in-process cache, so replayed tokens of a revoked family are rejected
+    without a database round trip.
+    """
+
+    def __init__(self, collection, cache_size=10000):
+        """Initialize the store.
+
+        Args:
+            collection (Collection): The collection holding the families.
+            cache_size (int, optional): Revoked families remembered in
+                process. Defaults to 10000.
+        """
+        self.collection = collection
+        self.cache_size = cache_size
+        self._revoked = OrderedDict()  # family ID -> expires_at
+        self._lock = threading.Lock()
+
+    def ensure_indexes(self):
+        """Create the TTL index, the index used to revoke a user's families
+        and the index letting each pre-family token start only one family."""
+        self.collection.create_index('expires_at', expireAfterSeconds=0)
+        self.collection.create_index('user_id')
+        self.collection.create_index(
+            'legacy_jti', unique=True, name='legacy_jti_1',
+            partialFilterExpression={'legacy_jti': {'$type': 'string'}}
+        )
+
+    def start(self, user_id, jti, expires_at, legacy_jti=None):
+        """Start a family with its first refresh token.
+
+        Args:
+            user_id (str): The user's ID.
+            jti (str): The refresh token's unique identifier.
+            expires_at (datetime): When the refresh token expires.
+            legacy_jti (str, optional): ID of the pre-family refresh token
+                the family replaces. Defaults to None.
+
+        Returns:
+            str: The family ID.
+
+        Raises:
+            DuplicateKeyError: If a family already replaced that legacy token.
+        """
+        family_id = uuid.uuid4().hex
+        now = datetime.utcnow()
+        family = {
+            '_id': family_id,
+            'user_id': user_id,
+            'jti': jti,
+            'revoked': False,
+            'expires_at': expires_at,
+            'created_at': now,
+            'rotated_at': now
+        }
+        if legacy_jti is not None:
+            family['legacy_jti'] = legacy_jti
+        self.collection.insert_one(family)
+        return family_id
+
+    def adopt(self, user_id, legacy_jti, issued_at, jti, expires_at):
+        """Start a family replacing a refresh token issued before families.
+
+        Args:
+            user_id (str): The user's ID.
+            legacy_jti (str): The presented token's identifier.
+            issued_at (datetime): When the presented token was issued.
+            jti (str): The identifier of the replacing token.
+            expires_at (datetime): When the replacing token expires.
+
+        Returns:
+            str: The family ID.
+
+        Raises:
+            RefreshTokenError: If the user's tokens were revoked after the
+                presented one was issued, or the presented token was already
+                used, which revokes the family it started.
+        """
+        marker = self.collection.find_one({'_id': _user_marker_id(user_id)}, {'revoked_before': True})
+        if marker is not None and issued_at <= marker['revoked_before']:
+            raise RefreshTokenError("Refresh token has been revoked", 'refresh_token_revoked')
+
+        try:
+            return self.start(user_id, jti, expires_at, legacy_jti=legacy_jti)
+        except DuplicateKeyError:
+            family = self.collection.find_one({'legacy_jti': legacy_jti}, {'_id': True})
+            if family is not None:
+                self.revoke(family['_id'], reason='reuse')
+            raise RefreshTokenError("Refresh token has already been used", 'refresh_token_reused')
+
+    def rotate(self, family_id, jti, new_jti, expires_at):
+        """Replace a family's refresh token.
+
+        Args:
+            family_id (str): The family ID.
+            jti (str): The presented refresh token's identifier.
+            new_jti (str): The identifier of the replacing token.
+            expires_at (datetime): When the replacing token expires.
+
+        Raises:
+            RefreshTokenError: If the family is revoked or unknown, or the
+                presented token was already rotated, which revokes the family.
+        """
+        if family_id in self._revoked:
+            raise RefreshTokenError("Refresh token has been revoked", 'refresh_token_revoked')
+
+        family = self.collection.find_one_and_update(
+            {'_id': family_id, 'jti': jti, 'revoked': False},
+            {'$set': {'jti': new_jti, 'expires_at': expires_at, 'rotated_at': datetime.utcnow()}},
+            projection={'_id': True},
+            return_document=ReturnDocument.AFTER
+        )
+        if family is not None:
+            return
+
+        family = self.collection.find_one({'_id': family_id}, {'jti': True, 'revoked': True, 'expires_at': True})
+        if family is None or family['revoked']:
+            if family is not None:
+                self._remember(family_id, family['expires_at'])
+            raise RefreshTokenError("Refresh token has been revoked", 'refresh_token_revoked')
+
+        # The token was valid once but has been rotated: someone else holds a copy
+        self.revoke(family_id, reason='reuse')
+        raise RefreshTokenError("Refresh token has already been used", 'refresh_token_reused')
+
+    def revoke(self, family_id, reason='logout'):
+        """Revoke a family; its refresh tokens can no longer be used.
+
+        Args:
+            family_id (str): The family ID.
+            reason (str, optional): Recorded on the family. Defaults to 'logout'.
+        """
+        family = self.collection.find_one_and_update(
+            {'_id': family_id},
+            {'$set': {'revoked': True, 'revoked_reason': reason, 'revoked_at': datetime.utcnow()}},
+            projection={'expires_at': True}
+        )
+        if family is not None:
+            self._remember(family_id, family['expires_at'])
+
+    def revoke_user(self, user_id, legacy_expires_at, reason='password_change'):
+        """Revoke every family of a user, and their refresh tokens issued before families.
+
+        Pre-family tokens are rejected through a marker document holding the
+        revocation time, which the TTL index removes once every such token
+        issued before it has expired.
+
+        Args:
+            user_id (str): The user's ID.
+            legacy_expires_at (datetime): When refresh tokens issued now expire.
+            reason (str, optional): Recorded on the families.
+                Defaults to 'password_change'.
+
+        Returns:
+            int: The number of families revoked.
+        """
+        now = datetime.utcnow()
+        self.collection.update_one(
+            {'_id': _user_marker_id(user_id)},
+            {'$set': {'revoked_before': now, 'expires_at': legacy_expires_at}},
+            upsert=True
+        )
+        return self.collection.update_many(
+            {'user_id': user_id, 'revoked': False},
+            {'$set': {'revoked': True, 'revoked_reason': reason, 'revoked_at': now}}
+        ).modified_count
+
+    def _remember(self, family_id, expires_at):
+        with self._lock:
+            self._revoked[family_id] = expires_at
+            self._revoked.move_to_end(family_id)
+            # Drop families whose tokens have expired anyway, then the oldest
+            now = datetime.utcnow()
+            while self._revoked and (
+                len(self._revoked) > self.cache_size or next(iter(self._revoked.values())) <= now
+            ):
+                self._revoked.popitem(last=False)
+
+
+def _user_marker_id(user_id):
+    """ID of the document recording when a user's tokens were last revoked."""
+    return f"user:{user_id}"
+
+
+def _user_id(identity):
+    if isinstance(identity, dict):
+        return str(identity.get('_id', identity.get('id')))
+    return str(identity)
+
+
+def _create_tokens(identity, family_id, jti, expires_delta):
+    """Create an access token and a refresh token of a family."""
+    claims = {'fam': family_id}
+    return (
+        create_access_token(identity=identity, additional_claims=claims),
+        create_refresh_token(
+            identity=identity, expires_delta=expires_delta, additional_claims=dict(claims, jti=jti)
+        )
+    )
+
+
+def issue_tokens(identity):
+    """Issue an access token and the first refresh token of a new family.
+
+    Both tokens carry the family ID in their 'fam' claim.
+
+    Args:
+        identity (dict): The user, or the identity of a token.
+
+    Returns:
+        tuple: (access token, refresh token).
+    """
+    store = current_app.extensions['refresh_tokens']
+    jti = str(uuid.uuid4())
+    expires_delta = jwt_config.refresh_expires
+    family_id = store.start(_user_id(identity), jti, datetime.utcnow() + expires_delta)
+    return _create_tokens(identity, family_id, jti, expires_delta)
+
+
+def rotate_tokens(identity, refresh_claims):
+    """Exchange a refresh token for a new access token and refresh token.
+
+    Refresh tokens issued before families were tracked start a new family;
+    each of them can only do so once.
+
+    Args:
+        identity (dict): The refresh token's identity.
+        refresh_claims (dict): The refresh token's verified claims.
+
+    Returns:
+        tuple: (access token, refresh token).
+
+    Raises:
+        RefreshTokenError: If the refresh token may not be used.
+    """
+    store = current_app.extensions['refresh_tokens']
+    jti = str(uuid.uuid4())
+    expires_delta = jwt_config.refresh_expires
+    expires_at = datetime.utcnow() + expires_delta
+
+    family_id = refresh_claims.get('fam')
+    if family_id is None:
+        family_id = store.adopt(
+            _user_id(identity), refresh_claims['jti'],
+            datetime.utcfromtimestamp(refresh_claims.get('iat', 0)), jti, expires_at
+        )
+    else:
+        store.rotate(family_id, refresh_claims['jti'], jti, expires_at)
+    return _create_tokens(identity, family_id, jti, expires_delta)
+
+
+def revoke_user_tokens(user_id, reason='password_change'):
+    """Revoke every refresh token of a user, including tokens issued before families.
+
+    Args:
+        user_id (str): The user's ID.
+        reason (str, optional): Recorded on the families.
+            Defaults to 'password_change'.
+
+    Returns:
+        int: The number of families revoked.
+    """
+    return current_app.extensions['refresh_tokens'].revoke_user(
+        str(user_id), datetime.utcnow() + jwt_config.refresh_expires, reason=reason
+    )
+
+
+def init_refresh_tokens(app):
+    """Create the application's refresh token store.
+
+    Args:
+        app (Flask): The Flask application instance.
+
+    Returns:
+        RefreshTokenStore: The store.
+    """
+    store = RefreshTokenStore(
+        app.extensions['database'][app.config.get('REFRESH_TOKEN_COLLECTION', 'refresh_tokens')],
+        cache_size=app.config.get('REFRESH_TOKEN_CACHE_SIZE', 10000)
+    )
+    store.ensure_indexes()
+    app.extensions['refresh_tokens'] = store
+    return store
@@ -6,19 +6,20 @@ This module defines the API routes for user authentication, including
 registration, login, token refresh, and logout.
 """
 
-from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import (
-    create_access_token, create_refresh_token,
-    jwt_required, current_user, get_jwt_identity, get_jwt
-)
+from flask import Blueprint, Response, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, current_user, get_jwt_identity, get_jwt
 from marshmallow import ValidationError
 from datetime import datetime
 from app.models.user import User, UserSchema
 from app.utils.response import success_response, error_response
+from app.auth.authorization import authorize
+from app.auth.keys import get_keyring
+from app.auth.refresh_tokens import RefreshTokenError, issue_tokens, revoke_user_tokens, rotate_tokens
 from app.auth.token_blocklist import add_token_to_blocklist
 
-# Create blueprint
+# Create blueprints
 auth_bp = Blueprint('auth', __name__)
+well_known_bp = Blueprint('well_known', __name__)
 
 # Initialize schemas
 user_schema = UserSchema()
@@ -62,9 +63,8 @@ def register():
         # Create new user
         new_user = User.create_user(user_data)
         
-        # Generate tokens
-        access_token = create_access_token(identity=new_user)
-        refresh_token = create_refresh_token(identity=new_user)
+        # Generate tokens, starting a refresh token family
+        access_token, refresh_token = issue_tokens(new_user)
         
         # Return tokens
         return success_response({
@@ -81,7 +81,7 @@ def register():
             status_code=422
         )
     except Exception as e:
-        current_app.logger.error(f"Registration error: {str(e)}")
+        current_app.logger.error("Registration error: %s", e)
         return error_response(
             "Could not register user", 
             code="registration_failed", 
@@ -143,9 +143,8 @@ def login():
         # Update last login timestamp
         User.update_last_login(user['_id'])
         
-        # Generate tokens
-        access_token = create_access_token(identity=user)
-        refresh_token = create_refresh_token(identity=user)
+        # Generate tokens, starting a refresh token family
+        access_token, refresh_token = issue_tokens(user)
         
         # Remove sensitive data from user info
         user_data = user_schema.dump(user)
@@ -157,7 +156,7 @@ def login():
         }, "Login successful")
     
     except Exception as e:
-        current_app.logger.error(f"Login error: {str(e)}")
+        current_app.logger.error("Login error: %s", e)
         return error_response(
             "An error occurred during login", 
             code="login_failed", 
@@ -170,25 +169,28 @@ def login():
 def refresh_token():
     """Refresh the access token.
     
-    Uses a valid refresh token to issue a new access token.
+    Uses a valid refresh token to issue a new access token and a new refresh
+    token, which replaces the one presented. A refresh token can only be used
+    once; presenting one again revokes every token of its login session.
     
     Returns:
-        tuple: A JSON response with a new access token if successful,
+        tuple: A JSON response with new access and refresh tokens if successful,
             or an error message if the refresh failed.
     """
     try:
-        # Get the identity from the refresh token
-        identity = get_jwt_identity()
-        
-        # Issue a new access token
-        access_token = create_access_token(identity=identity)
+        # Rotate the refresh token within its family
+        access_token, refresh_token = rotate_tokens(get_jwt_identity(), get_jwt())
         
         return success_response({
-            'access_token': access_token
+            'access_token': access_token,
+            'refresh_token': refresh_token
         }, "Token refreshed successfully")
     
+    except RefreshTokenError as err:
+        return error_response(str(err), code=err.code, status_code=401)
+    
     except Exception as e:
-        current_app.logger.error(f"Token refresh error: {str(e)}")
+        current_app.logger.error("Token refresh error: %s", e)
         return error_response(
             "An error occurred while refreshing token", 
             code="refresh_failed", 
@@ -197,11 +199,12 @@ def refresh_token():
 
 
 @auth_bp.route('/logout', methods=['POST'])
-@jwt_required()
+@authorize()
 def logout():
     """Log out a user by revoking their tokens.
     
-    Adds the current token to a blocklist, effectively logging the user out.
+    Adds the current token to a blocklist and revokes the refresh token of its
+    login session, effectively logging the user out.
     
     Returns:
         tuple: A JSON response confirming the logout was successful.
@@ -215,10 +218,14 @@ def logout():
         # Add token to blocklist
         add_token_to_blocklist(jti, exp)
         
+        # End the login session, so its refresh token stops working
+        if 'fam' in token_data:
+            current_app.extensions['refresh_tokens'].revoke(token_data['fam'])
+        
         return success_response(message="Successfully logged out")
     
     except Exception as e:
-        current_app.logger.error(f"Logout error: {str(e)}")
+        current_app.logger.error("Logout error: %s", e)
         return error_response(
             "An error occurred during logout", 
             code="logout_failed", 
@@ -249,7 +256,7 @@ def get_user_info():
         return success_response({'user': user_data}, "User information retrieved successfully")
     
     except Exception as e:
-        current_app.logger.error(f"Error getting user info: {str(e)}")
+        current_app.logger.error("Error getting user info: %s", e)
         return error_response(
             "An error occurred while retrieving user information", 
             code="user_info_failed", 
@@ -303,12 +310,42 @@ def change_password():
         # Change password
         User.change_password(current_user['_id'], new_password)
         
+        # Log out other sessions: their refresh tokens stop working
+        revoke_user_tokens(current_user['_id'])
+        
         return success_response(message="Password changed successfully")
     
     except Exception as e:
-        current_app.logger.error(f"Password change error: {str(e)}")
+        current_app.logger.error("Password change error: %s", e)
         return error_response(
             "An error occurred while changing password", 
             code="password_change_failed", 
             status_code=500
         )
+
+
+@well_known_bp.route('/jwks.json', methods=['GET'])
+def jwks():
+    """Publish the public keys that verify tokens.
+    
+    Other services verify tokens offline with these keys, selecting the key
+    by the token's 'kid' header. The key set only changes when keys are
+    rotated, so it may be cached for JWKS_MAX_AGE seconds.
+    
+    Returns:
+        Response: The JSON Web Key Set, or a 404 error when tokens are
+            signed with a shared secret.
+    """
+    keyring = get_keyring(current_app)
+    if keyring is None:
+        return error_response(
+            "Tokens are not signed with public keys", 
+            code="jwks_unavailable", 
+            status_code=404
+        )
+    
+    response = Response(keyring.jwks, mimetype='application/json')
+    response.set_etag(keyring.jwks_etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('JWKS_MAX_AGE', 86400)
+    return response.make_conditional(request)
@@ -6,9 +6,19 @@ This module manages a blocklist (or blacklist) of JWT tokens that have been
 invalidated, usually due to user logout or security issues.
 """
 
+import time
+from flask import has_app_context
+
+from app.auth.token_cache import get_token_cache
+
 # In a real application, this would be stored in Redis or a similar fast storage
-# For this example, we'll use a simple in-memory set
-_token_blocklist = set()
+# For this example, we keep an in-memory map of token IDs to their expiry time
+_token_blocklist = {}
+
+# Expired tokens are rejected anyway, so their entries are purged once the
+# blocklist has grown by this many entries since the last purge
+_PURGE_EVERY = 1024
+_next_purge = _PURGE_EVERY
 
 
 def add_token_to_blocklist(jti, exp=None):
@@ -16,8 +26,8 @@ def add_token_to_blocklist(jti, exp=None):
     
     Args:
         jti (str): The unique JWT token identifier.
-        exp (int, optional): Token expiration timestamp. Defaults to None.
-            In a real application, this would be used for automatic cleanup.
+        exp (int, optional): Token expiration timestamp, after which the entry
+            is purged. Defaults to None, which keeps the entry.
     
     Returns:
         bool: True if the token was added, False if it was already blocked.
@@ -25,7 +35,15 @@ def add_token_to_blocklist(jti, exp=None):
     if jti in _token_blocklist:
         return False
     
-    _token_blocklist.add(jti)
+    _token_blocklist[jti] = exp
+    if len(_token_blocklist) >= _next_purge:
+        _purge_expired()
+    
+    # Stop serving the token from the verified token cache
+    if has_app_context():
+        cache = get_token_cache()
+        if cache is not None:
+            cache.revoke(jti)
     return True
 
 
@@ -51,7 +69,7 @@ def remove_token_from_blocklist(jti):
         bool: True if the token was removed, False if it wasn't in the blocklist.
     """
     if jti in _token_blocklist:
-        _token_blocklist.remove(jti)
+        del _token_blocklist[jti]
         return True
     return False
 
@@ -61,4 +79,16 @@ def clear_blocklist():
     
     This is mainly for testing purposes.
     """
+    global _next_purge
     _token_blocklist.clear()
+    _next_purge = _PURGE_EVERY
+
+
+def _purge_expired():
+    """Drop the entries of tokens that have expired."""
+    global _next_purge
+    now = time.time()
+    for jti, exp in list(_token_blocklist.items()):
+        if exp is not None and exp <= now:
+            _token_blocklist.pop(jti, None)
+    _next_purge = len(_token_blocklist) + _PURGE_EVERY
@@ -0,0 +1,163 @@
+# app/auth/token_cache.py
+
+"""Cache of verified JWTs.
+
+This module lets each worker verify a token's signature and claims once and
+reuse the decoded claims on the client's following requests, for as long as
+the token is valid. Revocation is still checked on every request; revoked
+tokens are also dropped from the cache.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from flask_jwt_extended import JWTManager
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified tokens and their decoded claims.
+
+    Tokens are keyed by a digest of the encoded token, so the cache never
+    holds usable credentials, and expire at the token's `exp` claim.
+    """
+
+    def __init__(self, max_entries=4096):
+        """Initialize the cache.
+
+        Args:
+            max_entries (int, optional): Maximum tokens kept. Defaults to 4096.
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # digest -> (claims, exp)
+        self._digests = {}  # jti -> digest
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(encoded_token):
+        if isinstance(encoded_token, str):
+            encoded_token = encoded_token.encode('utf-8')
+        return hashlib.sha256(encoded_token).digest()
+
+    def get(self, encoded_token, now=None):
+        """Get the claims of a token verified earlier.
+
+        Args:
+            encoded_token (str): The encoded token.
+            now (float, optional): The current Unix time. Defaults to now.
+
+        Returns:
+            dict or None: A copy of the claims, or None if the token is not
+                cached or has expired.
+        """
+        digest = self.digest(encoded_token)
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+
+        claims, exp = entry
+        if exp is not None and (now or time.time()) >= exp:
+            self._discard(digest, claims)
+            return None
+
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+        return _copy_claims(claims)
+
+    def set(self, encoded_token, claims):
+        """Remember a verified token.
+
+        Args:
+            encoded_token (str): The encoded token.
+            claims (dict): Its decoded claims.
+        """
+        digest = self.digest(encoded_token)
+        with self._lock:
+            self._entries[digest] = (_copy_claims(claims), claims.get('exp'))
+            self._entries.move_to_end(digest)
+            if 'jti' in claims:
+                self._digests[claims['jti']] = digest
+            while len(self._entries) > self.max_entries:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._digests.pop(evicted.get('jti'), None)
+
+    def revoke(self, jti):
+        """Drop a token, for example when it is added to the blocklist.
+
+        Args:
+            jti (str): The token's unique identifier.
+        """
+        with self._lock:
+            digest = self._digests.pop(jti, None)
+            if digest is not None:
+                self._entries.pop(digest, None)
+
+    def clear(self):
+        """Drop every token."""
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _discard(self, digest, claims):
+        with self._lock:
+            if self._entries.pop(digest, None) is not None:
+                self._digests.pop(claims.get('jti'), None)
+
+
+def _copy_claims(claims):
+    """Copy claims so callers cannot modify the cached ones."""
+    copied = dict(claims)
+    if isinstance(copied.get('sub'), dict):
+        copied['sub'] = dict(copied['sub'])
+    return copied
+
+
+class CachingJWTManager(JWTManager):
+    """JWTManager that verifies each token once per worker.
+
+    Decoding goes through the application's VerifiedTokenCache when one is
+    configured. Expired tokens and CSRF-protected (cookie) tokens are always
+    decoded in full, so error handling is unchanged.
+
+    This overrides JWTManager._decode_jwt_from_config, which is private to
+    flask-jwt-extended; that is why requirements.txt pins it to 4.5.3. Check
+    tests/integration/test_token_cache.py before upgrading.
+    """
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        cache = current_app.extensions.get('token_cache')
+        if cache is None or csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        claims = cache.get(encoded_token)
+        if claims is None:
+            claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+            cache.set(encoded_token, claims)
+        return claims
+
+
+def get_token_cache():
+    """Get the current application's verified token cache, if enabled."""
+    return current_app.extensions.get('token_cache')
+
+
+def init_token_cache(app):
+    """Create the application's verified token cache, if enabled.
+
+    Args:
+        app (Flask): The Flask application instance.
+
+    Returns:
+        VerifiedTokenCache or None: The cache, or None when disabled.
+    """
+    if not app.config.get('JWT_TOKEN_CACHE_ENABLED', True):
+        return None
+
+    cache = VerifiedTokenCache(max_entries=app.config.get('JWT_TOKEN_CACHE_SIZE', 4096))
+    app.extensions['token_cache'] = cache
+    return cache
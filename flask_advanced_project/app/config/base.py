@@ -25,6 +25,56 @@ class BaseConfig:
     # MongoDB Settings
     MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/')
     MONGO_DBNAME = os.environ.get('MONGO_DBNAME', 'flask_advanced_db')
+    MONGO_ENSURE_INDEXES = os.environ.get('MONGO_ENSURE_INDEXES', 'True').lower() == 'true'
+    
+    # Database backend: 'mongo' for MongoDB, 'memory' for the in-process stand-in
+    DATABASE_BACKEND = os.environ.get('DATABASE_BACKEND', 'mongo')
+    
+    # Change Feed Settings
+    CHANGE_FEED_ENABLED = os.environ.get('CHANGE_FEED_ENABLED', 'False').lower() == 'true'  # a feed thread per worker
+    CHANGE_FEED_MODE = os.environ.get('CHANGE_FEED_MODE', 'auto')  # 'stream', 'poll' or 'auto'
+    CHANGE_FEED_NAME = os.environ.get('CHANGE_FEED_NAME', 'default')
+    CHANGE_FEED_COLLECTIONS = 'products,users'
+    CHANGE_FEED_POLL_INTERVAL = float(os.environ.get('CHANGE_FEED_POLL_INTERVAL', 1.0))  # seconds
+    CHANGE_FEED_POLL_LAG = float(os.environ.get('CHANGE_FEED_POLL_LAG', 5.0))  # seconds re-scanned behind the position
+    CHANGE_FEED_CHECKPOINT_INTERVAL = 5.0  # seconds
+    CHANGE_FEED_BATCH_SIZE = 500
+    CHANGE_FEED_STATE_COLLECTION = 'change_feed_state'
+    
+    # Catalog Facet Settings
+    FACETS_RECONCILE_INTERVAL = int(os.environ.get('FACETS_RECONCILE_INTERVAL', 300))  # seconds
+    FACETS_MIN_RECONCILE_INTERVAL = 10  # seconds, after changes from other processes
+    
+    # Causal Session Settings (read-your-writes when models read from secondaries)
+    CAUSAL_SESSIONS_ENABLED = os.environ.get('CAUSAL_SESSIONS_ENABLED', 'True').lower() == 'true'
+    CAUSAL_SESSION_TTL = int(os.environ.get('CAUSAL_SESSION_TTL', 300))  # seconds, at least the largest maxStalenessSeconds
+    CAUSAL_SESSION_COOKIE = 'causal_position'  # also sent as the X-Causal-Position header
+    
+    # Read Coalescing Settings
+    READ_COALESCING_ENABLED = os.environ.get('READ_COALESCING_ENABLED', 'True').lower() == 'true'
+    READ_CACHE_SHARED = os.environ.get('READ_CACHE_SHARED', 'False').lower() == 'true'  # across workers
+    READ_CACHE_COLLECTION = 'read_cache'
+    READ_CACHE_MAX_ENTRIES = 1024  # per process
+    READ_CACHE_BETA = 1.0  # higher values refresh cached reads earlier
+    PRODUCT_LIST_COUNT_MAX_AGE = int(os.environ.get('PRODUCT_LIST_COUNT_MAX_AGE', 5))  # seconds
+    
+    # Product List Snapshot Settings
+    PRODUCT_SNAPSHOTS_ENABLED = os.environ.get('PRODUCT_SNAPSHOTS_ENABLED', 'True').lower() == 'true'
+    PRODUCT_SNAPSHOT_PAGES = int(os.environ.get('PRODUCT_SNAPSHOT_PAGES', 5))  # per category
+    PRODUCT_SNAPSHOT_PER_PAGE = 20
+    PRODUCT_SNAPSHOT_MAX_AGE = int(os.environ.get('PRODUCT_SNAPSHOT_MAX_AGE', 60))  # seconds
+    
+    # Reservation Settings
+    RESERVATION_TTL = int(os.environ.get('RESERVATION_TTL', 900))  # seconds until reserved units return
+    RESERVATION_MAX_ACTIVE = int(os.environ.get('RESERVATION_MAX_ACTIVE', 5))  # per user
+    
+    # Archival Settings
+    ARCHIVER_ENABLED = os.environ.get('ARCHIVER_ENABLED', 'False').lower() == 'true'  # enable in one process
+    ARCHIVE_DELETED_AFTER_DAYS = int(os.environ.get('ARCHIVE_DELETED_AFTER_DAYS', 30))  # 0 disables
+    ARCHIVE_INACTIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_INACTIVE_AFTER_DAYS', 0))  # 0 disables
+    ARCHIVE_BATCH_SIZE = 500
+    ARCHIVE_INTERVAL = int(os.environ.get('ARCHIVE_INTERVAL', 3600))  # seconds
+    ARCHIVE_COLLECTION_SUFFIX = '_archive'
     
     # JWT Settings
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'default-jwt-secret-key')
@@ -37,6 +87,16 @@ class BaseConfig:
     JWT_TOKEN_LOCATION = ['headers']
     JWT_HEADER_NAME = 'Authorization'
     JWT_HEADER_TYPE = 'Bearer'
+    # HS256 signs with JWT_SECRET_KEY; RS256 or EdDSA sign with the keys in
+    # JWT_KEYS_DIR, published at /.well-known/jwks.json
+    JWT_ALGORITHM = os.environ.get('JWT_ALGORITHM', 'HS256')
+    JWT_KEYS_DIR = os.environ.get('JWT_KEYS_DIR')
+    JWT_ACTIVE_KID = os.environ.get('JWT_ACTIVE_KID')  # defaults to the last key by ID
+    JWKS_MAX_AGE = int(os.environ.get('JWKS_MAX_AGE', 86400))  # seconds
+    REFRESH_TOKEN_COLLECTION = 'refresh_tokens'
+    REFRESH_TOKEN_CACHE_SIZE = int(os.environ.get('REFRESH_TOKEN_CACHE_SIZE', 10000))  # revoked families per worker
+    JWT_TOKEN_CACHE_ENABLED = os.environ.get('JWT_TOKEN_CACHE_ENABLED', 'True').lower() == 'true'
+    JWT_TOKEN_CACHE_SIZE = int(os.environ.get('JWT_TOKEN_CACHE_SIZE', 4096))  # verified tokens per worker
     
     # Security Settings
     BCRYPT_SALT_ROUNDS = int(os.environ.get('BCRYPT_SALT_ROUNDS', 12))
@@ -50,6 +110,34 @@ class BaseConfig:
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
     LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+    LOG_RATE_LIMIT = int(os.environ.get('LOG_RATE_LIMIT', 10))  # records per call site and interval, 0 disables
+    LOG_RATE_INTERVAL = int(os.environ.get('LOG_RATE_INTERVAL', 60))  # seconds
+    
+    # Database Tracing Settings
+    DB_TRACING_ENABLED = os.environ.get('DB_TRACING_ENABLED', 'True').lower() == 'true'
+    DB_QUERY_WARN_THRESHOLD = int(os.environ.get('DB_QUERY_WARN_THRESHOLD', 10))  # commands per request
+    
+    # Compression Settings
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'True').lower() == 'true'
+    COMPRESS_ALGORITHMS = os.environ.get('COMPRESS_ALGORITHMS', 'zstd,br,gzip')
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))  # bytes
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BR_LEVEL = 4
+    COMPRESS_ZSTD_LEVEL = 3
+    COMPRESS_MIMETYPES = {
+        'application/json', 'application/x-ndjson', 'text/csv',
+        'text/html', 'text/plain'
+    }
+    
+    # Profiling Settings
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() == 'true'
+    PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0.0))
+    PROFILING_HEADER = 'X-Profile-Token'
+    PROFILING_SECRET = os.environ.get('PROFILING_SECRET')  # falls back to SECRET_KEY
+    PROFILING_MODE = os.environ.get('PROFILING_MODE', 'cprofile')  # or 'sampling'
+    PROFILING_SAMPLE_INTERVAL = 0.005  # seconds, sampling mode only
+    PROFILING_DIR = os.environ.get('PROFILING_DIR', os.path.join(os.getcwd(), 'profiles'))
+    PROFILING_MAX_FILES = int(os.environ.get('PROFILING_MAX_FILES', 50))
     
     # Rate Limiting Settings
     RATELIMIT_DEFAULT = '100 per minute'
@@ -6,6 +6,7 @@ This module defines the configuration settings specific to the testing
 environment. It inherits from the BaseConfig.
 """
 
+import os
 from app.config.base import BaseConfig
 
 
@@ -21,6 +22,16 @@ class TestingConfig(BaseConfig):
     # Use a separate database for testing
     MONGO_DBNAME = 'flask_advanced_db_test'
     
+    # Run against the in-process stand-in so tests need no MongoDB server.
+    # Set DATABASE_BACKEND=mongo to test against a real database.
+    DATABASE_BACKEND = os.environ.get('DATABASE_BACKEND', 'memory')
+    
+    # Tests drive the change feed explicitly instead of running it in the background
+    CHANGE_FEED_ENABLED = False
+    
+    # Tests run the archiver explicitly with Archiver.run_once
+    ARCHIVER_ENABLED = False
+    
     # Disable CSRF protection in tests
     WTF_CSRF_ENABLED = False
     
@@ -0,0 +1,300 @@
+# app/middlewares/compression.py
+
+"""Response compression middleware.
+
+This module negotiates a content encoding (zstd, brotli or gzip) from the
+client's Accept-Encoding header and compresses eligible responses. Streamed
+responses are compressed incrementally, and cached bodies can carry their
+compressed variants so hot responses are only encoded once.
+"""
+
+import gzip
+import threading
+import zlib
+from flask import request, current_app
+
+# Brotli and zstd are optional; gzip is always available from the stdlib
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+
+# Status codes that must never carry a compressed body
+_SKIP_STATUS_CODES = {204, 206, 304}
+
+
+def available_encodings():
+    """Get the content encodings supported in this environment.
+
+    Returns:
+        set: The supported encoding tokens ('gzip', 'br', 'zstd').
+    """
+    encodings = {'gzip'}
+    if brotli is not None:
+        encodings.add('br')
+    if zstandard is not None:
+        encodings.add('zstd')
+    return encodings
+
+
+def get_level(encoding, config=None):
+    """Get the configured compression level for an encoding.
+
+    Args:
+        encoding (str): The content encoding token.
+        config (dict, optional): Configuration mapping. Defaults to the
+            current application's config.
+
+    Returns:
+        int: The compression level to use.
+    """
+    config = config if config is not None else current_app.config
+    if encoding == 'br':
+        return config.get('COMPRESS_BR_LEVEL', 4)
+    if encoding == 'zstd':
+        return config.get('COMPRESS_ZSTD_LEVEL', 3)
+    return config.get('COMPRESS_GZIP_LEVEL', 6)
+
+
+def compress_bytes(data, encoding, level):
+    """Compress a complete body in one shot.
+
+    Args:
+        data (bytes): The body to compress.
+        encoding (str): The content encoding token.
+        level (int): The compression level.
+
+    Returns:
+        bytes: The compressed body.
+
+    Raises:
+        ValueError: If the encoding is not supported.
+    """
+    if encoding == 'gzip':
+        # A fixed mtime keeps the output deterministic, which matters for caching
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(data, quality=level)
+    if encoding == 'zstd' and zstandard is not None:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+class _GzipStream:
+    """Incremental gzip compressor that flushes after every chunk."""
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    """Incremental brotli compressor that flushes after every chunk."""
+
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    """Incremental zstd compressor that flushes after every chunk."""
+
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk):
+        return (
+            self._compressor.compress(chunk)
+            + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        )
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+_STREAM_COMPRESSORS = {
+    'gzip': _GzipStream,
+    'br': _BrotliStream,
+    'zstd': _ZstdStream,
+}
+
+
+def compress_stream(chunks, encoding, level):
+    """Compress an iterable of body chunks incrementally.
+
+    Each chunk is flushed as soon as it is compressed so clients of streaming
+    endpoints keep receiving data while the response is being produced.
+
+    Args:
+        chunks (iterable): The body chunks (bytes or str).
+        encoding (str): The content encoding token.
+        level (int): The compression level.
+
+    Yields:
+        bytes: Compressed chunks.
+    """
+    stream = _STREAM_COMPRESSORS[encoding](level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                compressed = stream.compress(chunk)
+                if compressed:
+                    yield compressed
+        yield stream.finish()
+    finally:
+        # Make sure the wrapped iterable releases its resources
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+class PrecompressedBody:
+    """A response body that remembers its compressed variants.
+
+    Cached responses wrap their raw bytes in this class so each encoding is
+    computed at most once, no matter how many requests serve the entry.
+    """
+
+    def __init__(self, data, mimetype='application/json', status_code=200):
+        """Initialize the body.
+
+        Args:
+            data (bytes): The uncompressed response body.
+            mimetype (str, optional): The response mimetype.
+                Defaults to 'application/json'.
+            status_code (int, optional): The response status code. Defaults to 200.
+        """
+        self.data = data
+        self.mimetype = mimetype
+        self.status_code = status_code
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    def get(self, encoding, level):
+        """Get the body compressed with the given encoding.
+
+        Args:
+            encoding (str): The content encoding token.
+            level (int): The compression level used on a cache miss.
+
+        Returns:
+            bytes: The compressed body.
+        """
+        variant = self._variants.get(encoding)
+        if variant is None:
+            with self._lock:
+                variant = self._variants.get(encoding)
+                if variant is None:
+                    variant = compress_bytes(self.data, encoding, level)
+                    self._variants[encoding] = variant
+        return variant
+
+    def precompress(self, encodings=None, config=None):
+        """Eagerly compute compressed variants.
+
+        Args:
+            encodings (iterable, optional): Encodings to compute. Defaults to
+                every encoding available in this environment.
+            config (dict, optional): Configuration mapping used for levels.
+                Defaults to the current application's config.
+
+        Returns:
+            PrecompressedBody: The body itself, for chaining.
+        """
+        for encoding in encodings or available_encodings():
+            self.get(encoding, get_level(encoding, config))
+        return self
+
+    def to_response(self):
+        """Build a response that serves this body.
+
+        Returns:
+            Response: A response the compression middleware will serve from
+                the stored variants instead of recompressing.
+        """
+        response = current_app.response_class(
+            self.data, status=self.status_code, mimetype=self.mimetype
+        )
+        response.precompressed = self
+        return response
+
+
+def configure_compression(app):
+    """Configure response compression for the application.
+
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+
+    # Keep the server's preference order, restricted to what is installed
+    supported = available_encodings()
+    encodings = [
+        encoding.strip()
+        for encoding in app.config.get('COMPRESS_ALGORITHMS', 'zstd,br,gzip').split(',')
+        if encoding.strip() in supported
+    ]
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 500)
+    mimetypes = set(app.config.get('COMPRESS_MIMETYPES', {'application/json'}))
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.status_code < 200
+            or response.status_code in _SKIP_STATUS_CODES
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in mimetypes
+        ):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+        level = get_level(encoding, app.config)
+
+        precompressed = getattr(response, 'precompressed', None)
+
+        if response.is_streamed and precompressed is None:
+            # Size is unknown up front, so streamed bodies are always compressed
+            response.response = compress_stream(response.response, encoding, level)
+            response.headers.pop('Content-Length', None)
+            response.headers['Content-Encoding'] = encoding
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        if precompressed is not None:
+            body = precompressed.get(encoding, level)
+        else:
+            body = compress_bytes(data, encoding, level)
+
+        # Incompressible payloads are cheaper to send as they are
+        if len(body) >= len(data):
+            return response
+
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,121 @@
+# app/middlewares/db_tracing.py
+
+"""Database command tracing middleware.
+
+This module hooks a pymongo command listener into the request lifecycle so each
+request knows how many database commands it issued, how long they took and how
+many documents they returned. The totals are added to the request log line and
+the Server-Timing response header, and requests that issue too many commands
+are reported as likely N+1 query patterns.
+"""
+
+import logging
+import time
+from collections import Counter
+from flask import g, request, has_request_context
+from pymongo import monitoring
+
+# Create a dedicated logger for database tracing
+db_logger = logging.getLogger('db')
+
+
+def _count_documents(reply):
+    """Count the documents returned in a command reply.
+
+    Args:
+        reply (dict): The server reply to a command.
+
+    Returns:
+        int: The number of documents returned.
+    """
+    cursor = reply.get('cursor')
+    if isinstance(cursor, dict):
+        batch = cursor.get('firstBatch', cursor.get('nextBatch'))
+        return len(batch) if batch else 0
+    if 'value' in reply:  # findAndModify
+        return 1 if reply['value'] is not None else 0
+    return 0
+
+
+class CommandTracer(monitoring.CommandListener):
+    """Pymongo command listener that accumulates per-request statistics.
+
+    Pymongo invokes command listeners synchronously on the thread that issued
+    the command, so statistics are recorded on the current request's `g`.
+    Commands issued outside of a request are ignored.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, _count_documents(event.reply))
+
+    def failed(self, event):
+        self._record(event, 0)
+
+    @staticmethod
+    def _record(event, documents):
+        if not has_request_context():
+            return
+        stats = g.get('db_stats')
+        if stats is None:
+            return
+        stats['commands'] += 1
+        stats['duration_ms'] += event.duration_micros / 1000.0
+        stats['documents'] += documents
+        stats['by_command'][event.command_name] += 1
+
+
+# Shared listener instance passed to the MongoDB client
+command_tracer = CommandTracer()
+
+
+def configure_db_tracing(app):
+    """Configure per-request database command tracing for the application.
+
+    The command listener itself is registered on the MongoDB client in
+    `init_extensions`; this function wires the request hooks that collect and
+    report its statistics.
+
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    if not app.config.get('DB_TRACING_ENABLED', True):
+        return
+
+    warn_threshold = app.config.get('DB_QUERY_WARN_THRESHOLD', 10)
+
+    @app.before_request
+    def start_db_tracing():
+        g.db_stats = {
+            'commands': 0,
+            'duration_ms': 0.0,
+            'documents': 0,
+            'by_command': Counter()
+        }
+
+    @app.after_request
+    def report_db_tracing(response):
+        stats = g.get('db_stats')
+        if stats is None:
+            return response
+
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats["duration_ms"]:.2f};desc="{stats["commands"]} commands"'
+        )
+        if 'start_time' in g:
+            total_ms = (time.time() - g.start_time) * 1000
+            response.headers.add('Server-Timing', f'total;dur={total_ms:.2f}')
+
+        if warn_threshold and stats['commands'] > warn_threshold:
+            breakdown = ', '.join(
+                f"{name}={count}" for name, count in stats['by_command'].most_common()
+            )
+            db_logger.warning(
+                "%s %s issued %d database commands (threshold %d): %s",
+                request.method, request.path, stats['commands'], warn_threshold, breakdown
+            )
+
+        return response
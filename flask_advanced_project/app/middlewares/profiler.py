@@ -0,0 +1,311 @@
+# app/middlewares/profiler.py
+
+"""Request profiling middleware.
+
+This module provides an opt-in, request-scoped profiler. A request is profiled
+when it carries a valid signed profiling token or is picked by the configured
+sampling rate. Profiles are written to a bounded on-disk ring so they can be
+listed and downloaded later for flamegraph tooling.
+"""
+
+import cProfile
+import hashlib
+import hmac
+import logging
+import marshal
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from flask import request, g
+
+# Create a dedicated logger for profiling
+profile_logger = logging.getLogger('profiler')
+
+# Profile file names are generated by the store; anything else is rejected
+_PROFILE_NAME_RE = re.compile(r'^[\w.-]+\.(prof|collapsed)$')
+
+
+def generate_profile_token(secret, ttl=300, now=None):
+    """Generate a signed token that enables profiling for a request.
+
+    Args:
+        secret (str): The profiling secret.
+        ttl (int, optional): Token lifetime in seconds. Defaults to 300.
+        now (float, optional): Current timestamp. Defaults to time.time().
+
+    Returns:
+        str: A token of the form '<expires>.<signature>'.
+    """
+    expires = str(int((now or time.time()) + ttl))
+    signature = hmac.new(secret.encode('utf-8'), expires.encode('utf-8'), hashlib.sha256)
+    return f"{expires}.{signature.hexdigest()}"
+
+
+def verify_profile_token(secret, token, now=None):
+    """Verify a signed profiling token.
+
+    Args:
+        secret (str): The profiling secret.
+        token (str): The token taken from the request header.
+        now (float, optional): Current timestamp. Defaults to time.time().
+
+    Returns:
+        bool: True if the token is authentic and not expired, False otherwise.
+    """
+    expires, _, signature = token.partition('.')
+    if not expires.isdigit() or not signature:
+        return False
+    if int(expires) < (now or time.time()):
+        return False
+    expected = hmac.new(secret.encode('utf-8'), expires.encode('utf-8'), hashlib.sha256)
+    return hmac.compare_digest(expected.hexdigest(), signature)
+
+
+class ProfileStore:
+    """Bounded on-disk ring of recent profiles.
+
+    When the number of stored profiles exceeds the limit, the oldest ones are
+    removed so the directory never grows without bound.
+    """
+
+    def __init__(self, directory, max_files=50):
+        """Initialize the store.
+
+        Args:
+            directory (str): Directory where profiles are written.
+            max_files (int, optional): Maximum number of profiles kept. Defaults to 50.
+        """
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def save(self, name, data):
+        """Write a profile to the ring, evicting the oldest entries if needed.
+
+        Args:
+            name (str): The profile file name.
+            data (bytes): The profile contents.
+
+        Returns:
+            str: The stored profile name.
+        """
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, name)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as handle:
+                handle.write(data)
+            os.replace(tmp_path, path)
+            self._prune()
+        return name
+
+    def _prune(self):
+        """Remove the oldest profiles beyond the configured limit."""
+        entries = self.list()
+        for entry in entries[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.directory, entry['name']))
+            except OSError:
+                pass
+
+    def list(self):
+        """List stored profiles, newest first.
+
+        Returns:
+            list: Dictionaries with the name, size and creation time of each profile.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+
+        entries = []
+        for name in os.listdir(self.directory):
+            if not _PROFILE_NAME_RE.match(name):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append({
+                'name': name,
+                'format': 'pstats' if name.endswith('.prof') else 'collapsed',
+                'size': stat.st_size,
+                'created_at': stat.st_mtime
+            })
+
+        entries.sort(key=lambda entry: entry['created_at'], reverse=True)
+        return entries
+
+    def path_for(self, name):
+        """Resolve a profile name to its path on disk.
+
+        Args:
+            name (str): The profile file name.
+
+        Returns:
+            str or None: The profile path, or None if the name is invalid or missing.
+        """
+        if not _PROFILE_NAME_RE.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+class SamplingProfiler:
+    """Statistical profiler that samples one thread's stack.
+
+    A background thread periodically captures the stack of the profiled thread
+    and aggregates it in collapsed-stack format ('frame;frame;frame count').
+    """
+
+    def __init__(self, interval=0.005):
+        """Initialize the profiler.
+
+        Args:
+            interval (float, optional): Seconds between samples. Defaults to 0.005.
+        """
+        self.interval = interval
+        self.samples = Counter()
+        self._target = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def enable(self):
+        """Start sampling the calling thread."""
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def disable(self):
+        """Stop sampling and wait for the sampler thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def dumps(self):
+        """Serialize the collected samples.
+
+        Returns:
+            bytes: The samples in collapsed-stack format.
+        """
+        lines = [f"{stack} {count}" for stack, count in self.samples.most_common()]
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def _dump_cprofile(profiler):
+    """Serialize a cProfile profiler in pstats format.
+
+    Args:
+        profiler (cProfile.Profile): A disabled profiler.
+
+    Returns:
+        bytes: The marshalled pstats data.
+    """
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+def _should_profile(app):
+    """Decide whether the current request should be profiled.
+
+    Args:
+        app (Flask): The Flask application instance.
+
+    Returns:
+        bool: True if the request should be profiled, False otherwise.
+    """
+    token = request.headers.get(app.config.get('PROFILING_HEADER', 'X-Profile-Token'))
+    if token:
+        secret = app.config.get('PROFILING_SECRET') or app.config['SECRET_KEY']
+        if verify_profile_token(secret, token):
+            return True
+
+    sample_rate = app.config.get('PROFILING_SAMPLE_RATE', 0.0)
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def configure_profiling(app):
+    """Configure request profiling for the application.
+
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    store = ProfileStore(
+        app.config.get('PROFILING_DIR', os.path.join(os.getcwd(), 'profiles')),
+        app.config.get('PROFILING_MAX_FILES', 50)
+    )
+    app.extensions['profile_store'] = store
+
+    if not app.config.get('PROFILING_ENABLED', False):
+        return
+
+    mode = app.config.get('PROFILING_MODE', 'cprofile')
+
+    @app.before_request
+    def start_profiling():
+        if not _should_profile(app):
+            return
+
+        if mode == 'sampling':
+            profiler = SamplingProfiler(app.config.get('PROFILING_SAMPLE_INTERVAL', 0.005))
+        else:
+            profiler = cProfile.Profile()
+
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this interpreter
+            return
+
+        g.profiler = profiler
+        g.profile_start = time.perf_counter()
+
+    @app.after_request
+    def finish_profiling(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+
+        profiler.disable()
+        duration_ms = int((time.perf_counter() - g.pop('profile_start')) * 1000)
+
+        if isinstance(profiler, SamplingProfiler):
+            data, extension = profiler.dumps(), 'collapsed'
+        else:
+            data, extension = _dump_cprofile(profiler), 'prof'
+
+        endpoint = (request.endpoint or 'unknown').replace('.', '-')
+        name = (
+            f"{int(time.time() * 1000)}-{request.method.lower()}-{endpoint}"
+            f"-{duration_ms}ms.{extension}"
+        )
+
+        try:
+            store.save(name, data)
+            response.headers['X-Profile-Id'] = name
+        except OSError as e:
+            profile_logger.warning("Could not store profile %s: %s", name, e)
+
+        return response
+
+    @app.teardown_request
+    def stop_profiling(_exc):
+        # Requests that failed before after_request still need the profiler stopped
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
@@ -65,13 +65,27 @@ def configure_request_logging(app):
         if 'Cookie' in headers:
             headers['Cookie'] = '[FILTERED]'
         
+        # Summarize database activity collected by the db tracing middleware
+        db_stats = g.get('db_stats')
+        if db_stats is not None:
+            db_summary = (
+                f" - db: {db_stats['commands']} commands, "
+                f"{db_stats['duration_ms']:.1f}ms, {db_stats['documents']} docs"
+            )
+        else:
+            db_summary = ""
+        
+        # List endpoints record their query shape, so logs group by shape
+        query_shape = g.get('query_shape')
+        shape_summary = f" - shape: {query_shape}" if query_shape else ""
+        
         # Log request details
         request_logger.info(
-            f"{request.remote_addr} - {request.method} {request.full_path} "
-            f"- {response.status_code} - {duration:.4f}s"
+            "%s - %s %s - %s - %.4fs%s%s", request.remote_addr, request.method,
+            request.full_path, response.status_code, duration, db_summary, shape_summary
         )
         
         # Log more details at debug level
-        request_logger.debug(f"Headers: {headers}")
+        request_logger.debug("Headers: %s", headers)
         
         return response
@@ -6,7 +6,7 @@ This module provides middleware to add important security headers to all respons
 enhancing the application's security posture against common web vulnerabilities.
 """
 
-from flask import current_app
+from flask import current_app, request
 
 
 def add_security_headers(response):
@@ -0,0 +1,212 @@
+# app/models/archiver.py
+
+"""Archival of dead documents.
+
+This module runs a background job that moves documents nobody reads any more
+out of the hot collections: soft-deleted documents once they are old enough,
+and optionally documents that have stayed inactive for a long time. They are
+copied to a sibling archive collection (for example `products_archive`) in
+batches and then removed, so the hot collections and their indexes only hold
+the working set.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from pymongo import ReplaceOne
+
+from app.models.base_model import LIVE_FILTER
+
+# Create a dedicated logger for the archiver
+archive_logger = logging.getLogger('archiver')
+
+
+class Archiver:
+    """Background job that moves old documents to archive collections.
+
+    Every batch is copied with idempotent upserts before anything is removed,
+    and removal repeats the archival condition, so a crash or a concurrent
+    run never loses a document. A document restored between the copy and the
+    removal stays in place and its archive copy is dropped.
+    """
+
+    def __init__(self, app, models, deleted_after_days=30, inactive_after_days=0,
+                 batch_size=500, interval=3600, suffix='_archive'):
+        """Initialize the archiver.
+
+        Args:
+            app (Flask): The Flask application instance.
+            models (list): Model classes whose collections are archived.
+            deleted_after_days (int, optional): Days after which soft-deleted
+                documents are archived. 0 disables this. Defaults to 30.
+            inactive_after_days (int, optional): Days without updates after
+                which inactive documents are archived. 0 disables this.
+                Defaults to 0.
+            batch_size (int, optional): Documents moved per batch. Defaults to 500.
+            interval (float, optional): Seconds between runs. Defaults to 3600.
+            suffix (str, optional): Suffix of the archive collection names.
+                Defaults to '_archive'.
+        """
+        self.app = app
+        self.models = list(models)
+        self.deleted_after_days = deleted_after_days
+        self.inactive_after_days = inactive_after_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self.suffix = suffix
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Lifecycle
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start archiving periodically on a daemon thread."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='archiver', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop the archiver and wait for its thread to exit.
+
+        Args:
+            timeout (float, optional): Seconds to wait. Defaults to 5.0.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        with self.app.app_context():
+            while not self._stop.is_set():
+                try:
+                    self.run_once()
+                except Exception as e:
+                    archive_logger.error("Archiver error: %s", e)
+                self._stop.wait(self.interval)
+
+    # Archival
+
+    def conditions(self, now=None):
+        """Build the filters selecting documents due for archival.
+
+        Args:
+            now (datetime, optional): The reference time. Defaults to now.
+
+        Returns:
+            list: MongoDB filters, one per enabled rule.
+        """
+        now = now or datetime.utcnow()
+        conditions = []
+        if self.deleted_after_days:
+            cutoff = now - timedelta(days=self.deleted_after_days)
+            # $type repeats the deleted_at index's partial filter so it can be used
+            conditions.append({'deleted_at': {'$type': 'date', '$lt': cutoff}})
+        if self.inactive_after_days:
+            cutoff = now - timedelta(days=self.inactive_after_days)
+            conditions.append(dict(LIVE_FILTER, active=False, updated_at={'$lt': cutoff}))
+        return conditions
+
+    def run_once(self, now=None):
+        """Archive every document currently due, batch by batch.
+
+        Must be called inside an application context.
+
+        Args:
+            now (datetime, optional): The reference time. Defaults to now.
+
+        Returns:
+            dict: The number of documents archived per collection.
+        """
+        archived = {}
+        for model in self.models:
+            total = 0
+            for condition in self.conditions(now):
+                while not self._stop.is_set():
+                    moved, fetched = self.archive_batch(model, condition)
+                    total += moved
+                    if fetched < self.batch_size:
+                        break
+            archived[model.collection_name] = total
+            if total:
+                archive_logger.info("Archived %d documents from %s", total, model.collection_name)
+        return archived
+
+    def archive_batch(self, model, condition):
+        """Move one batch of documents matching a condition to the archive.
+
+        Args:
+            model (type): The model class.
+            condition (dict): MongoDB filter selecting the documents.
+
+        Returns:
+            tuple: (documents archived, documents fetched).
+        """
+        database = self.app.extensions['database']
+        collection = database[model.collection_name]
+        archive = database[model.collection_name + self.suffix]
+
+        documents = list(collection.find(condition).limit(self.batch_size))
+        if not documents:
+            return 0, 0
+
+        archived_at = datetime.utcnow()
+        archive.bulk_write([
+            ReplaceOne({'_id': document['_id']}, dict(document, archived_at=archived_at), upsert=True)
+            for document in documents
+        ], ordered=False)
+
+        ids = [document['_id'] for document in documents]
+        deleted = collection.delete_many(dict(condition, _id={'$in': ids})).deleted_count
+
+        kept = set()
+        if deleted < len(ids):
+            # Documents changed since they were read no longer qualify
+            kept = {
+                document['_id']
+                for document in collection.find({'_id': {'$in': ids}}, {'_id': True})
+            }
+            archive.delete_many({'_id': {'$in': list(kept)}})
+
+        # Archiving a live (inactive) document removes it from listeners' view
+        listeners = model._write_listeners()
+        if listeners:
+            for document in documents:
+                if document['_id'] not in kept and document.get('deleted_at') is None:
+                    model._notify_write(listeners, document, None)
+
+        return deleted, len(documents)
+
+
+def init_archiver(app):
+    """Create the application's archiver and start it if enabled.
+
+    Args:
+        app (Flask): The Flask application instance.
+
+    Returns:
+        Archiver: The archiver.
+    """
+    from app.models.user import User
+    from app.models.product import Product
+
+    archiver = Archiver(
+        app,
+        [User, Product],
+        deleted_after_days=app.config.get('ARCHIVE_DELETED_AFTER_DAYS', 30),
+        inactive_after_days=app.config.get('ARCHIVE_INACTIVE_AFTER_DAYS', 0),
+        batch_size=app.config.get('ARCHIVE_BATCH_SIZE', 500),
+        interval=app.config.get('ARCHIVE_INTERVAL', 3600),
+        suffix=app.config.get('ARCHIVE_COLLECTION_SUFFIX', '_archive')
+    )
+    app.extensions['archiver'] = archiver
+
+    if app.config.get('ARCHIVER_ENABLED', False):
+        archiver.start()
+    return archiver
@@ -6,13 +6,161 @@ This module provides a base class for all models to inherit from, providing
 common functionality for MongoDB operations.
 """
 
+import copy
+import re
 from bson import ObjectId
 from datetime import datetime
+from functools import lru_cache
 from marshmallow import Schema, fields, ValidationError, validates
 from flask import current_app
-from app import mongo
+from pymongo import ReadPreference
 from pymongo.collection import ReturnDocument
 
+from app.models.causal_sessions import current_session, reads_own_writes
+from app.models.memory_store import apply_update
+from app.models.query_compiler import QueryCompiler
+from app.models.read_coalescing import query_key
+
+# Filter selecting documents that have not been soft-deleted. Soft-deleting
+# models index only these documents, and an index's partial filter must be
+# repeated verbatim by a query for the index to serve it.
+LIVE_FILTER = {'deleted_at': {'$type': 'null'}}
+
+# Fields only the model layer writes; update and update_if ignore them in data
+MANAGED_FIELDS = frozenset({'_id', 'created_at', 'version', 'deleted_at'})
+
+# Index letting the archiver find soft-deleted documents without scanning live ones
+DELETED_INDEX = {
+    'keys': [('deleted_at', 1)],
+    'name': 'deleted_at_1_deleted',
+    'partialFilterExpression': {'deleted_at': {'$type': 'date'}}
+}
+
+# Collection recording one-time data migrations that have been applied
+MIGRATIONS_COLLECTION = 'schema_migrations'
+
+
+class VersionConflict(Exception):
+    """Raised when a conditional update finds a different document version.
+    
+    Attributes:
+        current_version (int): The version currently stored in the database.
+    """
+    
+    def __init__(self, current_version):
+        super().__init__(f"Document version is {current_version}")
+        self.current_version = current_version
+
+
+class WriteOutcome:
+    """Outcomes of a single-trip conditional write."""
+    NOT_FOUND = 'not_found'  # No document has the given ID
+    NOOP = 'noop'  # The document exists but did not meet the condition
+    UPDATED = 'updated'  # The document met the condition and was written
+
+
+# Pattern of an ObjectId's string form, shared with the `objectid` URL converter
+OBJECT_ID_PATTERN = '[0-9a-fA-F]{24}'
+_is_object_id = re.compile(OBJECT_ID_PATTERN).fullmatch
+
+
+def to_object_id(value):
+    """Convert a document ID to an ObjectId.
+    
+    Malformed IDs are expected on every route taking an ID, so they are
+    detected by inspecting the value rather than by catching the exception
+    ObjectId raises.
+    
+    Args:
+        value (str or ObjectId): The ID.
+    
+    Returns:
+        ObjectId or None: The ObjectId, or None if the value is not a valid ID.
+    """
+    if isinstance(value, ObjectId):
+        return value
+    if isinstance(value, str) and _is_object_id(value):
+        return ObjectId(value)
+    return None
+
+
+def _settable(data):
+    """Copy update data without the fields only the model layer writes.
+
+    Soft deletion, versions and creation times keep their meaning only while
+    delete, restore, create and the version counter alone set them.
+    """
+    return {key: value for key, value in data.items() if key not in MANAGED_FIELDS}
+
+
+def get_version(document):
+    """Get the version of a document.
+    
+    Documents written before versioning was enabled have no version field and
+    are treated as version 0.
+    
+    Args:
+        document (dict): The document.
+    
+    Returns:
+        int: The document version.
+    """
+    return document.get('version') or 0
+
+
+def register_write_listener(app, collection_name, callback):
+    """Register a callback for writes made through the model layer.
+    
+    The callback is called as callback(before, after) after every create,
+    update, update_if, delete, hard_delete and restore on the collection in
+    this application, where before/after are the document states (None for a
+    created, deleted or restored document). Bulk writes such as delete_many and
+    atomic counters such as inventory reservations are not reported.
+    
+    Args:
+        app (Flask): The Flask application instance.
+        collection_name (str): The collection to listen to.
+        callback (function): The listener.
+    """
+    app.extensions.setdefault('write_listeners', {}).setdefault(collection_name, []).append(callback)
+
+
+# Collection options a model can declare. Options left as None use the
+# database's settings, which come from the client and MONGO_URI.
+COLLECTION_OPTIONS = ('codec_options', 'read_preference', 'write_concern', 'read_concern')
+
+
+def init_collections(app, models):
+    """Open the collection handles of the models.
+    
+    Each model's handle, with the options it declares, is created once and
+    kept in `app.extensions['collections']`; `get_collection` returns it
+    without resolving the database or building a Collection per query.
+    
+    Args:
+        app (Flask): The Flask application instance.
+        models (list): The model classes.
+    """
+    handles = app.extensions.setdefault('collections', {})
+    database = app.extensions['database']
+    for model in models:
+        handles[model] = model._open_collection(database, {})
+
+
+def live_index(keys, name, **options):
+    """Build an index specification covering only live documents.
+    
+    Args:
+        keys (list): (field, direction) pairs.
+        name (str): The index name. Partial indexes need a name that differs
+            from any full index on the same keys.
+        **options: Other index options, such as unique=True.
+    
+    Returns:
+        dict: An entry for a model's `indexes` attribute.
+    """
+    return dict(options, keys=keys, name=name, partialFilterExpression=LIVE_FILTER)
+
 
 class BaseModel:
     """Base model class with common MongoDB operations.
@@ -23,88 +171,313 @@ class BaseModel:
     
     collection_name = None  # Child classes should override this
     
+    # Index specifications created by ensure_indexes. Each entry is a dict with
+    # 'keys' (a list of (field, direction) pairs) and optional index options.
+    indexes = []
+    
+    # Whether documents carry a 'version' field that create sets to 1 and every
+    # update increments, enabling optimistic concurrency control
+    versioned = False
+    
+    # Whether delete only marks documents with a 'deleted_at' timestamp. Reads
+    # and writes then skip deleted documents unless the filter mentions
+    # 'deleted_at', and the archiver later moves them out of the collection.
+    soft_delete = False
+    
+    # Query arguments list endpoints accept, compiled by compile_query: the
+    # FilterFields that can be filtered on, the fields that can be sorted by,
+    # and the order used when a request does not ask for one
+    filters = []
+    sortable = []
+    default_sort = [('created_at', -1)]
+    
+    # Options of the model's collection handle (see COLLECTION_OPTIONS): a
+    # bson CodecOptions, a pymongo read preference, WriteConcern and
+    # ReadConcern. None keeps the database's setting.
+    codec_options = None
+    read_preference = None
+    write_concern = None
+    read_concern = None
+    
     @classmethod
-    def get_collection(cls):
+    def get_collection(cls, **options):
         """Get the MongoDB collection for this model.
         
+        Handles are cached per application, including the variants with
+        other options, so repeated calls return the same Collection.
+        
+        Args:
+            **options: Options overriding the model's for this handle, such
+                as read_preference=ReadPreference.SECONDARY_PREFERRED.
+        
         Returns:
             Collection: The MongoDB collection associated with this model.
         
         Raises:
             ValueError: If collection_name is not defined in the child class.
         """
+        handles = current_app.extensions.setdefault('collections', {})
+        if options:
+            # Option values are not hashable; their reprs identify them
+            key = (cls, tuple(sorted((name, repr(value)) for name, value in options.items())))
+        else:
+            key = cls
+        collection = handles.get(key)
+        if collection is None:
+            collection = cls._open_collection(current_app.extensions['database'], options)
+            handles[key] = collection
+        return collection
+    
+    @classmethod
+    def _open_collection(cls, database, options):
+        """Create a collection handle with the model's options and the given overrides."""
         if not cls.collection_name:
             raise ValueError(f"{cls.__name__} must define a collection_name")
-        return mongo.db[cls.collection_name]
+        unknown = set(options) - set(COLLECTION_OPTIONS)
+        if unknown:
+            raise TypeError(f"Unknown collection options: {', '.join(sorted(unknown))}")
+        
+        merged = {name: getattr(cls, name) for name in COLLECTION_OPTIONS if getattr(cls, name) is not None}
+        merged.update(options)
+        return database.get_collection(cls.collection_name, **merged)
+    
+    @classmethod
+    def ensure_indexes(cls):
+        """Create the indexes declared in the model's `indexes` attribute.
+        
+        Returns:
+            list: The names of the ensured indexes.
+        """
+        collection = cls.get_collection()
+        if cls.soft_delete:
+            cls._backfill_deleted_at()
+        names = []
+        for spec in cls.indexes:
+            options = {key: value for key, value in spec.items() if key != 'keys'}
+            names.append(collection.create_index(spec['keys'], **options))
+        return names
+    
+    @classmethod
+    def _backfill_deleted_at(cls):
+        """Give documents written before soft delete a null 'deleted_at'.
+        
+        The live filter only matches an explicit null, so older documents
+        would otherwise disappear. The backfill runs once per collection and
+        is recorded in the migrations collection.
+        """
+        migrations = current_app.extensions['database'][MIGRATIONS_COLLECTION]
+        migration_id = f"{cls.collection_name}.deleted_at"
+        if migrations.find_one({'_id': migration_id}) is not None:
+            return
+        
+        result = cls.get_collection().update_many(
+            {'deleted_at': {'$exists': False}}, {'$set': {'deleted_at': None}}
+        )
+        migrations.update_one(
+            {'_id': migration_id},
+            {'$set': {'applied_at': datetime.utcnow(), 'documents': result.modified_count}},
+            upsert=True
+        )
+    
+    @classmethod
+    def compile_query(cls, args):
+        """Compile list query arguments into a query on this model.
+        
+        Args:
+            args (dict): The request's query arguments.
+        
+        Returns:
+            CompiledQuery: The filter, sort, page and shape of the query.
+        
+        Raises:
+            InvalidQuery: If an argument is malformed, or no index serves the query.
+        """
+        return cls.query_compiler().compile(args)
+    
+    @classmethod
+    def query_compiler(cls):
+        """Get the model's query compiler, created on first use.
+        
+        Returns:
+            QueryCompiler: The compiler of this model's list queries.
+        """
+        compiler = cls.__dict__.get('_query_compiler')
+        if compiler is None:
+            compiler = QueryCompiler(cls)
+            cls._query_compiler = compiler
+        return compiler
     
     @classmethod
-    def find_one(cls, filter_dict):
+    def _live(cls, filter_dict):
+        """Restrict a filter to documents that have not been soft-deleted.
+        
+        Args:
+            filter_dict (dict): MongoDB filter criteria.
+        
+        Returns:
+            dict: The filter, restricted to live documents unless the model
+                does not soft-delete or the filter already mentions 'deleted_at'.
+        """
+        if not cls.soft_delete or 'deleted_at' in filter_dict:
+            return filter_dict
+        return dict(filter_dict, **LIVE_FILTER)
+    
+    @classmethod
+    def _write_listeners(cls):
+        """Get the write listeners registered for this model's collection."""
+        return current_app.extensions.get('write_listeners', {}).get(cls.collection_name)
+    
+    @classmethod
+    def _notify_write(cls, listeners, before, after):
+        """Call write listeners, logging (not raising) their failures."""
+        for listener in listeners:
+            try:
+                listener(before, after)
+            except Exception as e:
+                current_app.logger.error("Write listener failed for %s: %s", cls.collection_name, e)
+    
+    @classmethod
+    def _reader(cls, read_preference):
+        """Get the collection handle and causal session for a read.
+        
+        Args:
+            read_preference (optional): A pymongo read preference overriding
+                the model's, or None.
+        
+        Returns:
+            tuple: (Collection, ClientSession or None).
+        """
+        if read_preference is None:
+            return cls.get_collection(), current_session()
+        return cls.get_collection(read_preference=read_preference), current_session()
+    
+    @classmethod
+    def _coalesced_read(cls, operation, loader, filter_dict, max_age=0, read_preference=None, **options):
+        """Run a read through the application's read coalescer, if any.
+        
+        Reads with an explicit read preference, and reads of a user who
+        must observe their own recent writes, run on their own.
+        
+        Args:
+            operation (str): 'find', 'find_one' or 'count'.
+            loader (function): Performs the read.
+            filter_dict (dict): The read's filter.
+            max_age (float, optional): Seconds the result may be reused.
+                Defaults to 0 (only concurrent identical reads share it).
+            read_preference (optional): The read's explicit read preference.
+                Defaults to None.
+            **options: Sort, skip and limit, which are part of the read's key.
+        
+        Returns:
+            Any: The read's result.
+        """
+        coalescer = current_app.extensions.get('read_coalescer')
+        if coalescer is None or read_preference is not None or reads_own_writes():
+            return loader()
+        key = query_key(
+            current_app.extensions['database'].name, cls.collection_name, operation,
+            filter_dict, **options
+        )
+        return coalescer.read(key, loader, max_age)
+    
+    @classmethod
+    def find_one(cls, filter_dict, max_age=0, read_preference=None):
         """Find a single document matching the filter.
         
         Args:
             filter_dict (dict): MongoDB filter criteria.
+            max_age (float, optional): Seconds a previously read result may be
+                reused. Defaults to 0.
+            read_preference (optional): A pymongo read preference overriding
+                the model's. Defaults to None.
         
         Returns:
             dict or None: The matching document, or None if not found.
         """
-        return cls.get_collection().find_one(filter_dict)
+        filter_dict = cls._live(filter_dict)
+        collection, session = cls._reader(read_preference)
+        return cls._coalesced_read(
+            'find_one', lambda: collection.find_one(filter_dict, session=session), filter_dict, max_age,
+            read_preference
+        )
     
     @classmethod
-    def find_by_id(cls, id):
+    def find_by_id(cls, id, read_preference=None):
         """Find a document by its ID.
         
         Args:
             id (str): The document ID.
+            read_preference (optional): A pymongo read preference overriding
+                the model's. Defaults to None.
         
         Returns:
             dict or None: The document with the given ID, or None if not found.
         """
-        if not isinstance(id, ObjectId):
-            try:
-                id = ObjectId(id)
-            except:
-                return None
-        return cls.find_one({'_id': id})
+        id = to_object_id(id)
+        if id is None:
+            return None
+        return cls.find_one({'_id': id}, read_preference=read_preference)
     
     @classmethod
-    def find(cls, filter_dict=None, sort=None, skip=0, limit=0):
+    def find(cls, filter_dict=None, sort=None, skip=0, limit=0, max_age=0, read_preference=None):
         """Find documents matching the filter with pagination.
         
+        Concurrent identical reads share a single database call.
+        
         Args:
             filter_dict (dict, optional): MongoDB filter criteria. Defaults to None.
             sort (list or tuple, optional): Sort criteria. Defaults to None.
             skip (int, optional): Number of documents to skip. Defaults to 0.
             limit (int, optional): Maximum number of documents to return. Defaults to 0.
+            max_age (float, optional): Seconds a previously read result may be
+                reused. Defaults to 0.
+            read_preference (optional): A pymongo read preference overriding
+                the model's. Defaults to None.
         
         Returns:
             list: A list of matching documents.
         """
-        filter_dict = filter_dict or {}
-        cursor = cls.get_collection().find(filter_dict)
-        
-        if sort:
-            cursor = cursor.sort(sort)
+        filter_dict = cls._live(filter_dict or {})
+        collection, session = cls._reader(read_preference)
         
-        if skip:
-            cursor = cursor.skip(skip)
-        
-        if limit:
-            cursor = cursor.limit(limit)
+        def load():
+            cursor = collection.find(filter_dict, session=session)
+            
+            if sort:
+                cursor = cursor.sort(sort)
+            
+            if skip:
+                cursor = cursor.skip(skip)
+            
+            if limit:
+                cursor = cursor.limit(limit)
+            
+            return list(cursor)
         
-        return list(cursor)
+        return cls._coalesced_read(
+            'find', load, filter_dict, max_age, read_preference, sort=sort, skip=skip, limit=limit
+        )
     
     @classmethod
-    def count(cls, filter_dict=None):
+    def count(cls, filter_dict=None, max_age=0, read_preference=None):
         """Count documents matching the filter.
         
         Args:
             filter_dict (dict, optional): MongoDB filter criteria. Defaults to None.
+            max_age (float, optional): Seconds a previously counted total may be
+                reused. Defaults to 0.
+            read_preference (optional): A pymongo read preference overriding
+                the model's. Defaults to None.
         
         Returns:
             int: The number of matching documents.
         """
-        filter_dict = filter_dict or {}
-        return cls.get_collection().count_documents(filter_dict)
+        filter_dict = cls._live(filter_dict or {})
+        collection, session = cls._reader(read_preference)
+        return cls._coalesced_read(
+            'count', lambda: collection.count_documents(filter_dict, session=session), filter_dict, max_age,
+            read_preference
+        )
     
     @classmethod
     def create(cls, data):
@@ -119,73 +492,321 @@ class BaseModel:
         # Set created_at and updated_at timestamps
         data['created_at'] = datetime.utcnow()
         data['updated_at'] = data['created_at']
+        if cls.versioned:
+            data['version'] = 1
+        if cls.soft_delete:
+            data['deleted_at'] = None
         
-        result = cls.get_collection().insert_one(data)
+        result = cls.get_collection().insert_one(data, session=current_session(write=True))
         data['_id'] = result.inserted_id
         
+        listeners = cls._write_listeners()
+        if listeners:
+            cls._notify_write(listeners, None, data)
+        
         return data
     
     @classmethod
-    def update(cls, id, data):
+    def update(cls, id, data, expected_version=None):
         """Update a document by ID.
         
+        For versioned models the update increments the document version and,
+        when an expected version is given, only applies if the stored version
+        still matches it. The check and the write are a single atomic
+        operation, so concurrent writers never overwrite each other.
+        
         Args:
             id (str): The document ID.
-            data (dict): The update data.
+            data (dict): The update data. MANAGED_FIELDS are ignored.
+            expected_version (int, optional): The version the caller last read.
+                Defaults to None (unconditional update).
         
         Returns:
             dict or None: The updated document, or None if not found.
+        
+        Raises:
+            VersionConflict: If the document exists but its version differs
+                from the expected version.
         """
-        if not isinstance(id, ObjectId):
-            try:
-                id = ObjectId(id)
-            except:
-                return None
+        id = to_object_id(id)
+        if id is None:
+            return None
         
+        data = _settable(data)
         # Set updated_at timestamp
         data['updated_at'] = datetime.utcnow()
         
         # Use $set to avoid overwriting fields not included in data
+        filter_dict = cls._live({'_id': id})
         update_data = {'$set': data}
         
+        if cls.versioned:
+            update_data['$inc'] = {'version': 1}
+            if expected_version is not None:
+                # Version 0 stands for documents written before versioning
+                filter_dict['version'] = expected_version or None
+        
         # Return the updated document
-        return cls.get_collection().find_one_and_update(
-            {'_id': id},
-            update_data,
-            return_document=ReturnDocument.AFTER
+        document = cls._find_one_and_update(filter_dict, update_data)
+        
+        if document is None and 'version' in filter_dict:
+            # Tell a missing document apart from a stale version
+            current = cls.get_collection(read_preference=ReadPreference.PRIMARY).find_one(
+                cls._live({'_id': id}), {'version': True}, session=current_session()
+            )
+            if current is not None:
+                raise VersionConflict(get_version(current))
+        
+        return document
+    
+    @classmethod
+    def update_if(cls, id, condition, data):
+        """Update a document by ID only if it meets a condition.
+        
+        The condition is part of the update filter, so the common case costs
+        a single round trip. Only when nothing matched is the ID looked up
+        again, to tell a missing document from one that already satisfied the
+        update.
+        
+        Args:
+            id (str): The document ID.
+            condition (dict): Additional MongoDB filter criteria, for example
+                {'active': False} to only activate inactive documents.
+            data (dict): The fields to set. MANAGED_FIELDS are ignored.
+        
+        Returns:
+            str: A WriteOutcome value (NOT_FOUND, NOOP or UPDATED).
+        """
+        id = to_object_id(id)
+        if id is None:
+            return WriteOutcome.NOT_FOUND
+        
+        data = _settable(data)
+        data['updated_at'] = datetime.utcnow()
+        update_data = {'$set': data}
+        if cls.versioned:
+            update_data['$inc'] = {'version': 1}
+        
+        session = current_session(write=True)
+        filter_dict = cls._live(dict(condition, _id=id))
+        if cls._write_listeners():
+            matched = cls._find_one_and_update(filter_dict, update_data) is not None
+        else:
+            matched = cls.get_collection().update_one(filter_dict, update_data, session=session).matched_count > 0
+        if matched:
+            return WriteOutcome.UPDATED
+        
+        if cls.get_collection(read_preference=ReadPreference.PRIMARY).count_documents(
+            cls._live({'_id': id}), limit=1, session=session
+        ):
+            return WriteOutcome.NOOP
+        return WriteOutcome.NOT_FOUND
+    
+    @classmethod
+    def _find_one_and_update(cls, filter_dict, update_data):
+        """Update one document and return its new state, notifying listeners.
+        
+        Without listeners this is a plain find_one_and_update. With listeners
+        the previous state is requested instead and the new state is derived
+        by applying the update locally, so listeners see both states without
+        an extra round trip.
+        
+        Args:
+            filter_dict (dict): MongoDB filter criteria.
+            update_data (dict): The update operators.
+        
+        Returns:
+            dict or None: The updated document, or None if nothing matched.
+        """
+        listeners = cls._write_listeners()
+        session = current_session(write=True)
+        if not listeners:
+            return cls.get_collection().find_one_and_update(
+                filter_dict, update_data, return_document=ReturnDocument.AFTER, session=session
+            )
+        
+        before = cls.get_collection().find_one_and_update(
+            filter_dict, update_data, return_document=ReturnDocument.BEFORE, session=session
         )
+        if before is None:
+            return None
+        after = copy.deepcopy(before)
+        apply_update(after, update_data)
+        cls._notify_write(listeners, before, after)
+        return after
+    
+    @classmethod
+    def update_with_retry(cls, id, mutate, retries=3):
+        """Apply a read-modify-write update, retrying on version conflicts.
+        
+        The document is read, passed to `mutate` to compute the changes, and
+        written back conditionally on the version that was read. If another
+        writer got there first, the cycle starts again with fresh data.
+        
+        Args:
+            id (str): The document ID.
+            mutate (function): Called with the current document; returns the
+                dict of fields to set, or a falsy value to leave it unchanged.
+            retries (int, optional): Number of retries after a conflict. Defaults to 3.
+        
+        Returns:
+            dict or None: The updated (or unchanged) document, or None if not found.
+        
+        Raises:
+            VersionConflict: If the document was still changing after all retries.
+        """
+        for attempt in range(retries + 1):
+            # The version must be current, so the primary is read
+            document = cls.find_by_id(id, read_preference=ReadPreference.PRIMARY)
+            if document is None:
+                return None
+            
+            changes = mutate(document)
+            if not changes:
+                return document
+            
+            try:
+                return cls.update(document['_id'], changes, expected_version=get_version(document))
+            except VersionConflict:
+                if attempt == retries:
+                    raise
     
     @classmethod
     def delete(cls, id):
         """Delete a document by ID.
         
+        Soft-deleting models only set the document's 'deleted_at' timestamp;
+        the document disappears from reads immediately and is moved out of
+        the collection by the archiver later. Listeners see the deletion as
+        (document, None) either way.
+        
         Args:
             id (str): The document ID.
         
         Returns:
             bool: True if the document was deleted, False otherwise.
         """
-        if not isinstance(id, ObjectId):
-            try:
-                id = ObjectId(id)
-            except:
+        if not cls.soft_delete:
+            return cls.hard_delete(id)
+        
+        id = to_object_id(id)
+        if id is None:
+            return False
+        
+        now = datetime.utcnow()
+        filter_dict = cls._live({'_id': id})
+        update_data = {'$set': {'deleted_at': now, 'updated_at': now}}
+        if cls.versioned:
+            update_data['$inc'] = {'version': 1}
+        
+        listeners = cls._write_listeners()
+        session = current_session(write=True)
+        if listeners:
+            before = cls.get_collection().find_one_and_update(
+                filter_dict, update_data, return_document=ReturnDocument.BEFORE, session=session
+            )
+            if before is None:
+                return False
+            cls._notify_write(listeners, before, None)
+            return True
+        
+        return cls.get_collection().update_one(filter_dict, update_data, session=session).matched_count > 0
+    
+    @classmethod
+    def hard_delete(cls, id):
+        """Remove a document from the collection, whether or not it was soft-deleted.
+        
+        Args:
+            id (str): The document ID.
+        
+        Returns:
+            bool: True if the document was deleted, False otherwise.
+        """
+        id = to_object_id(id)
+        if id is None:
+            return False
+        
+        listeners = cls._write_listeners()
+        session = current_session(write=True)
+        if listeners:
+            before = cls.get_collection().find_one_and_delete({'_id': id}, session=session)
+            if before is None:
                 return False
+            if before.get('deleted_at') is None:
+                cls._notify_write(listeners, before, None)
+            return True
         
-        result = cls.get_collection().delete_one({'_id': id})
+        result = cls.get_collection().delete_one({'_id': id}, session=session)
         return result.deleted_count > 0
     
+    @classmethod
+    def restore(cls, id):
+        """Undo the soft delete of a document that has not been archived yet.
+        
+        Args:
+            id (str): The document ID.
+        
+        Returns:
+            dict or None: The restored document, or None if there is no
+                soft-deleted document with that ID.
+        """
+        id = to_object_id(id)
+        if id is None:
+            return None
+        
+        update_data = {'$set': {'deleted_at': None, 'updated_at': datetime.utcnow()}}
+        if cls.versioned:
+            update_data['$inc'] = {'version': 1}
+        
+        document = cls.get_collection().find_one_and_update(
+            {'_id': id, 'deleted_at': {'$type': 'date'}},
+            update_data,
+            return_document=ReturnDocument.AFTER,
+            session=current_session(write=True)
+        )
+        listeners = cls._write_listeners()
+        if document is not None and listeners:
+            cls._notify_write(listeners, None, document)
+        return document
+    
     @classmethod
     def delete_many(cls, filter_dict):
         """Delete multiple documents matching the filter.
         
+        Soft-deleting models mark the documents instead of removing them.
+        Write listeners are not notified.
+        
         Args:
             filter_dict (dict): MongoDB filter criteria.
         
         Returns:
             int: The number of documents deleted.
         """
-        result = cls.get_collection().delete_many(filter_dict)
-        return result.deleted_count
+        session = current_session(write=True)
+        if not cls.soft_delete:
+            return cls.get_collection().delete_many(filter_dict, session=session).deleted_count
+        
+        now = datetime.utcnow()
+        update_data = {'$set': {'deleted_at': now, 'updated_at': now}}
+        if cls.versioned:
+            update_data['$inc'] = {'version': 1}
+        return cls.get_collection().update_many(
+            cls._live(filter_dict), update_data, session=session
+        ).modified_count
+
+
+@lru_cache(maxsize=256)
+def _partial_schema(schema_class, field_names):
+    """Build (once per field set) a schema restricted to the given fields.
+    
+    Args:
+        schema_class (type): The schema class.
+        field_names (frozenset): The fields to validate.
+    
+    Returns:
+        Schema: A partial schema instance limited to those fields.
+    """
+    return schema_class(only=field_names, partial=True)
 
 
 # Base schema for MongoDB models
@@ -197,6 +818,33 @@ class BaseSchema(Schema):
     id = fields.Str(attribute='_id')
     created_at = fields.DateTime()
     updated_at = fields.DateTime()
+    version = fields.Int(dump_only=True)
+    
+    # Fields that updates never accept from clients
+    READ_ONLY_FIELDS = frozenset({'id', '_id', 'created_at', 'updated_at', 'version'})
+    
+    @classmethod
+    def load_partial(cls, data):
+        """Validate the fields submitted for a partial update.
+        
+        Only the submitted fields are validated, and required fields that were
+        not submitted are not enforced. The restricted schema is built once
+        per distinct set of field names and reused, so each call costs about
+        as much as validating those fields alone. Read-only fields are
+        dropped, and fields the schema does not declare are rejected.
+        
+        Args:
+            data (dict): The submitted fields.
+        
+        Returns:
+            dict: The validated and deserialized fields.
+        
+        Raises:
+            ValidationError: If a submitted field is invalid or unknown.
+        """
+        data = {key: value for key, value in data.items() if key not in cls.READ_ONLY_FIELDS}
+        field_names = frozenset(key for key in data if key in cls._declared_fields)
+        return _partial_schema(cls, field_names).load(data)
     
     @validates('id')
     def validate_id(self, id):
@@ -208,7 +856,5 @@ class BaseSchema(Schema):
         Raises:
             ValidationError: If the ID is not a valid ObjectId.
         """
-        try:
-            ObjectId(id)
-        except:
+        if to_object_id(id) is None:
             raise ValidationError("Invalid ID format")
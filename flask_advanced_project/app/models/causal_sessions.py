@@ -0,0 +1,198 @@
+# app/models/causal_sessions.py
+
+"""Causally consistent sessions per client.
+
+Models may read from secondaries, which lag behind the primary. So that a
+client still reads its own writes, requests that write run in a causally
+consistent MongoDB session, and the response hands the session's position in
+the operation log back to the client: a signed token sent both as a cookie
+and in the `X-Causal-Position` header. A later request presenting the token,
+whichever worker serves it, starts its session from that position, so its
+reads wait until the secondary serving them has replicated the client's
+writes. Tokens only need to be honoured for as long as secondaries may lag.
+"""
+
+from bson import json_util
+from bson.json_util import CANONICAL_JSON_OPTIONS
+from flask import current_app, g, has_request_context, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+# Header carrying the position token, for clients that do not keep cookies
+POSITION_HEADER = 'X-Causal-Position'
+
+
+class CausalSessions:
+    """Causally consistent sessions started from positions held by clients.
+
+    Positions are signed with the application's secret key, so clients cannot
+    make requests wait for operation times that were never reached, and
+    expire after `ttl` seconds.
+    """
+
+    def __init__(self, client, secret_key, ttl=300, cookie_name='causal_position'):
+        """Initialize the sessions.
+
+        Args:
+            client (MongoClient): The client starting the sessions.
+            secret_key (str): Key signing the position tokens.
+            ttl (float, optional): Seconds a position is honoured; at least
+                the largest maxStalenessSeconds models read with. Defaults to 300.
+            cookie_name (str, optional): Name of the position cookie.
+                Defaults to 'causal_position'.
+        """
+        self.client = client
+        self.ttl = ttl
+        self.cookie_name = cookie_name
+        # Cluster times hold Timestamps, Int64s and binary signatures, which
+        # extended JSON keeps intact
+        self._serializer = URLSafeTimedSerializer(
+            secret_key, salt='causal-position', serializer=json_util,
+            serializer_kwargs={'json_options': CANONICAL_JSON_OPTIONS}
+        )
+
+    def dumps(self, session):
+        """Sign the position a session reached.
+
+        Args:
+            session (ClientSession): The session.
+
+        Returns:
+            str or None: The position token, or None if the session has no position.
+        """
+        if session.cluster_time is None or session.operation_time is None:
+            return None
+        return self._serializer.dumps([session.cluster_time, session.operation_time])
+
+    def loads(self, token):
+        """Read a position token.
+
+        Args:
+            token (str): The position token.
+
+        Returns:
+            tuple or None: (cluster time, operation time), or None if the
+                token is forged, malformed or expired.
+        """
+        try:
+            cluster_time, operation_time = self._serializer.loads(token, max_age=self.ttl)
+        except (BadSignature, TypeError, ValueError):
+            return None
+        return cluster_time, operation_time
+
+    def request_position(self):
+        """Get the position presented by the current request, if any."""
+        token = request.headers.get(POSITION_HEADER) or request.cookies.get(self.cookie_name)
+        return self.loads(token) if token else None
+
+    def start(self, position=None):
+        """Start a session for a request.
+
+        Args:
+            position (tuple, optional): (cluster time, operation time) to
+                start from. Defaults to None.
+
+        Returns:
+            ClientSession: A causally consistent session, advanced to the
+                position if one is given.
+        """
+        session = self.client.start_session(causal_consistency=True)
+        if position is not None:
+            session.advance_cluster_time(position[0])
+            session.advance_operation_time(position[1])
+        return session
+
+
+def current_session(write=False):
+    """Get the causally consistent session of the current request.
+
+    The session is started on first use: for a write, or for a read when the
+    request presents the position of an earlier write. Other reads, work
+    outside requests and applications without causal sessions run without one.
+
+    Args:
+        write (bool, optional): Whether the session is used for a write,
+            whose position is then handed to the client. Defaults to False.
+
+    Returns:
+        ClientSession or None: The session, or None.
+    """
+    session = g.get('db_session')
+    if session is None:
+        sessions = current_app.extensions.get('causal_sessions')
+        if sessions is None or not has_request_context():
+            return None
+        if 'db_session_position' not in g:
+            g.db_session_position = sessions.request_position()
+        if g.db_session_position is None and not write:
+            # Nothing written recently that reads must observe
+            return None
+        session = g.db_session = sessions.start(g.db_session_position)
+        g.db_session_causal = g.db_session_position is not None
+    if write:
+        g.db_session_causal = g.db_session_wrote = True
+    return session
+
+
+def reads_own_writes():
+    """Check whether the current request must observe its client's recent writes.
+
+    Such reads must run in the request's own session rather than share
+    another request's result.
+
+    Returns:
+        bool: True if the client wrote within the session TTL or in this request.
+    """
+    if g.get('db_session') is None and current_session() is None:
+        return False
+    return g.db_session_causal
+
+
+def _send_position(response):
+    """Hand the position reached by the request's writes to the client."""
+    session = g.get('db_session')
+    if session is None or not g.get('db_session_wrote'):
+        return response
+    sessions = current_app.extensions['causal_sessions']
+    token = sessions.dumps(session)
+    if token is not None:
+        response.headers[POSITION_HEADER] = token
+        response.set_cookie(
+            sessions.cookie_name, token, max_age=int(sessions.ttl), httponly=True,
+            secure=current_app.config.get('SESSION_COOKIE_SECURE', False), samesite='Lax'
+        )
+    return response
+
+
+def _end_session(exception=None):
+    """End the request's session."""
+    session = g.pop('db_session', None)
+    if session is not None:
+        session.end_session()
+
+
+def init_causal_sessions(app):
+    """Create the application's causal sessions, if enabled.
+
+    Sessions need a MongoDB replica set or sharded cluster; the memory
+    backend runs without them.
+
+    Args:
+        app (Flask): The Flask application instance.
+
+    Returns:
+        CausalSessions or None: The sessions, or None when disabled.
+    """
+    if (not app.config.get('CAUSAL_SESSIONS_ENABLED', True)
+            or app.config.get('DATABASE_BACKEND', 'mongo') == 'memory'):
+        return None
+
+    sessions = CausalSessions(
+        app.extensions['database'].client,
+        app.config['SECRET_KEY'],
+        ttl=app.config.get('CAUSAL_SESSION_TTL', 300),
+        cookie_name=app.config.get('CAUSAL_SESSION_COOKIE', 'causal_position')
+    )
+    app.extensions['causal_sessions'] = sessions
+    app.after_request(_send_position)
+    app.teardown_request(_end_session)
+    return sessions
@@ -0,0 +1,391 @@
+# app/models/change_feed.py
+
+"""Database change feed.
+
+This module runs a background subscriber that follows writes to the watched
+collections, whichever process made them, and broadcasts them to registered
+listeners such as caches, search indexes and counters. It uses MongoDB change
+streams when the deployment supports them and falls back to polling the
+`updated_at` field otherwise. Its position (the change stream resume token or
+the polling watermark) is checkpointed in the database, so a restarted process
+resumes where it left off instead of forcing listeners to rebuild.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+
+# Create a dedicated logger for the change feed
+feed_logger = logging.getLogger('change_feed')
+
+# Server error codes meaning change streams are unavailable on this deployment
+_STREAMS_UNSUPPORTED_CODES = {40573}  # The $changeStream stage needs a replica set
+
+# Change stream events after which the followed data must be rebuilt
+_INVALIDATING_OPERATIONS = {'drop', 'dropDatabase', 'rename', 'invalidate'}
+
+# Server error codes meaning the resume token can no longer be used
+_HISTORY_LOST_CODES = {
+    136,  # CappedPositionLost
+    260,  # InvalidResumeToken
+    280,  # ChangeStreamFatalError
+    286,  # ChangeStreamHistoryLost
+}
+
+
+class ChangeFeed:
+    """Background subscriber that broadcasts database changes to listeners.
+
+    Listeners are called on the feed thread, inside an application context,
+    with one event per change:
+
+        {'collection': 'products', 'operation': 'update',
+         'document_id': ObjectId(...), 'document': {...} or None}
+
+    Operations are 'insert', 'update', 'replace' and 'delete', plus
+    'invalidate' when the feed lost its position and listeners must rebuild
+    their state from the database. Polling cannot observe deletes, and
+    reports every change it finds as an insert or an update.
+
+    Polling follows `updated_at`, which each writing process stamps with its
+    own clock before the write commits. A write stamped before the polling
+    position can therefore become visible after the position moved past it,
+    so every poll also re-scans the `poll_lag` seconds behind the position
+    and delivers the changes it had not seen yet.
+
+    Delivery is at least once: after a restart or a reconnect, changes since
+    the last checkpoint are delivered again, so listeners must be idempotent.
+    """
+
+    def __init__(self, app, collections, name='default', mode='auto', poll_interval=1.0,
+                 checkpoint_interval=5.0, batch_size=500,
+                 state_collection='change_feed_state', poll_lag=5.0):
+        """Initialize the feed.
+
+        Args:
+            app (Flask): The Flask application instance.
+            collections (list): Names of the collections to follow.
+            name (str, optional): Name under which the position is checkpointed.
+                Defaults to 'default'.
+            mode (str, optional): 'stream', 'poll' or 'auto' (stream, falling
+                back to poll when unsupported). Defaults to 'auto'.
+            poll_interval (float, optional): Seconds between polls. Defaults to 1.0.
+            checkpoint_interval (float, optional): Minimum seconds between
+                position checkpoints. Defaults to 5.0.
+            batch_size (int, optional): Documents fetched per poll. Defaults to 500.
+            state_collection (str, optional): Collection holding checkpoints.
+                Defaults to 'change_feed_state'.
+            poll_lag (float, optional): Seconds behind the polling position
+                re-scanned for late commits and clock skew between writers.
+                Defaults to 5.0.
+        """
+        self.app = app
+        self.collections = list(collections)
+        self.name = name
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.checkpoint_interval = checkpoint_interval
+        self.batch_size = batch_size
+        self.state_collection = state_collection
+        self.poll_lag = timedelta(seconds=poll_lag)
+        self._listeners = {collection: [] for collection in self.collections}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_checkpoint = 0.0
+        # Per collection, the updated_at of each document delivered within
+        # the re-scanned window, so re-scans only deliver new changes
+        self._delivered = {}
+
+    # Listener registry
+
+    def subscribe(self, callback, collections=None):
+        """Register a listener.
+
+        Args:
+            callback (function): Called with each change event.
+            collections (list, optional): Collections to listen to. Defaults
+                to every collection the feed follows.
+
+        Returns:
+            function: The callback, so this can be used as a decorator.
+        """
+        with self._lock:
+            for collection in collections or self.collections:
+                self._listeners.setdefault(collection, []).append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Remove a listener from every collection.
+
+        Args:
+            callback (function): The listener to remove.
+        """
+        with self._lock:
+            for listeners in self._listeners.values():
+                if callback in listeners:
+                    listeners.remove(callback)
+
+    def publish(self, event):
+        """Deliver an event to the listeners of its collection.
+
+        A failing listener is logged and does not affect the others.
+
+        Args:
+            event (dict): The change event.
+        """
+        with self._lock:
+            listeners = list(self._listeners.get(event['collection'], ()))
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                feed_logger.error(
+                    "Change listener %s failed on %s in %s: %s",
+                    getattr(listener, '__name__', listener), event['operation'], event['collection'], e
+                )
+
+    def _invalidate(self):
+        for collection in self.collections:
+            self.publish({
+                'collection': collection,
+                'operation': 'invalidate',
+                'document_id': None,
+                'document': None
+            })
+
+    # Lifecycle
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start following changes on a daemon thread."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop the feed and wait for its thread to exit.
+
+        Args:
+            timeout (float, optional): Seconds to wait. Defaults to 5.0.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        mode = self.mode
+        failures = 0
+        with self.app.app_context():
+            database = self.app.extensions['database']
+            while not self._stop.is_set():
+                try:
+                    if mode == 'poll':
+                        self._follow_poll(database)
+                    else:
+                        self._follow_stream(database)
+                    failures = 0
+                except OperationFailure as e:
+                    if mode == 'auto' and e.code in _STREAMS_UNSUPPORTED_CODES:
+                        feed_logger.info("Change streams unavailable, falling back to polling")
+                        mode = 'poll'
+                        continue
+                    if e.code in _HISTORY_LOST_CODES:
+                        feed_logger.warning("Change feed position lost, listeners must rebuild: %s", e)
+                        self._save_state(database, {'resume_token': None, 'poll_positions': None})
+                        continue
+                    failures += 1
+                    feed_logger.error("Change feed error: %s", e)
+                except Exception as e:
+                    failures += 1
+                    feed_logger.error("Change feed error: %s", e)
+                # Back off before reconnecting, up to 30 seconds
+                self._stop.wait(min(30, 2 ** failures) if failures else 0)
+
+    # State checkpoints
+
+    def _load_state(self, database):
+        return database[self.state_collection].find_one({'_id': self.name}) or {}
+
+    def _save_state(self, database, fields):
+        fields = dict(fields, updated_at=datetime.utcnow())
+        database[self.state_collection].update_one(
+            {'_id': self.name}, {'$set': fields}, upsert=True
+        )
+        self._last_checkpoint = time.monotonic()
+
+    def _checkpoint_due(self):
+        return time.monotonic() - self._last_checkpoint >= self.checkpoint_interval
+
+    # Change streams
+
+    def _follow_stream(self, database):
+        token = self._load_state(database).get('resume_token')
+        if token is None:
+            self._invalidate()
+
+        pipeline = [{'$match': {'ns.coll': {'$in': self.collections}}}]
+        with database.watch(
+            pipeline,
+            full_document='updateLookup',
+            resume_after=token,
+            max_await_time_ms=int(self.poll_interval * 1000)
+        ) as stream:
+            saved_token = token
+            while not self._stop.is_set():
+                change = stream.try_next()
+                if change is not None and change['operationType'] in _INVALIDATING_OPERATIONS:
+                    self._invalidate()
+                elif change is not None:
+                    self.publish({
+                        'collection': change['ns']['coll'],
+                        'operation': change['operationType'],
+                        'document_id': change.get('documentKey', {}).get('_id'),
+                        'document': change.get('fullDocument')
+                    })
+                token = stream.resume_token
+                if token is not None and token != saved_token and (
+                    self._checkpoint_due() or self._stop.is_set()
+                ):
+                    self._save_state(database, {'resume_token': token})
+                    saved_token = token
+                if not stream.alive:
+                    # An invalidated stream cannot be resumed; start afresh
+                    self._save_state(database, {'resume_token': None})
+                    return
+
+            token = stream.resume_token
+            if token is not None and token != saved_token:
+                self._save_state(database, {'resume_token': token})
+
+    # Polling
+
+    def _follow_poll(self, database):
+        positions = self._load_state(database).get('poll_positions') or {}
+        if not positions:
+            self._invalidate()
+
+        for collection in self.collections:
+            # Polling reads in (updated_at, _id) order
+            database[collection].create_index([('updated_at', ASCENDING), ('_id', ASCENDING)])
+            if collection not in positions:
+                latest = database[collection].find_one(
+                    {}, {'updated_at': True}, sort=[('updated_at', -1), ('_id', -1)]
+                )
+                positions[collection] = (
+                    {'updated_at': latest.get('updated_at'), '_id': latest['_id']}
+                    if latest else None
+                )
+
+        dirty = True
+        while not self._stop.is_set():
+            fetched = 0
+            for collection in self.collections:
+                documents, advanced = self._poll(database, collection, positions.get(collection))
+                for document in documents:
+                    self.publish({
+                        'collection': collection,
+                        'operation': (
+                            'insert' if document.get('created_at') == document.get('updated_at')
+                            else 'update'
+                        ),
+                        'document_id': document['_id'],
+                        'document': document
+                    })
+                if advanced:
+                    last = documents[-1]
+                    positions[collection] = {
+                        'updated_at': last.get('updated_at'), '_id': last['_id']
+                    }
+                    fetched = max(fetched, advanced)
+                    dirty = True
+
+            if dirty and self._checkpoint_due():
+                self._save_state(database, {'poll_positions': positions})
+                dirty = False
+
+            # Keep draining while batches come back full
+            if fetched < self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+        if dirty:
+            self._save_state(database, {'poll_positions': positions})
+
+    def _poll(self, database, collection, position):
+        """Fetch the changes to deliver: new ones after the position, and
+        undelivered ones in the re-scanned window behind it.
+
+        Returns:
+            tuple: (changed documents, number of them found after the position).
+                The last document found after the position is the new position.
+        """
+        delivered = self._delivered.setdefault(collection, {})
+        filter_dict = {}
+        late = []
+        if position is not None:
+            updated_at = position['updated_at']
+            filter_dict = {'$or': [
+                {'updated_at': {'$gt': updated_at}},
+                {'updated_at': updated_at, '_id': {'$gt': position['_id']}}
+            ]}
+            if updated_at is not None:
+                window_start = updated_at - self.poll_lag
+                for document_id in [key for key, seen_at in delivered.items() if seen_at < window_start]:
+                    del delivered[document_id]
+                late = [
+                    document for document in database[collection].find(
+                        {'updated_at': {'$gte': window_start, '$lte': updated_at}}
+                    )
+                    if delivered.get(document['_id']) != document['updated_at']
+                ]
+                late.sort(key=lambda document: (document['updated_at'], document['_id']))
+
+        cursor = database[collection].find(filter_dict)
+        cursor = cursor.sort([('updated_at', ASCENDING), ('_id', ASCENDING)]).limit(self.batch_size)
+        documents = list(cursor)
+
+        changes = late + documents
+        for document in changes:
+            if document.get('updated_at') is not None:
+                delivered[document['_id']] = document['updated_at']
+        return changes, len(documents)
+
+
+def init_change_feed(app):
+    """Create the application's change feed and start it if enabled.
+
+    The feed is always available as app.extensions['change_feed'] so
+    listeners can subscribe; it only runs when CHANGE_FEED_ENABLED is set.
+
+    Args:
+        app (Flask): The Flask application instance.
+
+    Returns:
+        ChangeFeed: The change feed.
+    """
+    feed = ChangeFeed(
+        app,
+        [name.strip() for name in app.config.get('CHANGE_FEED_COLLECTIONS', 'products,users').split(',')
+         if name.strip()],
+        name=app.config.get('CHANGE_FEED_NAME', 'default'),
+        mode=app.config.get('CHANGE_FEED_MODE', 'auto'),
+        poll_interval=app.config.get('CHANGE_FEED_POLL_INTERVAL', 1.0),
+        checkpoint_interval=app.config.get('CHANGE_FEED_CHECKPOINT_INTERVAL', 5.0),
+        batch_size=app.config.get('CHANGE_FEED_BATCH_SIZE', 500),
+        state_collection=app.config.get('CHANGE_FEED_STATE_COLLECTION', 'change_feed_state'),
+        poll_lag=app.config.get('CHANGE_FEED_POLL_LAG', 5.0)
+    )
+    app.extensions['change_feed'] = feed
+
+    if app.config.get('CHANGE_FEED_ENABLED', False):
+        feed.start()
+    return feed
@@ -0,0 +1,1433 @@
+# app/models/memory_store.py
+
+"""In-process MongoDB stand-in.
+
+This module provides an in-memory database that implements the subset of the
+pymongo collection API used by the models: filtering with the query operators
+the application relies on, sorting, skip/limit, updates and secondary indexes.
+Hash lookups serve equality filters and sorted indexes serve range filters and
+ordered scans, so common queries do not degrade into linear scans. Writes are
+recorded in a bounded change log that backs Database.watch().
+
+It is selected with DATABASE_BACKEND = 'memory' and is meant for tests,
+benchmarks and local development without a MongoDB server.
+"""
+
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from datetime import datetime
+from itertools import count, groupby
+from operator import itemgetter
+from bson import ObjectId
+from pymongo.collection import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.operations import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.results import (
+    BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+)
+
+# Sentinel for fields that are absent from a document
+_MISSING = object()
+
+# Upper bound used to close index prefix ranges (greater than any type rank)
+_MAX_KEY = (99,)
+
+# Compiled $regex patterns, keyed by (pattern, options)
+_regex_cache = {}
+
+_REGEX_FLAGS = {'i': re.IGNORECASE, 'm': re.MULTILINE, 's': re.DOTALL, 'x': re.VERBOSE}
+
+
+def _type_rank(value):
+    """Get the BSON comparison rank of a value.
+
+    Args:
+        value (Any): The value to rank.
+
+    Returns:
+        int: The rank used to order values of different types.
+    """
+    if value is None or value is _MISSING:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, dict):
+        return 4
+    if isinstance(value, (list, tuple)):
+        return 5
+    if isinstance(value, ObjectId):
+        return 7
+    if isinstance(value, datetime):
+        return 9
+    return 10
+
+
+def _sort_key(value):
+    """Build a totally ordered key for a value, following BSON type order.
+
+    Args:
+        value (Any): The value to convert.
+
+    Returns:
+        tuple: A (rank, comparable value) pair.
+    """
+    rank = _type_rank(value)
+    if rank == 1:
+        return (1, 0)
+    if rank in (4, 5, 10):
+        return (rank, repr(value))
+    return (rank, value)
+
+
+def _clone(value):
+    """Copy a document so callers cannot mutate stored state.
+
+    Args:
+        value (Any): The value to copy.
+
+    Returns:
+        Any: A deep copy of dicts and lists; other values are immutable.
+    """
+    if isinstance(value, dict):
+        return {key: _clone(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_clone(item) for item in value]
+    return value
+
+
+def _get_path(document, path):
+    """Resolve a dotted field path in a document.
+
+    Args:
+        document (dict): The document.
+        path (str): The dotted field path.
+
+    Returns:
+        Any: The value, or _MISSING if the path does not exist.
+    """
+    value = document
+    for part in path.split('.'):
+        if isinstance(value, dict):
+            value = value.get(part, _MISSING)
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return _MISSING
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+
+def _compile_regex(pattern, options=''):
+    """Compile a $regex pattern, caching the result.
+
+    Args:
+        pattern (str or Pattern): The regular expression.
+        options (str, optional): MongoDB regex options. Defaults to ''.
+
+    Returns:
+        Pattern: The compiled regular expression.
+    """
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    key = (pattern, options)
+    compiled = _regex_cache.get(key)
+    if compiled is None:
+        flags = 0
+        for option in options or '':
+            flags |= _REGEX_FLAGS.get(option, 0)
+        compiled = re.compile(pattern, flags)
+        _regex_cache[key] = compiled
+    return compiled
+
+
+def _values_equal(value, expected):
+    """Check MongoDB equality, including array element matching.
+
+    Args:
+        value (Any): The document value (or _MISSING).
+        expected (Any): The value from the query.
+
+    Returns:
+        bool: True if the value matches.
+    """
+    if expected is None:
+        return value is None or value is _MISSING
+    if value is _MISSING:
+        return False
+    if isinstance(expected, re.Pattern):
+        return _regex_matches(value, expected)
+    if isinstance(value, list) and not isinstance(expected, list):
+        return any(_values_equal(item, expected) for item in value)
+    if isinstance(value, bool) != isinstance(expected, bool):
+        return False
+    return value == expected
+
+
+def _regex_matches(value, pattern):
+    """Check a value (or any array element) against a compiled regex."""
+    if isinstance(value, list):
+        return any(isinstance(item, str) and pattern.search(item) for item in value)
+    return isinstance(value, str) and pattern.search(value) is not None
+
+
+def _compare(value, expected, operator):
+    """Evaluate a range comparison between values of the same type class.
+
+    Args:
+        value (Any): The document value.
+        expected (Any): The value from the query.
+        operator (str): One of $gt, $gte, $lt, $lte.
+
+    Returns:
+        bool: True if the comparison holds.
+    """
+    if value is _MISSING:
+        return False
+    if isinstance(value, list):
+        return any(_compare(item, expected, operator) for item in value)
+    if _type_rank(value) != _type_rank(expected):
+        return False
+    if operator == '$gt':
+        return value > expected
+    if operator == '$gte':
+        return value >= expected
+    if operator == '$lt':
+        return value < expected
+    return value <= expected
+
+
+_TYPE_CODES = {
+    1: 'double', 2: 'string', 3: 'object', 4: 'array', 7: 'objectId',
+    8: 'bool', 9: 'date', 10: 'null', 16: 'int', 18: 'long',
+}
+
+
+def _bson_type(value):
+    """Get the BSON type alias of a value."""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return 'int' if -2 ** 31 <= value < 2 ** 31 else 'long'
+    if isinstance(value, float):
+        return 'double'
+    if isinstance(value, str):
+        return 'string'
+    if isinstance(value, dict):
+        return 'object'
+    if isinstance(value, (list, tuple)):
+        return 'array'
+    if isinstance(value, ObjectId):
+        return 'objectId'
+    if isinstance(value, datetime):
+        return 'date'
+    return None
+
+
+def _type_matches(value, expected):
+    """Evaluate $type against a value (or any array element)."""
+    aliases = expected if isinstance(expected, list) else [expected]
+    aliases = {_TYPE_CODES.get(alias, alias) for alias in aliases}
+    if 'number' in aliases:
+        aliases |= {'double', 'int', 'long'}
+    if value is _MISSING:
+        return False
+    if _bson_type(value) in aliases:
+        return True
+    return isinstance(value, list) and any(_bson_type(item) in aliases for item in value)
+
+
+def _match_operators(value, conditions):
+    """Evaluate an operator document such as {'$gte': 1, '$lte': 5}.
+
+    Args:
+        value (Any): The document value (or _MISSING).
+        conditions (dict): The operator document.
+
+    Returns:
+        bool: True if every operator matches.
+
+    Raises:
+        OperationFailure: If an operator is not supported.
+    """
+    for operator, expected in conditions.items():
+        if operator == '$eq':
+            if not _values_equal(value, expected):
+                return False
+        elif operator == '$ne':
+            if _values_equal(value, expected):
+                return False
+        elif operator in ('$gt', '$gte', '$lt', '$lte'):
+            if not _compare(value, expected, operator):
+                return False
+        elif operator == '$in':
+            if not any(_values_equal(value, item) for item in expected):
+                return False
+        elif operator == '$nin':
+            if any(_values_equal(value, item) for item in expected):
+                return False
+        elif operator == '$exists':
+            if (value is not _MISSING) != bool(expected):
+                return False
+        elif operator == '$type':
+            if not _type_matches(value, expected):
+                return False
+        elif operator == '$regex':
+            pattern = _compile_regex(expected, conditions.get('$options', ''))
+            if not _regex_matches(value, pattern):
+                return False
+        elif operator == '$options':
+            continue
+        elif operator == '$not':
+            if _match_condition(value, expected):
+                return False
+        else:
+            raise OperationFailure(f"unknown operator: {operator}")
+    return True
+
+
+def _match_condition(value, condition):
+    """Match a value against a query condition (literal or operator document)."""
+    if isinstance(condition, dict) and condition and next(iter(condition)).startswith('$'):
+        return _match_operators(value, condition)
+    return _values_equal(value, condition)
+
+
+def matches(document, filter_dict):
+    """Check whether a document matches a MongoDB filter.
+
+    Args:
+        document (dict): The document.
+        filter_dict (dict): The MongoDB filter.
+
+    Returns:
+        bool: True if the document matches.
+
+    Raises:
+        OperationFailure: If the filter uses an unsupported operator.
+    """
+    for key, condition in filter_dict.items():
+        if key == '$or':
+            if not any(matches(document, clause) for clause in condition):
+                return False
+        elif key == '$and':
+            if not all(matches(document, clause) for clause in condition):
+                return False
+        elif key == '$nor':
+            if any(matches(document, clause) for clause in condition):
+                return False
+        elif key.startswith('$'):
+            raise OperationFailure(f"unknown top level operator: {key}")
+        elif not _match_condition(_get_path(document, key), condition):
+            return False
+    return True
+
+
+def _set_path(document, path, value):
+    """Set a dotted field path, creating intermediate documents."""
+    parts = path.split('.')
+    target = document
+    for part in parts[:-1]:
+        target = target.setdefault(part, {})
+    target[parts[-1]] = value
+
+
+def _unset_path(document, path):
+    """Remove a dotted field path if it exists."""
+    parts = path.split('.')
+    target = document
+    for part in parts[:-1]:
+        target = target.get(part)
+        if not isinstance(target, dict):
+            return
+    target.pop(parts[-1], None)
+
+
+def apply_update(document, update, inserting=False):
+    """Apply a MongoDB update document in place.
+
+    Args:
+        document (dict): The document to modify.
+        update (dict): The update operators.
+        inserting (bool, optional): Whether the document is being upserted,
+            which enables $setOnInsert. Defaults to False.
+
+    Raises:
+        ValueError: If the update is not an operator document.
+        OperationFailure: If an operator is not supported or invalid.
+    """
+    if not update or not all(key.startswith('$') for key in update):
+        raise ValueError('update only works with $ operators')
+
+    for operator, fields in update.items():
+        if operator == '$set':
+            for path, value in fields.items():
+                _set_path(document, path, _clone(value))
+        elif operator == '$setOnInsert':
+            if inserting:
+                for path, value in fields.items():
+                    _set_path(document, path, _clone(value))
+        elif operator == '$unset':
+            for path in fields:
+                _unset_path(document, path)
+        elif operator == '$inc':
+            for path, amount in fields.items():
+                current = _get_path(document, path)
+                if current is _MISSING:
+                    current = 0
+                elif not isinstance(current, (int, float)) or isinstance(current, bool):
+                    raise OperationFailure(f"Cannot apply $inc to a non-numeric value at '{path}'")
+                _set_path(document, path, current + amount)
+        else:
+            raise OperationFailure(f"Unknown modifier: {operator}")
+
+
+def _project(document, projection):
+    """Apply an inclusion or exclusion projection to a document copy."""
+    if not projection:
+        return _clone(document)
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+
+    include_id = projection.get('_id', 1)
+    fields = {key: value for key, value in projection.items() if key != '_id'}
+
+    if fields and all(fields.values()):
+        result = {}
+        if include_id and '_id' in document:
+            result['_id'] = document['_id']
+        for path in fields:
+            value = _get_path(document, path)
+            if value is not _MISSING:
+                _set_path(result, path, _clone(value))
+        return result
+
+    result = _clone(document)
+    for path in fields:
+        _unset_path(result, path)
+    if not include_id:
+        result.pop('_id', None)
+    return result
+
+
+def _truthy(value):
+    """Apply aggregation truthiness: null, missing, false and zero are false."""
+    if value is None or value is _MISSING or value is False:
+        return False
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value != 0
+    return True
+
+
+_EXPRESSION_COMPARISONS = {
+    '$eq': lambda left, right: left == right,
+    '$ne': lambda left, right: left != right,
+    '$gt': lambda left, right: left > right,
+    '$gte': lambda left, right: left >= right,
+    '$lt': lambda left, right: left < right,
+    '$lte': lambda left, right: left <= right,
+}
+
+
+def _evaluate(expression, document):
+    """Evaluate an aggregation expression against a document.
+
+    Supports field paths, literals, comparison operators, $and, $or, $not,
+    $ifNull, $cond, $switch and $literal.
+
+    Raises:
+        OperationFailure: If the expression uses an unsupported operator.
+    """
+    if isinstance(expression, str) and expression.startswith('$'):
+        value = _get_path(document, expression[1:])
+        return None if value is _MISSING else value
+    if isinstance(expression, list):
+        return [_evaluate(item, document) for item in expression]
+    if not isinstance(expression, dict):
+        return expression
+    if len(expression) != 1 or not next(iter(expression)).startswith('$'):
+        return {key: _evaluate(value, document) for key, value in expression.items()}
+
+    operator, args = next(iter(expression.items()))
+    if operator == '$literal':
+        return args
+    if operator in _EXPRESSION_COMPARISONS:
+        left, right = (_sort_key(_evaluate(arg, document)) for arg in args)
+        return _EXPRESSION_COMPARISONS[operator](left, right)
+    if operator == '$and':
+        return all(_truthy(_evaluate(arg, document)) for arg in args)
+    if operator == '$or':
+        return any(_truthy(_evaluate(arg, document)) for arg in args)
+    if operator == '$not':
+        return not _truthy(_evaluate(args[0] if isinstance(args, list) else args, document))
+    if operator == '$ifNull':
+        for arg in args:
+            value = _evaluate(arg, document)
+            if value is not None:
+                return value
+        return None
+    if operator == '$cond':
+        if isinstance(args, dict):
+            args = [args['if'], args['then'], args['else']]
+        return _evaluate(args[1] if _truthy(_evaluate(args[0], document)) else args[2], document)
+    if operator == '$switch':
+        for branch in args['branches']:
+            if _truthy(_evaluate(branch['case'], document)):
+                return _evaluate(branch['then'], document)
+        if 'default' not in args:
+            raise OperationFailure('$switch could not find a matching branch')
+        return _evaluate(args['default'], document)
+    raise OperationFailure(f"Unsupported expression operator: {operator}")
+
+
+def _accumulate(groups, key, accumulators, document):
+    """Fold a document into its $group accumulator state."""
+    group = groups.get(key)
+    if group is None:
+        group = groups[key] = {}
+    for field, spec in accumulators.items():
+        operator, expression = next(iter(spec.items()))
+        value = _evaluate(expression, document)
+        if operator == '$sum':
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                group[field] = group.get(field, 0) + value
+            else:
+                group.setdefault(field, 0)
+        elif operator == '$avg':
+            total, count_ = group.get(field, (0, 0))
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                total, count_ = total + value, count_ + 1
+            group[field] = (total, count_)
+        elif operator in ('$min', '$max'):
+            if value is not None:
+                current = group.get(field)
+                if current is None or (
+                    _sort_key(value) < _sort_key(current) if operator == '$min'
+                    else _sort_key(value) > _sort_key(current)
+                ):
+                    group[field] = value
+        elif operator == '$first':
+            group.setdefault(field, value)
+        elif operator == '$last':
+            group[field] = value
+        elif operator == '$push':
+            group.setdefault(field, []).append(value)
+        else:
+            raise OperationFailure(f"Unsupported accumulator: {operator}")
+
+
+def _group(documents, spec):
+    """Run a $group stage."""
+    accumulators = {field: value for field, value in spec.items() if field != '_id'}
+    groups = {}
+    keys = {}
+    for document in documents:
+        key = _evaluate(spec['_id'], document)
+        hashable = repr(_sort_key(key))
+        keys.setdefault(hashable, key)
+        _accumulate(groups, hashable, accumulators, document)
+
+    results = []
+    for hashable, group in groups.items():
+        result = {'_id': keys[hashable]}
+        for field, spec_value in accumulators.items():
+            operator = next(iter(spec_value))
+            value = group.get(field)
+            if operator == '$avg':
+                total, count_ = value or (0, 0)
+                value = total / count_ if count_ else None
+            result[field] = value
+        results.append(result)
+    return results
+
+
+def _normalize_sort(key_or_list, direction=None):
+    """Normalize pymongo sort arguments to a list of (field, direction)."""
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    return [(field, value) for field, value in key_or_list]
+
+
+def _sort_documents(documents, sort):
+    """Sort documents in place following MongoDB ordering."""
+    # Apply keys from least to most significant; Python's sort is stable
+    for field, direction in reversed(sort):
+        documents.sort(
+            key=lambda document: _sort_key(_get_path(document, field)),
+            reverse=direction < 0
+        )
+
+
+def _index_value(document, field):
+    """Get an indexable, hashable value for a field."""
+    value = _get_path(document, field)
+    if value is _MISSING:
+        return None
+    if isinstance(value, list):
+        return tuple(value)
+    if isinstance(value, dict):
+        return repr(value)
+    return value
+
+
+class _Index:
+    """Secondary index over one or more fields.
+
+    Every index keeps a hash map from its leading field's value to document
+    IDs for equality lookups. Ascending/descending indexes also keep a sorted
+    list of entries for range lookups and ordered scans.
+    """
+
+    def __init__(self, name, keys, unique=False, partial_filter=None):
+        self.name = name
+        self.keys = keys
+        self.fields = [field for field, _ in keys]
+        self.unique = unique
+        self.partial_filter = partial_filter
+        self.sorted = all(direction in (1, -1) for _, direction in keys)
+        self.multikey = False
+        self.entries = {}  # _id -> (raw key, sort key)
+        self.by_leading = {}  # leading value -> set of _ids
+        self.unique_keys = {}  # raw key -> _id
+        self.ordered = []  # sorted (sort key, seq, _id)
+
+    def covers(self, document):
+        """Check whether a document belongs in this (possibly partial) index."""
+        return self.partial_filter is None or matches(document, self.partial_filter)
+
+    def key_for(self, document):
+        """Build the raw and sortable keys of a document."""
+        raw = tuple(_index_value(document, field) for field in self.fields)
+        sort_key = tuple(_sort_key(_get_path(document, field)) for field in self.fields)
+        return raw, sort_key
+
+    def check_unique(self, document, doc_id):
+        """Raise DuplicateKeyError if the document would violate uniqueness."""
+        if not self.unique or not self.covers(document):
+            return
+        raw, _ = self.key_for(document)
+        existing = self.unique_keys.get(raw)
+        if existing is not None and existing != doc_id:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error index: {self.name} dup key: {raw}"
+            )
+
+    def add(self, document, doc_id, seq):
+        if not self.covers(document):
+            return
+        raw, sort_key = self.key_for(document)
+        if any(isinstance(_get_path(document, field), list) for field in self.fields):
+            self.multikey = True
+        self.entries[doc_id] = (raw, sort_key, seq)
+        self.by_leading.setdefault(raw[0], set()).add(doc_id)
+        if self.unique:
+            self.unique_keys[raw] = doc_id
+        if self.sorted:
+            insort(self.ordered, (sort_key, seq, doc_id))
+
+    def remove(self, doc_id):
+        entry = self.entries.pop(doc_id, None)
+        if entry is None:
+            return
+        raw, sort_key, seq = entry
+        bucket = self.by_leading.get(raw[0])
+        if bucket is not None:
+            bucket.discard(doc_id)
+            if not bucket:
+                del self.by_leading[raw[0]]
+        if self.unique and self.unique_keys.get(raw) == doc_id:
+            del self.unique_keys[raw]
+        if self.sorted:
+            position = bisect_left(self.ordered, (sort_key, seq, doc_id))
+            if position < len(self.ordered) and self.ordered[position][2] == doc_id:
+                del self.ordered[position]
+
+    def usable_for(self, filter_dict):
+        """Check whether a partial index may serve a query."""
+        if self.partial_filter is None:
+            return True
+        return all(filter_dict.get(key) == value for key, value in self.partial_filter.items())
+
+
+def _equality_value(condition):
+    """Get the scalar value of an equality condition, or _MISSING."""
+    if isinstance(condition, dict):
+        if len(condition) == 1 and '$eq' in condition:
+            condition = condition['$eq']
+        else:
+            return _MISSING
+    if isinstance(condition, (dict, list, re.Pattern)) or condition is None:
+        return _MISSING
+    return condition
+
+
+class MemoryCursor:
+    """Lazy cursor supporting sort, skip and limit, like pymongo's Cursor."""
+
+    def __init__(self, collection, filter_dict, projection=None, sort=None, skip=0, limit=0):
+        self._collection = collection
+        self._filter = filter_dict or {}
+        self._projection = projection
+        self._sort = sort
+        self._skip = skip
+        self._limit = limit
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _normalize_sort(key_or_list, direction)
+        return self
+
+    def skip(self, skip):
+        self._skip = skip
+        return self
+
+    def limit(self, limit):
+        self._limit = limit
+        return self
+
+    def batch_size(self, batch_size):
+        return self
+
+    def __iter__(self):
+        documents = self._collection._execute(self._filter, self._sort, self._skip, self._limit)
+        return iter([_project(document, self._projection) for document in documents])
+
+
+class MemoryCollection:
+    """In-memory collection implementing the pymongo API used by the models."""
+
+    def __init__(self, name, database=None):
+        self.name = name
+        self.database = database
+        self._documents = {}  # _id -> document, in insertion order
+        self._sequence = {}  # _id -> insertion sequence
+        self._counter = count()
+        self._indexes = {}
+        self._lock = threading.RLock()
+
+    # Index management
+
+    def create_index(self, keys, unique=False, name=None, partialFilterExpression=None, **kwargs):
+        """Create a secondary index.
+
+        Args:
+            keys (str or list): Field name or list of (field, direction) pairs.
+            unique (bool, optional): Enforce uniqueness. Defaults to False.
+            name (str, optional): Index name. Defaults to a generated name.
+            partialFilterExpression (dict, optional): Only index matching documents.
+            **kwargs: Other pymongo index options, accepted and ignored.
+
+        Returns:
+            str: The index name.
+        """
+        keys = _normalize_sort(keys, 1)
+        name = name or '_'.join(f"{field}_{direction}" for field, direction in keys)
+        with self._lock:
+            if name in self._indexes:
+                return name
+            index = _Index(name, keys, unique, partialFilterExpression)
+            for doc_id, document in self._documents.items():
+                index.check_unique(document, doc_id)
+                index.add(document, doc_id, self._sequence[doc_id])
+            self._indexes[name] = index
+        return name
+
+    def index_information(self):
+        """Describe the collection's indexes, like pymongo."""
+        information = {'_id_': {'key': [('_id', 1)]}}
+        for name, index in self._indexes.items():
+            information[name] = {'key': list(index.keys), 'unique': index.unique}
+            if index.partial_filter is not None:
+                information[name]['partialFilterExpression'] = index.partial_filter
+        return information
+
+    def drop_indexes(self):
+        with self._lock:
+            self._indexes.clear()
+
+    # Query planning
+
+    def _candidate_ids(self, filter_dict):
+        """Narrow the documents a filter can match using indexes.
+
+        Returns:
+            list or None: Candidate IDs in insertion order, or None for a full scan.
+        """
+        if '_id' in filter_dict:
+            condition = filter_dict['_id']
+            if isinstance(condition, dict) and set(condition) == {'$in'}:
+                ids = [doc_id for doc_id in condition['$in'] if doc_id in self._documents]
+                return sorted(set(ids), key=self._sequence.__getitem__)
+            value = _equality_value(condition)
+            if value is not _MISSING:
+                return [value] if value in self._documents else []
+
+        best = None
+        for field, condition in filter_dict.items():
+            if field.startswith('$'):
+                continue
+            for index in self._indexes.values():
+                if index.fields[0] != field or index.multikey or not index.usable_for(filter_dict):
+                    continue
+                ids = self._lookup(index, condition)
+                if ids is not None and (best is None or len(ids) < len(best)):
+                    best = ids
+                break
+
+        if best is None:
+            # A partial index whose filter the query repeats still narrows
+            # the scan to the documents it covers
+            for index in self._indexes.values():
+                if index.partial_filter is not None and index.usable_for(filter_dict):
+                    if best is None or len(index.entries) < len(best):
+                        best = index.entries.keys()
+        if best is None:
+            return None
+        return sorted(best, key=self._sequence.__getitem__)
+
+    @staticmethod
+    def _lookup(index, condition):
+        """Resolve a condition on an index's leading field to a set of IDs."""
+        value = _equality_value(condition)
+        if value is not _MISSING:
+            return index.by_leading.get(value, set())
+
+        if not isinstance(condition, dict):
+            return None
+
+        if set(condition) == {'$in'}:
+            ids = set()
+            for item in condition['$in']:
+                if item is None or isinstance(item, (dict, list, re.Pattern)):
+                    return None
+                ids |= index.by_leading.get(item, set())
+            return ids
+
+        bounds = {op: value for op, value in condition.items() if op in ('$gt', '$gte', '$lt', '$lte')}
+        if not index.sorted or not bounds or len(bounds) != len(condition):
+            return None
+
+        ordered = index.ordered
+        low, high = 0, len(ordered)
+        for operator, value in bounds.items():
+            key = _sort_key(value)
+            if operator == '$gte':
+                low = max(low, bisect_left(ordered, ((key,),)))
+            elif operator == '$gt':
+                low = max(low, bisect_left(ordered, ((key, _MAX_KEY),)))
+            elif operator == '$lt':
+                high = min(high, bisect_left(ordered, ((key,),)))
+            else:
+                high = min(high, bisect_left(ordered, ((key, _MAX_KEY),)))
+        # Range bounds only apply to values of the same type, as in MongoDB
+        rank = _type_rank(next(iter(bounds.values())))
+        return {
+            doc_id for sort_key, _, doc_id in ordered[low:high] if sort_key[0][0] == rank
+        }
+
+    def _ordered_scan(self, filter_dict, sort):
+        """Find an index that yields documents already in sort order.
+
+        The index must start with fields the filter pins to a single value,
+        followed by the sort fields, and every sort key must use the same
+        direction.
+
+        Returns:
+            tuple or None: An iterator over IDs in sort order and the part of
+                the filter the index does not already guarantee, or None if no
+                index applies.
+        """
+        equalities = {}
+        for field, condition in filter_dict.items():
+            if not field.startswith('$'):
+                value = _equality_value(condition)
+                if value is not _MISSING:
+                    equalities[field] = value
+
+        best = None
+        for index in self._indexes.values():
+            if not index.sorted or index.multikey or not index.usable_for(filter_dict):
+                continue
+            prefix = 0
+            while prefix < len(index.fields) and index.fields[prefix] in equalities:
+                prefix += 1
+            tail = index.fields[prefix:prefix + len(sort)]
+            if tail != [field for field, _ in sort]:
+                continue
+            # Entries are stored in ascending order, so one scan direction
+            # must serve every sort key
+            directions = {direction for _, direction in sort}
+            if len(directions) != 1:
+                continue
+            if best is None or prefix > best[1]:
+                best = (index, prefix, directions == {-1})
+
+        if best is None:
+            return None
+
+        index, prefix, reverse = best
+        key_prefix = tuple(_sort_key(equalities[field]) for field in index.fields[:prefix])
+        ordered = index.ordered
+        low = bisect_left(ordered, (key_prefix,))
+        high = bisect_left(ordered, (key_prefix + (_MAX_KEY,),))
+        entries = ordered[low:high]
+        if reverse:
+            entries = reversed(entries)
+        # Documents tied on the sort keys come in insertion order, as they do
+        # from an in-memory sort, whether or not the index has more fields
+        width = prefix + len(sort)
+        tied = groupby(entries, key=lambda entry: entry[0][:width])
+        ids = (doc_id for _, group in tied for _, _, doc_id in sorted(group, key=itemgetter(1)))
+        # Every entry of a partial index satisfies its filter already
+        residual = filter_dict
+        if index.partial_filter is not None:
+            residual = {
+                field: condition for field, condition in filter_dict.items()
+                if field not in index.partial_filter
+            }
+        return ids, residual
+
+    def _execute(self, filter_dict, sort=None, skip=0, limit=0):
+        """Run a query and return the matching stored documents."""
+        with self._lock:
+            if sort:
+                scan = self._ordered_scan(filter_dict, sort)
+                if scan is not None:
+                    ordered_ids, residual = scan
+                    results = []
+                    wanted = skip + limit if limit else None
+                    for doc_id in ordered_ids:
+                        document = self._documents[doc_id]
+                        if not residual or matches(document, residual):
+                            results.append(document)
+                            if wanted is not None and len(results) >= wanted:
+                                break
+                    return results[skip:]
+
+            candidate_ids = self._candidate_ids(filter_dict)
+            if candidate_ids is None:
+                documents = self._documents.values()
+            else:
+                documents = [self._documents[doc_id] for doc_id in candidate_ids]
+
+            if not sort:
+                results = []
+                wanted = skip + limit if limit else None
+                for document in documents:
+                    if matches(document, filter_dict):
+                        results.append(document)
+                        if wanted is not None and len(results) >= wanted:
+                            break
+                return results[skip:]
+
+            results = [document for document in documents if matches(document, filter_dict)]
+            _sort_documents(results, sort)
+            if limit:
+                return results[skip:skip + limit]
+            return results[skip:]
+
+    # Index maintenance
+
+    def _store(self, document):
+        doc_id = document['_id']
+        for index in self._indexes.values():
+            index.check_unique(document, doc_id)
+        seq = self._sequence.get(doc_id)
+        operation = 'replace'
+        if seq is None:
+            seq = next(self._counter)
+            self._sequence[doc_id] = seq
+            operation = 'insert'
+        else:
+            for index in self._indexes.values():
+                index.remove(doc_id)
+        self._documents[doc_id] = document
+        for index in self._indexes.values():
+            index.add(document, doc_id, seq)
+        self._record_change(operation, doc_id, document)
+
+    def _discard(self, doc_id):
+        for index in self._indexes.values():
+            index.remove(doc_id)
+        del self._documents[doc_id]
+        del self._sequence[doc_id]
+        self._record_change('delete', doc_id, None)
+
+    def _replace(self, doc_id, updated):
+        """Store an updated document, keeping indexes consistent on failure."""
+        original = self._documents[doc_id]
+        for index in self._indexes.values():
+            index.check_unique(updated, doc_id)
+        for index in self._indexes.values():
+            index.remove(doc_id)
+        self._documents[doc_id] = updated
+        seq = self._sequence[doc_id]
+        for index in self._indexes.values():
+            index.add(updated, doc_id, seq)
+        self._record_change('update', doc_id, updated)
+        return original
+
+    def _record_change(self, operation, doc_id, document):
+        if self.database is not None:
+            self.database._record_change(self.name, operation, doc_id, document)
+
+    # Reads
+
+    def find(self, filter=None, projection=None, sort=None, skip=0, limit=0, **kwargs):
+        """Query the collection.
+
+        Returns:
+            MemoryCursor: A lazy cursor over the matching documents.
+        """
+        return MemoryCursor(
+            self, filter, projection, _normalize_sort(sort) if sort else None, skip, limit
+        )
+
+    def find_one(self, filter=None, projection=None, sort=None, **kwargs):
+        """Get a single matching document, or None."""
+        if filter is not None and not isinstance(filter, dict):
+            filter = {'_id': filter}
+        documents = self._execute(filter or {}, _normalize_sort(sort) if sort else None, 0, 1)
+        return _project(documents[0], projection) if documents else None
+
+    def count_documents(self, filter, skip=0, limit=0, **kwargs):
+        """Count matching documents."""
+        with self._lock:
+            if not filter and not skip and not limit:
+                return len(self._documents)
+            if not skip and not limit:
+                # A query that is exactly a partial index's filter counts its entries
+                for index in self._indexes.values():
+                    if index.partial_filter == filter:
+                        return len(index.entries)
+            candidate_ids = self._candidate_ids(filter)
+            if candidate_ids is None:
+                documents = self._documents.values()
+            else:
+                documents = [self._documents[doc_id] for doc_id in candidate_ids]
+            total = sum(1 for document in documents if matches(document, filter))
+        total = max(0, total - skip)
+        return min(total, limit) if limit else total
+
+    def estimated_document_count(self, **kwargs):
+        return len(self._documents)
+
+    # Writes
+
+    def insert_one(self, document, **kwargs):
+        """Insert a document, assigning an ObjectId if needed.
+
+        Raises:
+            DuplicateKeyError: If the _id or a unique index key already exists.
+        """
+        if '_id' not in document:
+            document['_id'] = ObjectId()
+        stored = _clone(document)
+        with self._lock:
+            if stored['_id'] in self._documents:
+                raise DuplicateKeyError(f"E11000 duplicate key error _id: {stored['_id']}")
+            self._store(stored)
+        return InsertOneResult(stored['_id'], True)
+
+    def insert_many(self, documents, ordered=True, **kwargs):
+        """Insert several documents.
+
+        Raises:
+            DuplicateKeyError: If a key already exists (remaining documents are
+                skipped when ordered, inserted otherwise).
+        """
+        inserted_ids = []
+        error = None
+        for document in documents:
+            try:
+                inserted_ids.append(self.insert_one(document).inserted_id)
+            except DuplicateKeyError as e:
+                error = e
+                if ordered:
+                    break
+        if error is not None:
+            raise error
+        return InsertManyResult(inserted_ids, True)
+
+    def _upsert_document(self, filter_dict, update):
+        document = {}
+        for field, condition in filter_dict.items():
+            if not field.startswith('$'):
+                value = _equality_value(condition)
+                if value is not _MISSING:
+                    _set_path(document, field, value)
+        apply_update(document, update, inserting=True)
+        if '_id' not in document:
+            document['_id'] = ObjectId()
+        elif document['_id'] in self._documents:
+            # The filter named an existing _id that did not match the rest of it
+            raise DuplicateKeyError(f"E11000 duplicate key error _id: {document['_id']}")
+        return document
+
+    def update_one(self, filter, update, upsert=False, **kwargs):
+        """Update the first matching document."""
+        return self._update(filter, update, upsert, many=False)
+
+    def update_many(self, filter, update, upsert=False, **kwargs):
+        """Update every matching document."""
+        return self._update(filter, update, upsert, many=True)
+
+    def _update(self, filter_dict, update, upsert, many):
+        with self._lock:
+            targets = self._execute(filter_dict, None, 0, 0 if many else 1)
+            modified = 0
+            for document in targets:
+                updated = _clone(document)
+                apply_update(updated, update)
+                if updated != document:
+                    self._replace(document['_id'], updated)
+                    modified += 1
+
+            if not targets and upsert:
+                document = self._upsert_document(filter_dict, update)
+                self._store(document)
+                return UpdateResult(
+                    {'n': 1, 'nModified': 0, 'upserted': document['_id']}, True
+                )
+
+        return UpdateResult({'n': len(targets), 'nModified': modified}, True)
+
+    def replace_one(self, filter, replacement, upsert=False, **kwargs):
+        """Replace the first matching document, keeping its _id."""
+        return self._replace_one(filter, replacement, upsert)
+
+    def _replace_one(self, filter_dict, replacement, upsert):
+        with self._lock:
+            targets = self._execute(filter_dict, None, 0, 1)
+            if targets:
+                document = _clone(replacement)
+                document['_id'] = targets[0]['_id']
+                modified = document != targets[0]
+                if modified:
+                    self._store(document)
+                return UpdateResult({'n': 1, 'nModified': int(modified)}, True)
+            if not upsert:
+                return UpdateResult({'n': 0, 'nModified': 0}, True)
+
+            document = _clone(replacement)
+            if '_id' not in document:
+                value = _equality_value(filter_dict.get('_id', {'$exists': True}))
+                document['_id'] = ObjectId() if value is _MISSING else value
+            if document['_id'] in self._documents:
+                raise DuplicateKeyError(f"E11000 duplicate key error _id: {document['_id']}")
+            self._store(document)
+            return UpdateResult({'n': 1, 'nModified': 0, 'upserted': document['_id']}, True)
+
+    def find_one_and_update(self, filter, update, projection=None, sort=None,
+                            return_document=ReturnDocument.BEFORE, upsert=False, **kwargs):
+        """Atomically update one document and return it."""
+        with self._lock:
+            targets = self._execute(filter, _normalize_sort(sort) if sort else None, 0, 1)
+            if not targets:
+                if not upsert:
+                    return None
+                document = self._upsert_document(filter, update)
+                self._store(document)
+                return _project(document, projection) if return_document else None
+
+            original = targets[0]
+            updated = _clone(original)
+            apply_update(updated, update)
+            if updated != original:
+                self._replace(original['_id'], updated)
+            result = updated if return_document else original
+            return _project(result, projection)
+
+    def bulk_write(self, requests, ordered=True, **kwargs):
+        """Execute a batch of write operations.
+
+        Supports InsertOne, ReplaceOne, UpdateOne, UpdateMany, DeleteOne and
+        DeleteMany.
+        The whole batch runs under the collection lock.
+
+        Raises:
+            BulkWriteError: If an operation fails. Ordered batches stop at the
+                first failure; unordered batches run every operation. The
+                error details carry the failing indexes and partial counts.
+        """
+        result = {
+            'nInserted': 0, 'nUpserted': 0, 'nMatched': 0, 'nModified': 0,
+            'nRemoved': 0, 'upserted': [], 'writeErrors': []
+        }
+        with self._lock:
+            for index, operation in enumerate(requests):
+                try:
+                    self._bulk_operation(operation, index, result)
+                except DuplicateKeyError as e:
+                    result['writeErrors'].append({
+                        'index': index, 'code': 11000, 'errmsg': str(e), 'op': operation
+                    })
+                    if ordered:
+                        break
+
+        if result['writeErrors']:
+            raise BulkWriteError(result)
+        del result['writeErrors']
+        return BulkWriteResult(result, True)
+
+    def _bulk_operation(self, operation, index, result):
+        if isinstance(operation, InsertOne):
+            self.insert_one(operation._doc)
+            result['nInserted'] += 1
+        elif isinstance(operation, (UpdateOne, UpdateMany)):
+            outcome = self._update(
+                operation._filter, operation._doc, operation._upsert,
+                many=isinstance(operation, UpdateMany)
+            )
+            if outcome.upserted_id is not None:
+                result['nUpserted'] += 1
+                result['upserted'].append({'index': index, '_id': outcome.upserted_id})
+            else:
+                result['nMatched'] += outcome.matched_count
+                result['nModified'] += outcome.modified_count
+        elif isinstance(operation, ReplaceOne):
+            outcome = self._replace_one(operation._filter, operation._doc, operation._upsert)
+            if outcome.upserted_id is not None:
+                result['nUpserted'] += 1
+                result['upserted'].append({'index': index, '_id': outcome.upserted_id})
+            else:
+                result['nMatched'] += outcome.matched_count
+                result['nModified'] += outcome.modified_count
+        elif isinstance(operation, (DeleteOne, DeleteMany)):
+            if isinstance(operation, DeleteOne):
+                outcome = self.delete_one(operation._filter)
+            else:
+                outcome = self.delete_many(operation._filter)
+            result['nRemoved'] += outcome.deleted_count
+        else:
+            raise OperationFailure(f"Unsupported bulk operation: {type(operation).__name__}")
+
+    def aggregate(self, pipeline, **kwargs):
+        """Run an aggregation pipeline.
+
+        Supports the $match, $group, $sort, $skip, $limit, $project and
+        $count stages. A leading $match uses the collection's indexes.
+
+        Returns:
+            iterator: The resulting documents.
+
+        Raises:
+            OperationFailure: If a stage or operator is not supported.
+        """
+        pipeline = list(pipeline)
+        with self._lock:
+            if pipeline and '$match' in pipeline[0]:
+                documents = [_clone(document) for document in self._execute(pipeline.pop(0)['$match'])]
+            else:
+                documents = [_clone(document) for document in self._documents.values()]
+
+        for stage in pipeline:
+            (name, spec), = stage.items()
+            if name == '$match':
+                documents = [document for document in documents if matches(document, spec)]
+            elif name == '$group':
+                documents = _group(documents, spec)
+            elif name == '$sort':
+                _sort_documents(documents, list(spec.items()))
+            elif name == '$skip':
+                documents = documents[spec:]
+            elif name == '$limit':
+                documents = documents[:spec]
+            elif name == '$project':
+                documents = [_project(document, spec) for document in documents]
+            elif name == '$count':
+                documents = [{spec: len(documents)}] if documents else []
+            else:
+                raise OperationFailure(f"Unsupported pipeline stage: {name}")
+        return iter(documents)
+
+    def find_one_and_delete(self, filter, projection=None, sort=None, **kwargs):
+        """Atomically delete one document and return it."""
+        with self._lock:
+            targets = self._execute(filter, _normalize_sort(sort) if sort else None, 0, 1)
+            if not targets:
+                return None
+            self._discard(targets[0]['_id'])
+        return _project(targets[0], projection)
+
+    def delete_one(self, filter, **kwargs):
+        """Delete the first matching document."""
+        with self._lock:
+            targets = self._execute(filter, None, 0, 1)
+            for document in targets:
+                self._discard(document['_id'])
+        return DeleteResult({'n': len(targets)}, True)
+
+    def delete_many(self, filter, **kwargs):
+        """Delete every matching document."""
+        with self._lock:
+            targets = self._execute(filter, None, 0, 0)
+            for document in targets:
+                self._discard(document['_id'])
+        return DeleteResult({'n': len(targets)}, True)
+
+    def drop(self):
+        """Remove every document and index."""
+        with self._lock:
+            self._documents.clear()
+            self._sequence.clear()
+            self._indexes.clear()
+
+
+class MemoryChangeStream:
+    """Change stream over a MemoryDatabase's change log.
+
+    Mirrors the parts of pymongo's ChangeStream the change feed uses:
+    try_next(), resume_token, close() and use as a context manager. Only
+    $match pipeline stages are supported.
+    """
+
+    def __init__(self, database, pipeline=None, full_document=None, resume_after=None,
+                 max_await_time_ms=None):
+        self._database = database
+        self._filters = []
+        for stage in pipeline or []:
+            if set(stage) != {'$match'}:
+                raise OperationFailure(f"Unsupported change stream stage: {list(stage)}")
+            self._filters.append(stage['$match'])
+        self._full_document = full_document
+        self._max_await = (max_await_time_ms if max_await_time_ms is not None else 1000) / 1000.0
+        self._closed = False
+        if resume_after is not None:
+            self._position = int(resume_after['_data'])
+        else:
+            self._position = database._last_change_seq()
+
+    @property
+    def resume_token(self):
+        """The token to resume the stream after the last change it returned."""
+        return {'_data': str(self._position)}
+
+    @property
+    def alive(self):
+        return not self._closed
+
+    def _next_change(self):
+        changes = self._database._changes
+        while True:
+            if not changes or self._position >= changes[-1][0]:
+                return None
+            first_seq = changes[0][0]
+            if self._position < first_seq - 1:
+                raise OperationFailure(
+                    'Resume point is no longer in the change log', code=286
+                )
+            seq, change = changes[self._position - first_seq + 1]
+            self._position = seq
+            if all(matches(change, match) for match in self._filters):
+                return self._render(change)
+
+    def _render(self, change):
+        event = dict(change, _id={'_data': str(self._position)})
+        document = event.pop('fullDocument', None)
+        if document is not None and (
+            change['operationType'] != 'update' or self._full_document == 'updateLookup'
+        ):
+            event['fullDocument'] = _clone(document)
+        return event
+
+    def try_next(self):
+        """Get the next change, waiting up to max_await_time_ms for one.
+
+        Returns:
+            dict or None: The next change document, or None if none arrived.
+
+        Raises:
+            OperationFailure: If the stream fell behind the bounded change log.
+        """
+        condition = self._database._change_condition
+        deadline = time.monotonic() + self._max_await
+        with condition:
+            while not self._closed:
+                change = self._next_change()
+                if change is not None:
+                    return change
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                condition.wait(remaining)
+        return None
+
+    def close(self):
+        self._closed = True
+        with self._database._change_condition:
+            self._database._change_condition.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MemoryDatabase:
+    """In-memory database holding MemoryCollection instances by name."""
+
+    def __init__(self, name='memory', change_log_size=10000):
+        self.name = name
+        self._collections = {}
+        self._lock = threading.Lock()
+        # Bounded change log backing watch(), as (sequence, change) pairs
+        self._changes = deque(maxlen=change_log_size)
+        self._change_counter = count(1)
+        self._change_condition = threading.Condition()
+
+    def __getitem__(self, name):
+        collection = self._collections.get(name)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.get(name)
+                if collection is None:
+                    collection = MemoryCollection(name, self)
+                    self._collections[name] = collection
+        return collection
+
+    def get_collection(self, name, **options):
+        """Get a collection; pymongo read/write options are accepted and ignored."""
+        return self[name]
+
+    def list_collection_names(self):
+        return list(self._collections)
+
+    def drop_collection(self, name):
+        with self._lock:
+            self._collections.pop(name, None)
+
+    def watch(self, pipeline=None, full_document=None, resume_after=None, start_after=None,
+              max_await_time_ms=None, **kwargs):
+        """Open a change stream over every collection in the database.
+
+        Returns:
+            MemoryChangeStream: The change stream.
+        """
+        return MemoryChangeStream(
+            self, pipeline, full_document, resume_after or start_after, max_await_time_ms
+        )
+
+    def _last_change_seq(self):
+        with self._change_condition:
+            return self._changes[-1][0] if self._changes else 0
+
+    def _record_change(self, collection_name, operation, doc_id, document):
+        change = {
+            'operationType': operation,
+            'ns': {'db': self.name, 'coll': collection_name},
+            'documentKey': {'_id': doc_id},
+            'fullDocument': document
+        }
+        with self._change_condition:
+            self._changes.append((next(self._change_counter), change))
+            self._change_condition.notify_all()
@@ -6,8 +6,37 @@ This module defines the Product model which represents a product in the system
 and provides methods for product-related operations.
 """
 
+from datetime import datetime
+from bson import ObjectId
 from marshmallow import Schema, fields, validate, pre_load, post_dump, ValidationError
-from app.models.base_model import BaseModel, BaseSchema
+from pymongo import DeleteOne, ReadPreference, UpdateOne
+from pymongo.collection import ReturnDocument
+from pymongo.errors import BulkWriteError
+from pymongo.read_preferences import SecondaryPreferred
+from app.models.base_model import BaseModel, BaseSchema, DELETED_INDEX, live_index, to_object_id
+from app.models.causal_sessions import current_session
+from app.models.query_compiler import FilterField
+
+
+class InventoryError(Exception):
+    """Raised when an inventory reservation cannot be fulfilled.
+    
+    Attributes:
+        product_id (str): The product that could not be reserved.
+        code (str): 'product_not_found' or 'insufficient_inventory'.
+        available (int or None): The inventory seen when the reservation failed.
+    """
+    
+    def __init__(self, message, product_id, code, available=None):
+        super().__init__(message)
+        self.product_id = product_id
+        self.code = code
+        self.available = available
+
+
+# Maximum replication lag, in seconds, of the secondaries serving catalog
+# reads; 90 is the smallest value MongoDB accepts
+CATALOG_MAX_STALENESS_SECONDS = 90
 
 
 class Product(BaseModel):
@@ -17,6 +46,29 @@ class Product(BaseModel):
     operations.
     """
     collection_name = 'products'
+    versioned = True
+    soft_delete = True
+    
+    # Browsing dominates product traffic and tolerates slight staleness, so
+    # reads prefer secondaries; users still read their own writes through
+    # their causal session. Reads that must be current ask for the primary.
+    read_preference = SecondaryPreferred(max_staleness=CATALOG_MAX_STALENESS_SECONDS)
+    
+    indexes = [
+        live_index([('created_at', -1)], 'live_created_at_-1'),
+        live_index([('category', 1), ('created_at', -1)], 'live_category_1_created_at_-1'),
+        live_index([('active', 1), ('created_at', -1)], 'live_active_1_created_at_-1'),
+        live_index([('price', 1)], 'live_price_1'),
+        DELETED_INDEX
+    ]
+    
+    # Active and price filters are checked on the documents an index returns
+    filters = [
+        FilterField('category'),
+        FilterField('active', type=bool, residual=True),
+        FilterField('price', type=float, range=('min_price', 'max_price'), residual=True)
+    ]
+    sortable = ['created_at', 'price']
     
     CATEGORIES = [
         'electronics', 'clothing', 'home', 'books', 'sports', 
@@ -75,6 +127,225 @@ class Product(BaseModel):
             limit=limit
         )
     
+    @classmethod
+    def reserve(cls, product_id, quantity):
+        """Atomically take units out of a product's inventory.
+        
+        The decrement is a single conditional update guarded by
+        `inventory >= quantity`, so concurrent reservations can never oversell
+        and no read-modify-write cycle is needed. The product is only read
+        again when the reservation fails, to report why.
+        
+        Args:
+            product_id (str): The product ID.
+            quantity (int): The number of units to reserve.
+        
+        Returns:
+            int: The inventory left after the reservation.
+        
+        Raises:
+            ValueError: If quantity is not a positive integer.
+            InventoryError: If the product does not exist or has too little stock.
+        """
+        _check_quantity(quantity)
+        object_id = to_object_id(product_id)
+        if object_id is not None:
+            product = cls.get_collection().find_one_and_update(
+                cls._live({'_id': object_id, 'inventory': {'$gte': quantity}}),
+                {
+                    '$inc': {'inventory': -quantity, 'version': 1},
+                    '$set': {'updated_at': datetime.utcnow()}
+                },
+                projection={'inventory': True},
+                return_document=ReturnDocument.AFTER,
+                session=current_session(write=True)
+            )
+            if product is not None:
+                return product['inventory']
+        
+        raise cls._reservation_error(product_id, object_id, quantity)
+    
+    @classmethod
+    def release(cls, product_id, quantity):
+        """Atomically return units to a product's inventory.
+        
+        Args:
+            product_id (str): The product ID.
+            quantity (int): The number of units to release.
+        
+        Returns:
+            int: The inventory after the release.
+        
+        Raises:
+            ValueError: If quantity is not a positive integer.
+            InventoryError: If the product does not exist.
+        """
+        _check_quantity(quantity)
+        object_id = to_object_id(product_id)
+        product = None
+        if object_id is not None:
+            product = cls.get_collection().find_one_and_update(
+                cls._live({'_id': object_id}),
+                {
+                    '$inc': {'inventory': quantity, 'version': 1},
+                    '$set': {'updated_at': datetime.utcnow()}
+                },
+                projection={'inventory': True},
+                return_document=ReturnDocument.AFTER,
+                session=current_session(write=True)
+            )
+        if product is None:
+            raise InventoryError("Product not found", str(product_id), 'product_not_found')
+        return product['inventory']
+    
+    @classmethod
+    def reserve_many(cls, items):
+        """Reserve inventory for several products in one round trip.
+        
+        The products are first checked to exist with a single `$in` query.
+        All guarded decrements are then sent in a single ordered `bulk_write`.
+        Each update is an upsert on the product's _id, so a guard that fails
+        on an existing product turns into a duplicate-key write error at that
+        exact position: an ordered batch stops there and the error tells which
+        item could not be reserved. The reservations made before it are then
+        released, so the cart is reserved either completely or not at all.
+        Only a product removed after the existence check is actually inserted;
+        that document is deleted again.
+        
+        Args:
+            items (list): (product_id, quantity) pairs. Quantities for the
+                same product are combined.
+        
+        Raises:
+            ValueError: If a quantity is not a positive integer.
+            InventoryError: If a product does not exist or has too little stock.
+        """
+        quantities = {}
+        for product_id, quantity in items:
+            _check_quantity(quantity)
+            object_id = to_object_id(product_id)
+            if object_id is None:
+                raise InventoryError("Product not found", str(product_id), 'product_not_found')
+            quantities[object_id] = quantities.get(object_id, 0) + quantity
+        
+        if not quantities:
+            return
+        
+        # A stable order keeps concurrent carts from interleaving differently
+        ordered_items = sorted(quantities.items())
+        collection = cls.get_collection()
+        session = current_session(write=True)
+        
+        existing = {
+            product['_id'] for product in cls.get_collection(read_preference=ReadPreference.PRIMARY).find(
+                cls._live({'_id': {'$in': list(quantities)}}), {'_id': True}, session=session
+            )
+        }
+        for object_id, quantity in ordered_items:
+            if object_id not in existing:
+                raise InventoryError("Product not found", str(object_id), 'product_not_found')
+        
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                cls._live({'_id': object_id, 'inventory': {'$gte': quantity}}),
+                {
+                    '$inc': {'inventory': -quantity, 'version': 1},
+                    '$set': {'updated_at': now},
+                    # Only set when the product was removed since the check
+                    '$setOnInsert': {'active': False}
+                },
+                upsert=True
+            )
+            for object_id, quantity in ordered_items
+        ]
+        
+        failed_index = None
+        try:
+            result = collection.bulk_write(operations, ordered=True, session=session)
+            upserted = result.upserted_ids
+        except BulkWriteError as e:
+            details = e.details
+            errors = details.get('writeErrors', [])
+            if not errors or errors[0].get('code') != 11000:
+                raise
+            failed_index = errors[0]['index']
+            upserted = {entry['index']: entry['_id'] for entry in details.get('upserted', [])}
+        
+        if failed_index is None and not upserted:
+            return
+        
+        # Undo everything the batch applied, removing documents it created
+        applied = len(ordered_items) if failed_index is None else failed_index
+        compensation = []
+        for index, (object_id, quantity) in enumerate(ordered_items[:applied]):
+            if index in upserted:
+                compensation.append(DeleteOne({'_id': object_id, 'created_at': {'$exists': False}}))
+            else:
+                compensation.append(UpdateOne(
+                    {'_id': object_id}, {'$inc': {'inventory': quantity, 'version': 1}}
+                ))
+        if compensation:
+            collection.bulk_write(compensation, ordered=False, session=session)
+        
+        if upserted:
+            missing_index = min(upserted)
+            if failed_index is None or missing_index < failed_index:
+                raise InventoryError(
+                    "Product not found", str(ordered_items[missing_index][0]), 'product_not_found'
+                )
+        
+        object_id, quantity = ordered_items[failed_index]
+        raise cls._reservation_error(str(object_id), object_id, quantity)
+    
+    @classmethod
+    def release_many(cls, items):
+        """Return units of several products to inventory in one round trip.
+        
+        Products that no longer exist are skipped.
+        
+        Args:
+            items (list): (product_id, quantity) pairs.
+        """
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                cls._live({'_id': to_object_id(product_id)}),
+                {'$inc': {'inventory': quantity, 'version': 1}, '$set': {'updated_at': now}}
+            )
+            for product_id, quantity in items
+            if to_object_id(product_id) is not None
+        ]
+        if operations:
+            cls.get_collection().bulk_write(operations, ordered=False, session=current_session(write=True))
+    
+    @classmethod
+    def _reservation_error(cls, product_id, object_id, quantity):
+        """Build the error for a failed reservation by reading the product.
+        
+        Args:
+            product_id (str): The product ID as given by the caller.
+            object_id (ObjectId or None): The parsed product ID.
+            quantity (int): The quantity that was requested.
+        
+        Returns:
+            InventoryError: The error describing the failure.
+        """
+        product = None
+        if object_id is not None:
+            product = cls.get_collection(read_preference=ReadPreference.PRIMARY).find_one(
+                cls._live({'_id': object_id}), {'inventory': True}, session=current_session()
+            )
+        if product is None:
+            return InventoryError("Product not found", str(product_id), 'product_not_found')
+        available = product.get('inventory', 0)
+        return InventoryError(
+            f"Only {available} units available, {quantity} requested",
+            str(product_id),
+            'insufficient_inventory',
+            available=available
+        )
+    
     @classmethod
     def get_products_by_ids(cls, product_ids):
         """Get multiple products by their IDs.
@@ -85,19 +356,22 @@ class Product(BaseModel):
         Returns:
             list: A list of products matching the given IDs.
         """
-        from bson import ObjectId
-        
-        # Convert string IDs to ObjectId
-        object_ids = []
-        for id_str in product_ids:
-            try:
-                object_ids.append(ObjectId(id_str))
-            except:
-                pass  # Skip invalid IDs
+        # Convert string IDs to ObjectId, skipping invalid IDs
+        object_ids = [object_id for object_id in map(to_object_id, product_ids) if object_id is not None]
         
         return cls.find(filter_dict={'_id': {'$in': object_ids}})
 
 
+def _check_quantity(quantity):
+    """Validate a reservation quantity.
+    
+    Raises:
+        ValueError: If quantity is not a positive integer.
+    """
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+        raise ValueError("Quantity must be a positive integer")
+
+
 class ProductSchema(BaseSchema):
     """Marshmallow schema for Product model.
     
@@ -145,3 +419,22 @@ class ProductSchema(BaseSchema):
             dict: The filtered data without None values.
         """
         return {key: value for key, value in data.items() if value is not None}
+
+
+class ReservationSchema(Schema):
+    """Marshmallow schema for a single-product reservation request."""
+    quantity = fields.Int(required=True, strict=True, validate=validate.Range(min=1))
+
+
+class ReservationItemSchema(ReservationSchema):
+    """Marshmallow schema for one item of a cart reservation."""
+    product_id = fields.Str(required=True)
+
+
+class CartReservationSchema(Schema):
+    """Marshmallow schema for a cart reservation request."""
+    items = fields.List(
+        fields.Nested(ReservationItemSchema),
+        required=True,
+        validate=validate.Length(min=1, max=100)
+    )
@@ -0,0 +1,242 @@
+# app/models/product_facets.py
+
+"""Catalog facet counters.
+
+This module keeps per-category, price-range and active/inactive product counts
+in memory so catalog navigation can be served without querying the database.
+Counters are adjusted incrementally on every product write made through the
+model layer and periodically reconciled against the database with a single
+$group aggregation, which also picks up writes made by other processes.
+"""
+
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pymongo import ReadPreference
+
+from app.models.base_model import LIVE_FILTER, register_write_listener
+from app.models.product import Product
+
+# Price range boundaries; the last range is open-ended
+PRICE_RANGES = [0, 25, 50, 100, 250, 500]
+
+
+def _price_range_label(index):
+    """Get the label of a price range, such as '25-50' or '500+'."""
+    if index == len(PRICE_RANGES) - 1:
+        return f"{PRICE_RANGES[index]}+"
+    return f"{PRICE_RANGES[index]}-{PRICE_RANGES[index + 1]}"
+
+
+def price_range(price):
+    """Get the label of the price range a price falls into.
+
+    Args:
+        price (float): The product price.
+
+    Returns:
+        str or None: The range label, or None if the price is not a number.
+    """
+    if not isinstance(price, (int, float)) or isinstance(price, bool):
+        return None
+    for index in range(len(PRICE_RANGES) - 1, -1, -1):
+        if price >= PRICE_RANGES[index]:
+            return _price_range_label(index)
+    return None
+
+
+def facet_keys(product):
+    """Get the facet buckets a product is counted in.
+
+    Args:
+        product (dict): The product document.
+
+    Returns:
+        list: (facet, value) pairs.
+    """
+    keys = [('status', 'active' if product.get('active', True) is not False else 'inactive')]
+    if product.get('category') is not None:
+        keys.append(('category', product['category']))
+    bucket = price_range(product.get('price'))
+    if bucket is not None:
+        keys.append(('price', bucket))
+    return keys
+
+
+def _group_pipeline():
+    """Build the aggregation that recomputes every facet count at once."""
+    branches = [
+        {'case': {'$lt': ['$price', PRICE_RANGES[index + 1]]}, 'then': _price_range_label(index)}
+        for index in range(len(PRICE_RANGES) - 1)
+    ]
+    return [{'$match': LIVE_FILTER}, {
+        '$group': {
+            '_id': {
+                'category': '$category',
+                'active': {'$ne': ['$active', False]},
+                'price': {'$switch': {
+                    'branches': [{'case': {'$not': [{'$gte': ['$price', 0]}]}, 'then': None}] + branches,
+                    'default': _price_range_label(len(PRICE_RANGES) - 1)
+                }}
+            },
+            'count': {'$sum': 1}
+        }
+    }]
+
+
+class ProductFacets:
+    """In-memory facet counters for the product catalog.
+
+    Reads return a prebuilt snapshot, so they cost the same regardless of the
+    catalog size. Counters are loaded lazily on the first read.
+    """
+
+    def __init__(self, reconcile_interval=300, min_reconcile_interval=10):
+        """Initialize the counters.
+
+        Args:
+            reconcile_interval (float, optional): Maximum seconds between
+                reconciliations. Defaults to 300.
+            min_reconcile_interval (float, optional): Minimum seconds between
+                reconciliations triggered by changes from other processes.
+                Defaults to 10.
+        """
+        self.reconcile_interval = reconcile_interval
+        self.min_reconcile_interval = min_reconcile_interval
+        self._counts = None
+        self._snapshot = None
+        self._reconciled_at = 0.0
+        self._external_changes = False
+        self._lock = threading.Lock()
+        self._reconcile_lock = threading.Lock()
+
+    def on_write(self, before, after):
+        """Adjust the counters for a product write.
+
+        Args:
+            before (dict or None): The product before the write.
+            after (dict or None): The product after the write.
+        """
+        with self._lock:
+            if self._counts is None:
+                return
+            if before is not None:
+                self._counts.subtract(facet_keys(before))
+            if after is not None:
+                self._counts.update(facet_keys(after))
+            self._snapshot = None
+
+    def on_change(self, event):
+        """Handle a change feed event.
+
+        The feed also reports this process's own writes and carries no
+        previous state, so events only schedule an early reconciliation.
+
+        Args:
+            event (dict): The change event.
+        """
+        if event['operation'] == 'invalidate':
+            self._reconciled_at = 0.0
+        else:
+            self._external_changes = True
+
+    def _due(self):
+        age = time.monotonic() - self._reconciled_at
+        if age >= self.reconcile_interval:
+            return True
+        return self._external_changes and age >= self.min_reconcile_interval
+
+    def reconcile(self):
+        """Recompute every counter from the database with one aggregation."""
+        self._external_changes = False
+        counts = Counter()
+        # Incremental adjustments build on these counts, so they come from the primary
+        collection = Product.get_collection(read_preference=ReadPreference.PRIMARY)
+        for group in collection.aggregate(_group_pipeline()):
+            key = group['_id']
+            counts[('status', 'active' if key['active'] else 'inactive')] += group['count']
+            if key.get('category') is not None:
+                counts[('category', key['category'])] += group['count']
+            if key.get('price') is not None:
+                counts[('price', key['price'])] += group['count']
+
+        with self._lock:
+            self._counts = counts
+            self._snapshot = None
+            self._reconciled_at = time.monotonic()
+
+    def get(self):
+        """Get the current facet counts.
+
+        When the counters are due for reconciliation, one caller reconciles
+        while concurrent callers keep being served the previous snapshot.
+
+        Returns:
+            dict: Category, price range and status counts.
+        """
+        if self._counts is None:
+            with self._reconcile_lock:
+                if self._counts is None:
+                    self.reconcile()
+        elif self._due() and self._reconcile_lock.acquire(blocking=False):
+            try:
+                self.reconcile()
+            finally:
+                self._reconcile_lock.release()
+
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self._build_snapshot()
+            return self._snapshot
+
+    def _build_snapshot(self):
+        counts = self._counts
+        categories = {category: counts[('category', category)] for category in Product.CATEGORIES}
+        # Keep categories stored outside the known list visible too
+        for (facet, value), count in counts.items():
+            if facet == 'category' and value not in categories and count > 0:
+                categories[value] = count
+
+        price_ranges = []
+        for index, low in enumerate(PRICE_RANGES):
+            high = PRICE_RANGES[index + 1] if index + 1 < len(PRICE_RANGES) else None
+            label = _price_range_label(index)
+            price_ranges.append({
+                'range': label,
+                'min': low,
+                'max': high,
+                'count': counts[('price', label)]
+            })
+
+        active = counts[('status', 'active')]
+        inactive = counts[('status', 'inactive')]
+        return {
+            'categories': categories,
+            'price_ranges': price_ranges,
+            'status': {'active': active, 'inactive': inactive},
+            'total': active + inactive,
+            'generated_at': datetime.utcnow().isoformat() + 'Z'
+        }
+
+
+def init_product_facets(app):
+    """Create the application's product facet counters.
+
+    Args:
+        app (Flask): The Flask application instance.
+
+    Returns:
+        ProductFacets: The facet counters.
+    """
+    facets = ProductFacets(
+        reconcile_interval=app.config.get('FACETS_RECONCILE_INTERVAL', 300),
+        min_reconcile_interval=app.config.get('FACETS_MIN_RECONCILE_INTERVAL', 10)
+    )
+    app.extensions['product_facets'] = facets
+    register_write_listener(app, Product.collection_name, facets.on_write)
+
+    feed = app.extensions.get('change_feed')
+    if feed is not None:
+        feed.subscribe(facets.on_change, [Product.collection_name])
+    return facets
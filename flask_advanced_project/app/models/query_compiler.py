@@ -0,0 +1,343 @@
+# app/models/query_compiler.py
+
+"""Declarative filters for list endpoints.
+
+This module compiles the query string of a list request into a canonical
+MongoDB query. Models declare which fields can be filtered and sorted on;
+the compiler parses and validates the arguments, builds fresh filter and
+sort specifications, and checks every query shape against the model's
+indexes once, rejecting shapes that would need an in-memory sort or a scan
+of documents the index cannot narrow down. Each shape gets a stable key
+that caches and metrics can group requests by.
+"""
+
+import math
+import threading
+
+
+class InvalidQuery(Exception):
+    """Raised when list query arguments cannot be compiled.
+
+    Attributes:
+        code (str): 'invalid_query' for malformed arguments, or
+            'unindexed_query' for a valid query no index can serve.
+        details (dict or None): The offending arguments.
+    """
+
+    def __init__(self, message, code='invalid_query', details=None):
+        super().__init__(message)
+        self.code = code
+        self.details = details
+
+
+def _parse_bool(value):
+    lowered = value.lower()
+    if lowered in ('true', '1'):
+        return True
+    if lowered in ('false', '0'):
+        return False
+    raise ValueError("must be true or false")
+
+
+def _parse_float(value):
+    parsed = float(value)
+    if not math.isfinite(parsed):
+        raise ValueError("must be a finite number")
+    return parsed
+
+
+_PARSERS = {
+    str: lambda value: value,
+    int: int,
+    float: _parse_float,
+    bool: _parse_bool,
+}
+
+
+class FilterField:
+    """A field list requests can filter on.
+
+    Equality fields are filtered with a query argument named after the field
+    (`?category=books`); range fields with a pair of arguments for the lower
+    and upper bounds (`?min_price=10&max_price=50`).
+    """
+
+    def __init__(self, field, type=str, range=None, residual=False, choices=None):
+        """Initialize the filter field.
+
+        Args:
+            field (str): The document field.
+            type (type, optional): str, int, float or bool. Defaults to str.
+            range (tuple, optional): Names of the (lower, upper) bound
+                arguments, making this a range field. Defaults to None.
+            residual (bool, optional): Whether the field is cheap to check
+                on documents an index scan returns, so queries may filter on
+                it without an index on it. Defaults to False.
+            choices (list, optional): Allowed values. Defaults to None.
+        """
+        self.field = field
+        self.type = type
+        self.range = range
+        self.residual = residual
+        self.choices = choices
+
+    def parse(self, name, value):
+        """Parse one query argument.
+
+        Raises:
+            InvalidQuery: If the value is malformed or not allowed.
+        """
+        try:
+            parsed = _PARSERS[self.type](value)
+        except ValueError:
+            raise InvalidQuery(
+                f"Invalid value for {name}", details={name: f"Expected {self.type.__name__}"}
+            )
+        if self.choices is not None and parsed not in self.choices:
+            raise InvalidQuery(f"Invalid value for {name}", details={name: "Unknown value"})
+        return parsed
+
+    def compile(self, args):
+        """Compile this field's arguments into a filter condition.
+
+        Args:
+            args (dict): The request's query arguments.
+
+        Returns:
+            tuple or None: (condition, operator label for the shape), or None
+                if the request does not filter on this field.
+        """
+        if self.range is None:
+            value = args.get(self.field)
+            if value is None or value == '':
+                return None
+            return self.parse(self.field, value), 'eq'
+
+        condition = {}
+        for operator, name in zip(('$gte', '$lte'), self.range):
+            value = args.get(name)
+            if value is not None and value != '':
+                condition[operator] = self.parse(name, value)
+        if not condition:
+            return None
+        if len(condition) == 2 and condition['$gte'] > condition['$lte']:
+            raise InvalidQuery(
+                f"{self.range[0]} cannot exceed {self.range[1]}",
+                details={self.range[0]: condition['$gte'], self.range[1]: condition['$lte']}
+            )
+        return condition, 'range'
+
+
+class CompiledQuery:
+    """A list request compiled into a MongoDB query.
+
+    Attributes:
+        filter (dict): The canonical filter, with fields in sorted order.
+        sort (list): (field, direction) pairs.
+        page (int): The page number.
+        per_page (int): The page size.
+        skip (int): Documents to skip.
+        shape (str): Stable key of the query shape, independent of values,
+            such as 'products?active=eq&category=eq|-created_at'.
+        index (str): The index expected to serve the query.
+    """
+
+    def __init__(self, filter_dict, sort, page, per_page, shape, index):
+        self.filter = filter_dict
+        self.sort = sort
+        self.page = page
+        self.per_page = per_page
+        self.skip = (page - 1) * per_page
+        self.shape = shape
+        self.index = index
+
+
+def _index_name(spec):
+    return spec.get('name') or '_'.join(f"{field}_{direction}" for field, direction in spec['keys'])
+
+
+def plan_index(indexes, filters, sort):
+    """Find the index serving a query shape, following the ESR rule.
+
+    An index serves a shape when its leading fields are equality-filtered
+    (Equality), followed by the sort fields in the requested order, all in
+    the same or all in the opposite direction (Sort); a range-filtered field
+    right after them narrows the scan further (Range). Filtered fields the
+    chosen index does not contain must be residual.
+
+    Args:
+        indexes (list): The model's index specifications.
+        filters (dict): Filtered field names mapped to ('eq' or 'range', FilterField).
+        sort (list): (field, direction) pairs.
+
+    Returns:
+        str: The name of the best index.
+
+    Raises:
+        InvalidQuery: With code 'unindexed_query' if no index serves the shape.
+    """
+    equalities = {field for field, (kind, _) in filters.items() if kind == 'eq'}
+    best = None
+    for spec in indexes:
+        keys = list(spec['keys'])
+        prefix = 0
+        while prefix < len(keys) and keys[prefix][0] in equalities:
+            prefix += 1
+        tail = keys[prefix:prefix + len(sort)]
+        if [field for field, _ in tail] != [field for field, _ in sort]:
+            continue
+        same = all(direction == wanted for (_, direction), (_, wanted) in zip(tail, sort))
+        reverse = all(direction == -wanted for (_, direction), (_, wanted) in zip(tail, sort))
+        if not (same or reverse):
+            continue
+
+        covered = {field for field, _ in keys}
+        uncovered = [
+            field for field, (_, filter_field) in filters.items()
+            if field not in covered and not filter_field.residual
+        ]
+        if uncovered:
+            continue
+        rest = keys[prefix + len(sort):]
+        ranged = bool(rest) and rest[0][0] in filters and filters[rest[0][0]][0] == 'range'
+        score = (prefix, ranged, -len(keys))
+        if best is None or score > best[0]:
+            best = (score, _index_name(spec))
+
+    if best is None:
+        raise InvalidQuery(
+            "No index supports this combination of filters and sort order",
+            code='unindexed_query',
+            details={
+                'filters': sorted(filters),
+                'sort': [field if direction > 0 else f"-{field}" for field, direction in sort]
+            }
+        )
+    return best[1]
+
+
+class QueryCompiler:
+    """Compiles list query arguments for one model.
+
+    Index plans are computed once per query shape and remembered. A shape no
+    index serves is remembered as the arguments of its error, and a new
+    InvalidQuery is raised for every request, so no traceback is retained.
+    """
+
+    def __init__(self, model, max_per_page=100, default_per_page=20):
+        """Initialize the compiler.
+
+        Args:
+            model (type): The model class, declaring `filters`, `sortable`,
+                `default_sort`, `indexes` and `soft_delete`.
+            max_per_page (int, optional): Largest page size. Defaults to 100.
+            default_per_page (int, optional): Page size when none is given.
+                Defaults to 20.
+        """
+        self.model = model
+        self.max_per_page = max_per_page
+        self.default_per_page = default_per_page
+        self._plans = {}
+        self._lock = threading.Lock()
+
+    def _parse_sort(self, value):
+        if not value:
+            return list(self.model.default_sort)
+        sort = []
+        for token in value.split(','):
+            token = token.strip()
+            field = token.lstrip('-+')
+            if field not in self.model.sortable or any(field == existing for existing, _ in sort):
+                raise InvalidQuery("Invalid sort", details={'sort': f"Cannot sort by {field or token}"})
+            sort.append((field, -1 if token.startswith('-') else 1))
+        return sort
+
+    def _parse_page(self, args, name, default, maximum=None):
+        value = args.get(name)
+        if value is None or value == '':
+            return default
+        try:
+            number = int(value)
+        except ValueError:
+            raise InvalidQuery(f"Invalid value for {name}", details={name: "Expected int"})
+        if number < 1:
+            raise InvalidQuery(f"Invalid value for {name}", details={name: "Must be at least 1"})
+        return min(number, maximum) if maximum else number
+
+    def parse_pagination(self, args):
+        """Parse the page and per_page arguments.
+
+        Args:
+            args (dict): The request's query arguments.
+
+        Returns:
+            tuple: (page, per_page).
+
+        Raises:
+            InvalidQuery: If an argument is malformed.
+        """
+        return (
+            self._parse_page(args, 'page', 1),
+            self._parse_page(args, 'per_page', self.default_per_page, self.max_per_page)
+        )
+
+    def filter_condition(self, field, args):
+        """Compile the arguments of one declared filter field, without planning.
+
+        Args:
+            field (str): The filtered document field.
+            args (dict): The request's query arguments.
+
+        Returns:
+            Any: The field's filter value or range condition, or None if the
+                request does not filter on it.
+
+        Raises:
+            InvalidQuery: If an argument is malformed.
+        """
+        filter_field = next(item for item in self.model.filters if item.field == field)
+        compiled = filter_field.compile(args)
+        return compiled[0] if compiled is not None else None
+
+    def compile(self, args):
+        """Compile list query arguments.
+
+        Arguments that are not declared are ignored.
+
+        Args:
+            args (dict): The request's query arguments.
+
+        Returns:
+            CompiledQuery: The compiled query.
+
+        Raises:
+            InvalidQuery: If an argument is malformed, or no index serves the query.
+        """
+        page, per_page = self.parse_pagination(args)
+        sort = self._parse_sort(args.get('sort'))
+
+        filter_dict = {}
+        kinds = {}
+        for filter_field in sorted(self.model.filters, key=lambda item: item.field):
+            compiled = filter_field.compile(args)
+            if compiled is not None:
+                filter_dict[filter_field.field], kind = compiled
+                kinds[filter_field.field] = (kind, filter_field)
+
+        shape = self.model.collection_name + '?' + '&'.join(
+            f"{field}={kind}" for field, (kind, _) in kinds.items()
+        ) + '|' + ','.join(field if direction > 0 else f"-{field}" for field, direction in sort)
+
+        plan = self._plans.get(shape)
+        if plan is None:
+            try:
+                plan = plan_index(self.model.indexes, kinds, sort)
+            except InvalidQuery as e:
+                plan = (str(e), e.code, e.details)
+            with self._lock:
+                self._plans[shape] = plan
+        if isinstance(plan, tuple):
+            message, code, details = plan
+            raise InvalidQuery(message, code=code, details=details)
+
+        return CompiledQuery(filter_dict, sort, page, per_page, shape, plan)
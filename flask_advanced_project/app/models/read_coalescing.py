@@ -0,0 +1,376 @@
+# app/models/read_coalescing.py
+
+"""Read coalescing for model queries.
+
+This module puts a single-flight layer in front of BaseModel reads: while a
+query is running, identical queries from other threads wait for its result
+instead of sending their own, so a burst of requests for the same product or
+page costs one database call. Callers that accept slightly stale data can
+also cache results for a bounded time; cached entries are refreshed early
+with probabilistic expiration (XFetch) so they do not all expire at once,
+and can optionally be shared between worker processes through MongoDB.
+"""
+
+import copy
+import hashlib
+import math
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+
+
+def _normalize(value, top_level=False):
+    """Normalize a query value so equivalent queries get the same key.
+
+    Top-level filter fields and operator documents are order-independent and
+    get sorted; embedded documents keep their order, since MongoDB compares
+    them field by field.
+    """
+    if isinstance(value, dict):
+        items = [(key, _normalize(item)) for key, item in value.items()]
+        if top_level or all(key.startswith('$') for key in value):
+            items.sort(key=lambda item: item[0])
+        return ('dict', tuple(items))
+    if isinstance(value, (list, tuple)):
+        return ('list', tuple(_normalize(item) for item in value))
+    return (type(value).__name__, repr(value))
+
+
+def query_key(database, collection, operation, filter_dict=None, projection=None,
+              sort=None, skip=0, limit=0):
+    """Build the key identifying a read.
+
+    The database name is part of the key, so tenants with separate databases
+    never share results.
+
+    Args:
+        database (str): The database name.
+        collection (str): The collection name.
+        operation (str): 'find', 'find_one' or 'count'.
+        filter_dict (dict, optional): MongoDB filter criteria.
+        projection (dict, optional): The projection.
+        sort (list, optional): Sort criteria, order preserved.
+        skip (int, optional): Number of documents to skip.
+        limit (int, optional): Maximum number of documents.
+
+    Returns:
+        tuple: A hashable key.
+    """
+    return (
+        database, collection, operation,
+        _normalize(filter_dict or {}, top_level=True),
+        _normalize(projection),
+        _normalize(list(sort) if sort else None),
+        skip or 0,
+        limit or 0
+    )
+
+
+class _Flight:
+    """A read in progress that other threads can wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class _Entry:
+    """A cached read result."""
+
+    def __init__(self, value, delta, expires_at):
+        self.value = value
+        self.delta = delta  # Seconds the read took, which scales early refreshes
+        self.expires_at = expires_at
+
+
+def _refresh_due(expires_at, delta, beta, now):
+    """Decide whether to refresh a cached value (XFetch).
+
+    Each caller refreshes early with a probability that grows as expiry
+    approaches, and faster for values that take longer to recompute.
+    """
+    return now - delta * beta * math.log(random.random() or 1e-12) >= expires_at
+
+
+class SharedReadCache:
+    """Read cache shared between worker processes through a MongoDB collection.
+
+    Entries expire through a TTL index. One process at a time recomputes an
+    entry, holding a short lease; the others keep using the previous value
+    or wait briefly for the new one. Entries record the collection they were
+    read from, so writes to it can delete them.
+    """
+
+    def __init__(self, database, collection_name='read_cache', wait_timeout=2.0, poll_interval=0.02):
+        """Initialize the shared cache.
+
+        Args:
+            database (Database): The database holding the cache collection.
+            collection_name (str, optional): The cache collection. Defaults to 'read_cache'.
+            wait_timeout (float, optional): Maximum seconds to wait for another
+                worker's result before reading from the database. Defaults to 2.0.
+            poll_interval (float, optional): Seconds between checks while
+                waiting. Defaults to 0.02.
+        """
+        self.collection = database[collection_name]
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.collection.create_index('expires_at', expireAfterSeconds=0)
+        self.collection.create_index('collection')
+
+    @staticmethod
+    def entry_id(key):
+        return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+    def get(self, entry_id):
+        """Get a live entry as (value, delta, expires_at), or None."""
+        document = self.collection.find_one({'_id': entry_id, 'expires_at': {'$gt': datetime.utcnow()}})
+        if document is None or 'value' not in document:
+            return None
+        return document['value']['v'], document.get('delta', 0.0), document['expires_at']
+
+    def acquire(self, entry_id, collection, lease):
+        """Try to become the process that recomputes an entry.
+
+        Args:
+            entry_id (str): The entry ID.
+            collection (str): The collection the entry is read from.
+            lease (float): Seconds the lease lasts.
+
+        Returns:
+            str or None: The lease token to store the entry with, or None if
+                another process holds the lease.
+        """
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        try:
+            self.collection.update_one(
+                {'_id': entry_id, 'lease_until': {'$lt': now}},
+                {
+                    '$set': {'lease_until': now + timedelta(seconds=lease), 'lease': token},
+                    '$setOnInsert': {'collection': collection, 'expires_at': now + timedelta(seconds=lease)}
+                },
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return None
+        return token
+
+    def wait(self, entry_id):
+        """Wait for another process to store an entry.
+
+        Returns:
+            tuple or None: The entry, or None if it did not appear in time.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            entry = self.get(entry_id)
+            if entry is not None:
+                return entry
+        return None
+
+    def set(self, entry_id, token, value, delta, max_age):
+        """Store an entry and release the lease.
+
+        Nothing is stored when the lease was lost, in particular when a write
+        invalidated the entry while its value was being read.
+        """
+        now = datetime.utcnow()
+        self.collection.update_one(
+            {'_id': entry_id, 'lease': token},
+            {'$set': {
+                'value': {'v': value},
+                'delta': delta,
+                'expires_at': now + timedelta(seconds=max_age),
+                'lease_until': now
+            }}
+        )
+
+    def invalidate(self, collection):
+        """Delete the entries read from a collection.
+
+        Args:
+            collection (str): The collection name.
+        """
+        self.collection.delete_many({'collection': collection})
+
+
+class ReadCoalescer:
+    """Single-flight execution and optional caching of identical reads.
+
+    Every caller gets its own copy of the result, so a caller mutating the
+    documents it received cannot affect another. Writes made through the
+    model layer end the sharing of reads started before them, so a client
+    never reads around its own write, and delete the shared entries of the
+    collection; writes that bypass the model layer's listeners (bulk writes,
+    inventory counters) only show up in cached results once these expire.
+    """
+
+    def __init__(self, max_entries=1024, beta=1.0, shared=None):
+        """Initialize the coalescer.
+
+        Args:
+            max_entries (int, optional): Maximum cached results kept in this
+                process. Defaults to 1024.
+            beta (float, optional): XFetch aggressiveness; higher values
+                refresh earlier. Defaults to 1.0.
+            shared (SharedReadCache, optional): Cache shared with other
+                workers for reads that accept a max_age. Defaults to None.
+        """
+        self.max_entries = max_entries
+        self.beta = beta
+        self.shared = shared
+        self._flights = {}
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, collection):
+        """Stop sharing results of reads on a collection started before now.
+
+        Args:
+            collection (str): The collection name.
+        """
+        with self._lock:
+            self._generations[collection] = self._generations.get(collection, 0) + 1
+        if self.shared is not None:
+            self.shared.invalidate(collection)
+
+    def read(self, key, loader, max_age=0):
+        """Run a read, sharing it with identical concurrent reads.
+
+        Args:
+            key (tuple): The read's key from query_key.
+            loader (function): Performs the read when no result can be shared.
+            max_age (float, optional): Seconds a result may be reused after
+                it was read. 0 only shares reads that are in flight. Defaults to 0.
+
+        Returns:
+            Any: A private copy of the result.
+        """
+        local_key = (self._generations.get(key[1], 0),) + key
+
+        if max_age:
+            entry = self._entries.get(local_key)
+            if entry is not None and not _refresh_due(
+                entry.expires_at, entry.delta, self.beta, time.monotonic()
+            ):
+                return copy.deepcopy(entry.value)
+
+        with self._lock:
+            flight = self._flights.get(local_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[local_key] = _Flight()
+            else:
+                flight.waiters += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            if max_age:
+                value, delta, remaining = self._load_cached(key, loader, max_age)
+                with self._lock:
+                    self._entries[local_key] = _Entry(value, delta, time.monotonic() + remaining)
+                    self._entries.move_to_end(local_key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            else:
+                value = loader()
+            flight.result = value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[local_key]
+            flight.done.set()
+
+        # Keep the shared or cached value pristine for the other readers
+        if flight.waiters or max_age:
+            return copy.deepcopy(value)
+        return value
+
+    def _load_cached(self, key, loader, max_age):
+        """Load a cacheable read, through the shared cache when configured.
+
+        Returns:
+            tuple: (value, seconds the read took, seconds the value stays fresh).
+        """
+        if self.shared is None:
+            started = time.monotonic()
+            value = loader()
+            return value, time.monotonic() - started, max_age
+
+        entry_id = self.shared.entry_id(key)
+        entry = self.shared.get(entry_id)
+        if entry is not None:
+            value, delta, expires_at = entry
+            remaining = (expires_at - datetime.utcnow()).total_seconds()
+            if not _refresh_due(remaining, delta, self.beta, 0.0):
+                return value, delta, remaining
+
+        started = time.monotonic()
+        token = self.shared.acquire(entry_id, key[1], max(1.0, 2 * (entry[1] if entry else 0.0)))
+        if token is None:
+            # Another worker is refreshing; use what exists or wait for it
+            if entry is None:
+                entry = self.shared.wait(entry_id)
+            if entry is not None:
+                value, delta, expires_at = entry
+                return value, delta, max(0.0, (expires_at - datetime.utcnow()).total_seconds())
+
+        value = loader()
+        delta = time.monotonic() - started
+        if token is not None:
+            self.shared.set(entry_id, token, value, delta, max_age)
+        return value, delta, max_age
+
+
+def init_read_coalescing(app):
+    """Create the application's read coalescer, if enabled.
+
+    Args:
+        app (Flask): The Flask application instance.
+
+    Returns:
+        ReadCoalescer or None: The coalescer, or None when disabled.
+    """
+    from app.models.base_model import register_write_listener
+    from app.models.user import User
+    from app.models.product import Product
+
+    if not app.config.get('READ_COALESCING_ENABLED', True):
+        return None
+
+    shared = None
+    if app.config.get('READ_CACHE_SHARED', False):
+        shared = SharedReadCache(
+            app.extensions['database'],
+            app.config.get('READ_CACHE_COLLECTION', 'read_cache')
+        )
+
+    coalescer = ReadCoalescer(
+        max_entries=app.config.get('READ_CACHE_MAX_ENTRIES', 1024),
+        beta=app.config.get('READ_CACHE_BETA', 1.0),
+        shared=shared
+    )
+    app.extensions['read_coalescer'] = coalescer
+
+    for model in (User, Product):
+        register_write_listener(
+            app, model.collection_name,
+            lambda before, after, name=model.collection_name: coalescer.invalidate(name)
+        )
+    return coalescer
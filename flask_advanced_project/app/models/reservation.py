@@ -0,0 +1,210 @@
+# app/models/reservation.py
+
+"""Reservation model for the application.
+
+Reserving inventory takes units out of products on behalf of a user. Each
+reservation is recorded with its owner and an expiry, so the units come back
+to inventory when the owner releases the reservation or when it expires, and
+a user can only hold a limited number of reservations at a time.
+
+The limit is enforced with a per-user counter of held reservations, claimed
+with a guarded increment before inventory is taken, so concurrent requests
+from the same user cannot both pass a limit check and exceed it.
+"""
+
+from datetime import datetime, timedelta
+from flask import current_app
+from pymongo import ReadPreference
+from pymongo.collection import ReturnDocument
+
+from app.models.base_model import BaseModel
+from app.models.causal_sessions import current_session
+from app.models.product import Product
+
+
+class ReservationError(Exception):
+    """Raised when a reservation cannot be made or released.
+
+    Attributes:
+        code (str): 'reservation_limit' or 'reservation_not_found'.
+    """
+
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+class Reservation(BaseModel):
+    """Reservation model holding a user's reserved units until released or expired.
+
+    A reservation is 'held' until it becomes 'released' or 'expired'. Each
+    transition out of 'held' is a single conditional update, so the units of
+    a reservation are returned to inventory, and its slot to the user's
+    counter, exactly once, whichever worker releases it.
+
+    A worker that dies between claiming a slot and recording the reservation
+    leaves the slot claimed, so the user can hold one reservation fewer until
+    their counter document is removed; the next hold then recounts it from
+    the reservations they hold.
+    """
+    collection_name = 'reservations'
+
+    # Held reservations per user: {'_id': user_id, 'active': count}
+    counter_collection = 'reservation_counters'
+
+    indexes = [
+        {'keys': [('user_id', 1), ('status', 1), ('expires_at', 1)]},
+        {'keys': [('status', 1), ('expires_at', 1)]}
+    ]
+
+    HELD = 'held'
+    RELEASED = 'released'
+    EXPIRED = 'expired'
+
+    @classmethod
+    def hold(cls, user_id, items, ttl, max_active):
+        """Reserve inventory for a user, all or nothing.
+
+        Expired reservations are released first, so their units are available
+        again and their slots free before new ones are taken.
+
+        Args:
+            user_id (str): The ID of the user reserving.
+            items (list): (product_id, quantity) pairs.
+            ttl (int): Seconds until the reservation expires.
+            max_active (int): Reservations a user may hold at once.
+
+        Returns:
+            dict: The reservation.
+
+        Raises:
+            ValueError: If a quantity is not a positive integer.
+            InventoryError: If a product does not exist or has too little stock.
+            ReservationError: If the user already holds `max_active` reservations.
+        """
+        cls.release_expired(user_id=user_id)
+        cls.release_expired()
+
+        if not cls._claim_slot(user_id, max_active):
+            raise ReservationError(
+                f"At most {max_active} reservations can be held at once", 'reservation_limit'
+            )
+
+        try:
+            Product.reserve_many(items)
+        except Exception:
+            cls._free_slot(user_id)
+            raise
+        try:
+            return cls.create({
+                'user_id': user_id,
+                'items': [{'product_id': str(product_id), 'quantity': quantity} for product_id, quantity in items],
+                'status': cls.HELD,
+                'expires_at': datetime.utcnow() + timedelta(seconds=ttl)
+            })
+        except Exception:
+            Product.release_many(items)
+            cls._free_slot(user_id)
+            raise
+
+    @classmethod
+    def release(cls, reservation_id, user_id=None):
+        """Release a held reservation, returning its units to inventory.
+
+        Args:
+            reservation_id (ObjectId): The reservation ID.
+            user_id (str, optional): Only release the reservation if this user
+                holds it. Defaults to None, releasing any user's reservation.
+
+        Returns:
+            dict: The released reservation.
+
+        Raises:
+            ReservationError: If no such reservation is held.
+        """
+        filter_dict = {'_id': reservation_id, 'status': cls.HELD}
+        if user_id is not None:
+            filter_dict['user_id'] = user_id
+        reservation = cls._finish(filter_dict, cls.RELEASED)
+        if reservation is None:
+            raise ReservationError("Reservation not found", 'reservation_not_found')
+        return reservation
+
+    @classmethod
+    def release_expired(cls, limit=100, user_id=None):
+        """Return the units of expired reservations to inventory.
+
+        Args:
+            limit (int, optional): Reservations released at most. Defaults to 100.
+            user_id (str, optional): Only release this user's reservations.
+                Defaults to None, releasing any user's.
+
+        Returns:
+            int: The number of reservations released.
+        """
+        filter_dict = {'status': cls.HELD, 'expires_at': {'$lte': datetime.utcnow()}}
+        if user_id is not None:
+            filter_dict['user_id'] = user_id
+        for released in range(limit):
+            if cls._finish(filter_dict, cls.EXPIRED) is None:
+                return released
+        return limit
+
+    @classmethod
+    def _finish(cls, filter_dict, status):
+        """Move one held reservation to a final status and return its units.
+
+        Returns:
+            dict or None: The reservation, or None if none matched.
+        """
+        reservation = cls.get_collection().find_one_and_update(
+            filter_dict,
+            {'$set': {'status': status, 'updated_at': datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER,
+            session=current_session(write=True)
+        )
+        if reservation is not None:
+            Product.release_many([(item['product_id'], item['quantity']) for item in reservation['items']])
+            cls._free_slot(reservation['user_id'])
+        return reservation
+
+    @classmethod
+    def _counters(cls):
+        return current_app.extensions['database'][cls.counter_collection]
+
+    @classmethod
+    def _claim_slot(cls, user_id, max_active):
+        """Count a new reservation against a user's limit, if below it.
+
+        The increment only matches while the counter is below `max_active`,
+        so concurrent holds cannot both take the last slot. A user without a
+        counter, such as one whose reservations predate counters, gets one
+        starting from the reservations they hold.
+
+        Returns:
+            bool: True if a slot was claimed, False if the limit is reached.
+        """
+        counters = cls._counters()
+        session = current_session(write=True)
+        for attempt in range(2):
+            claimed = counters.update_one(
+                {'_id': user_id, 'active': {'$lt': max_active}}, {'$inc': {'active': 1}}, session=session
+            )
+            if claimed.matched_count:
+                return True
+            if attempt or counters.count_documents({'_id': user_id}, limit=1, session=session):
+                return False
+            held = cls.get_collection(read_preference=ReadPreference.PRIMARY).count_documents(
+                {'user_id': user_id, 'status': cls.HELD}, session=session
+            )
+            # Concurrent holds may both get here; only one inserts the counter
+            counters.update_one({'_id': user_id}, {'$setOnInsert': {'active': held}}, upsert=True, session=session)
+        return False
+
+    @classmethod
+    def _free_slot(cls, user_id):
+        """Return a slot to a user's counter."""
+        cls._counters().update_one(
+            {'_id': user_id, 'active': {'$gt': 0}}, {'$inc': {'active': -1}},
+            session=current_session(write=True)
+        )
@@ -9,7 +9,8 @@ and provides methods for user-related operations.
 from datetime import datetime
 from marshmallow import Schema, fields, validate, pre_load, post_dump, ValidationError
 from app import bcrypt
-from app.models.base_model import BaseModel, BaseSchema
+from app.models.base_model import BaseModel, BaseSchema, DELETED_INDEX, live_index
+from app.models.query_compiler import FilterField
 
 
 class User(BaseModel):
@@ -19,9 +20,26 @@ class User(BaseModel):
     operations such as password hashing and verification.
     """
     collection_name = 'users'
+    versioned = True
+    soft_delete = True
+    
+    # Uniqueness only applies to live users, so a deleted account's email and
+    # username can be registered again
+    indexes = [
+        live_index([('email', 1)], 'live_email_1', unique=True),
+        live_index([('username', 1)], 'live_username_1', unique=True),
+        live_index([('created_at', -1)], 'live_created_at_-1'),
+        DELETED_INDEX
+    ]
     
     ROLES = ['user', 'admin', 'moderator']
     
+    filters = [
+        FilterField('active', type=bool, residual=True),
+        FilterField('role', choices=ROLES, residual=True)
+    ]
+    sortable = ['created_at', 'username']
+    
     @staticmethod
     def hash_password(password):
         """Hash a password using bcrypt.
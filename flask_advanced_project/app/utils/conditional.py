@@ -0,0 +1,89 @@
+# app/utils/conditional.py
+
+"""Conditional request helpers.
+
+This module maps document versions to HTTP entity tags so clients can make
+conditional updates: responses carry an ETag with the document version, and
+update routes honour If-Match by only writing when the stored version still
+matches.
+"""
+
+from flask import request
+
+from app.models.base_model import get_version
+from app.utils.response import error_response
+
+
+# Expected version no document has, for If-Match headers that cannot match
+NO_MATCH = -1
+
+
+def get_expected_version():
+    """Get the document version required by the request's If-Match header.
+
+    Returns:
+        int or None: The expected version, or None if the request is
+            unconditional (no If-Match header, or If-Match: *). NO_MATCH when
+            the header only holds weak tags, which never match, so the update
+            fails with 412 like any other stale version.
+
+    Raises:
+        ValueError: If the header does not name exactly one version.
+    """
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+
+    # Weak tags never satisfy If-Match, so only strong tags are considered
+    tags = list(if_match)
+    if not tags and if_match.as_set(include_weak=True):
+        return NO_MATCH
+    if len(tags) != 1 or not tags[0].isdigit():
+        raise ValueError("If-Match must contain a single document version")
+    return int(tags[0])
+
+
+def with_etag(result, document):
+    """Attach the document version as the ETag of a response.
+
+    Args:
+        result (tuple): A (response, status_code) tuple from success_response.
+        document (dict): The document the response represents.
+
+    Returns:
+        tuple: The same tuple, with the ETag header set.
+    """
+    response, status_code = result
+    response.set_etag(str(get_version(document)))
+    return response, status_code
+
+
+def invalid_precondition_response(error):
+    """Create the response for a malformed If-Match header.
+
+    Args:
+        error (ValueError): The parsing error.
+
+    Returns:
+        tuple: A 400 JSON error response.
+    """
+    return error_response(str(error), code="invalid_precondition", status_code=400)
+
+
+def version_conflict_response(error):
+    """Create the response for a failed conditional update.
+
+    Args:
+        error (VersionConflict): The conflict raised by the model.
+
+    Returns:
+        tuple: A 412 JSON error response with the current version.
+    """
+    response, status_code = error_response(
+        "The resource was modified by another request",
+        details={'current_version': error.current_version},
+        code="version_conflict",
+        status_code=412
+    )
+    response.set_etag(str(error.current_version))
+    return response, status_code
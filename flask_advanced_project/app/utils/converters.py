@@ -0,0 +1,26 @@
+# app/utils/converters.py
+
+"""URL converters.
+
+This module provides the `objectid` URL converter. Routes declared with
+`<objectid:product_id>` only match 24-digit hexadecimal IDs, so malformed
+IDs are answered with 404 by the router, and view functions receive the
+parsed ObjectId.
+"""
+
+from bson import ObjectId
+from werkzeug.routing import BaseConverter
+
+from app.models.base_model import OBJECT_ID_PATTERN
+
+
+class ObjectIdConverter(BaseConverter):
+    """Match an ObjectId in its string form and pass it to the view as an ObjectId."""
+
+    regex = OBJECT_ID_PATTERN
+
+    def to_python(self, value):
+        return ObjectId(value)
+
+    def to_url(self, value):
+        return str(value)
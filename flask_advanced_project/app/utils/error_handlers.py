@@ -4,9 +4,10 @@
 
 This module provides error handler functions for various HTTP error codes
 and custom exceptions, ensuring that errors are returned in a consistent format.
+Bodies of the common errors are encoded once and reused.
 """
 
-from flask import jsonify
+from app.utils.response import error_response
 
 
 def handle_bad_request(e):
@@ -18,12 +19,7 @@ def handle_bad_request(e):
     Returns:
         tuple: A tuple containing the response JSON and status code.
     """
-    return jsonify({
-        'status': 'error',
-        'message': 'Bad request',
-        'details': str(e),
-        'code': 'bad_request'
-    }), 400
+    return error_response('Bad request', details=str(e), code='bad_request', status_code=400)
 
 
 def handle_unauthorized(e):
@@ -35,12 +31,7 @@ def handle_unauthorized(e):
     Returns:
         tuple: A tuple containing the response JSON and status code.
     """
-    return jsonify({
-        'status': 'error',
-        'message': 'Unauthorized access',
-        'details': str(e),
-        'code': 'unauthorized'
-    }), 401
+    return error_response('Unauthorized access', details=str(e), code='unauthorized', status_code=401)
 
 
 def handle_forbidden(e):
@@ -52,12 +43,7 @@ def handle_forbidden(e):
     Returns:
         tuple: A tuple containing the response JSON and status code.
     """
-    return jsonify({
-        'status': 'error',
-        'message': 'Access forbidden',
-        'details': str(e),
-        'code': 'forbidden'
-    }), 403
+    return error_response('Access forbidden', details=str(e), code='forbidden', status_code=403)
 
 
 def handle_not_found(e):
@@ -69,12 +55,7 @@ def handle_not_found(e):
     Returns:
         tuple: A tuple containing the response JSON and status code.
     """
-    return jsonify({
-        'status': 'error',
-        'message': 'Resource not found',
-        'details': str(e),
-        'code': 'not_found'
-    }), 404
+    return error_response('Resource not found', details=str(e), code='not_found', status_code=404)
 
 
 def handle_method_not_allowed(e):
@@ -86,12 +67,7 @@ def handle_method_not_allowed(e):
     Returns:
         tuple: A tuple containing the response JSON and status code.
     """
-    return jsonify({
-        'status': 'error',
-        'message': 'Method not allowed',
-        'details': str(e),
-        'code': 'method_not_allowed'
-    }), 405
+    return error_response('Method not allowed', details=str(e), code='method_not_allowed', status_code=405)
 
 
 def handle_validation_error(e):
@@ -111,12 +87,7 @@ def handle_validation_error(e):
     else:
         details = str(e) or 'Validation error'
     
-    return jsonify({
-        'status': 'error',
-        'message': 'Validation error',
-        'details': details,
-        'code': 'validation_error'
-    }), 422
+    return error_response('Validation error', details=details, code='validation_error', status_code=422)
 
 
 def handle_internal_server_error(e):
@@ -132,7 +103,7 @@ def handle_internal_server_error(e):
     from flask import current_app
     
     # Log the error for debugging
-    current_app.logger.error(f"Internal Server Error: {str(e)}")
+    current_app.logger.error("Internal Server Error: %s", e)
     
     if current_app.config.get('DEBUG', False):
         # In debug mode, provide detailed error information
@@ -141,9 +112,6 @@ def handle_internal_server_error(e):
         # In production, provide a generic error message
         error_details = "An internal server error occurred"
     
-    return jsonify({
-        'status': 'error',
-        'message': 'Internal server error',
-        'details': error_details,
-        'code': 'internal_server_error'
-    }), 500
+    return error_response(
+        'Internal server error', details=error_details, code='internal_server_error', status_code=500
+    )
@@ -0,0 +1,87 @@
+# app/utils/log_limiter.py
+
+"""Log rate limiting.
+
+This module keeps an error storm from multiplying its own cost through
+logging. Each logging call site may emit a limited number of records per
+interval; further records from that call site are dropped before they are
+formatted or written, and the next record let through reports how many were
+dropped.
+"""
+
+import logging
+import threading
+import time
+
+# Module loggers limited along with the application logger
+RATE_LIMITED_LOGGERS = ('change_feed', 'archiver', 'jwt_keys')
+
+
+class RateLimitFilter(logging.Filter):
+    """Logging filter allowing a number of records per call site and interval.
+
+    Call sites are identified by the file and line of the logging call, so a
+    failing route cannot silence the logging of other routes.
+    """
+
+    def __init__(self, rate=10, interval=60):
+        """Initialize the filter.
+
+        Args:
+            rate (int, optional): Records allowed per call site and interval.
+                Defaults to 10.
+            interval (float, optional): Interval length in seconds. Defaults to 60.
+        """
+        super().__init__()
+        self.rate = rate
+        self.interval = interval
+        self._windows = {}  # (pathname, lineno) -> [window start, emitted, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window is not None else 0
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.rate:
+                suppressed = window[2]
+                window[1] += 1
+                window[2] = 0
+            else:
+                window[2] += 1
+                return False
+
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
+
+def init_log_rate_limit(app):
+    """Rate limit the application logger and the background job loggers.
+
+    Loggers are shared by every application in the process, so a filter
+    installed by an earlier application is replaced rather than stacked.
+    Disabled when `LOG_RATE_LIMIT` is 0.
+
+    Args:
+        app (Flask): The Flask application instance.
+
+    Returns:
+        RateLimitFilter or None: The filter, or None when disabled.
+    """
+    loggers = [app.logger] + [logging.getLogger(name) for name in RATE_LIMITED_LOGGERS]
+    for logger in loggers:
+        for existing in [f for f in logger.filters if isinstance(f, RateLimitFilter)]:
+            logger.removeFilter(existing)
+
+    rate = app.config.get('LOG_RATE_LIMIT', 10)
+    if not rate:
+        return None
+
+    log_filter = RateLimitFilter(rate, app.config.get('LOG_RATE_INTERVAL', 60))
+    for logger in loggers:
+        logger.addFilter(log_filter)
+    return log_filter
@@ -3,10 +3,127 @@
 """Response utility functions.
 
 This module provides helper functions for creating consistent JSON responses
-across the application.
+across the application. Success envelopes are assembled from pre-encoded
+fragments around the encoded payload rather than built as nested dicts and
+encoded whole; the bytes are the same as `jsonify` produces with compact
+output, keys in sorted order. In debug mode, where Flask indents JSON
+responses, envelopes are built with `jsonify` as before.
 """
 
-from flask import jsonify
+import json
+from functools import partial
+from flask import current_app, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+# Maximum distinct error bodies kept encoded per application
+MAX_CACHED_ERROR_BODIES = 1024
+
+# Bytes of encoded items buffered before a streamed response yields a chunk
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# Envelope fragments; members are spliced between them in sorted key order
+_OPEN = b'{'
+_DATA_MEMBER = b'"data":'
+_STATUS_MEMBER = b'"status":"success"}\n'
+_MESSAGE_MEMBER = b'"message":'
+_PAGINATION_MEMBER = (
+    b'"pagination":{"has_next":%s,"has_prev":%s,"page":%d,"per_page":%d,'
+    b'"total_items":%d,"total_pages":%d},'
+)
+_BOOLEANS = {True: b'true', False: b'false'}
+_COMPACT = (',', ':')
+
+
+def _pretty_json():
+    """Check whether the app's JSON provider indents responses, as it does in debug mode."""
+    compact = getattr(current_app.json, 'compact', None)
+    return (compact is None and current_app.debug) or compact is False
+
+
+def _compact_encoder():
+    """Get a function encoding values as compact JSON text for the current app.
+    
+    With Flask's default provider, one JSONEncoder configured like the
+    provider is reused, rather than `json.dumps` creating one per call.
+    """
+    provider = current_app.json
+    cached = current_app.extensions.get('json_encoder')
+    if cached is not None and cached[0] is provider:
+        return cached[1]
+    
+    if type(provider) is DefaultJSONProvider:
+        encode = json.JSONEncoder(
+            default=provider.default,
+            ensure_ascii=provider.ensure_ascii,
+            sort_keys=provider.sort_keys,
+            separators=_COMPACT
+        ).encode
+    else:
+        encode = partial(provider.dumps, separators=_COMPACT)
+    current_app.extensions['json_encoder'] = (provider, encode)
+    return encode
+
+
+def encode_json(obj):
+    """Encode a value as compact JSON with the app's JSON provider.
+    
+    Args:
+        obj (Any): The value.
+    
+    Returns:
+        bytes: The encoded value.
+    """
+    return _compact_encoder()(obj).encode('utf-8')
+
+
+def envelope_response(data=None, members=b'', status_code=200, stream=False):
+    """Create a success response from pre-encoded envelope fragments.
+    
+    The payload is encoded on its own and spliced into the envelope with the
+    other top-level members, which callers pass already encoded. With
+    `stream`, the `data` array is encoded and sent item by item instead of
+    being held in memory as one encoded body.
+    
+    Args:
+        data (Any, optional): The payload; an iterable of items when streaming.
+            Defaults to None, which omits the data member.
+        members (bytes, optional): Encoded members sorting between "data"
+            and "status", each followed by a comma, such as
+            b'"message":"Success",'. Defaults to b''.
+        status_code (int, optional): HTTP status code. Defaults to 200.
+        stream (bool, optional): Whether to stream the data array. Defaults to False.
+    
+    Returns:
+        tuple: A tuple containing the response and status code.
+    """
+    if stream:
+        chunks = _stream_envelope(data, members, _compact_encoder())
+        return current_app.response_class(chunks, mimetype=current_app.json.mimetype), status_code
+    
+    if data is None:
+        body = b''.join((_OPEN, members, _STATUS_MEMBER))
+    else:
+        body = b''.join((_OPEN, _DATA_MEMBER, encode_json(data), b',', members, _STATUS_MEMBER))
+    return current_app.response_class(body, mimetype=current_app.json.mimetype), status_code
+
+
+def _stream_envelope(items, members, encode):
+    """Yield an envelope around a data array, encoding one item at a time."""
+    buffer = [_OPEN, _DATA_MEMBER, b'[']
+    size = 0
+    separator = b''
+    for item in items:
+        encoded = encode(item).encode('utf-8')
+        buffer.append(separator)
+        buffer.append(encoded)
+        separator = b','
+        size += len(encoded)
+        if size >= STREAM_CHUNK_SIZE:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    buffer.extend((b'],', members, _STATUS_MEMBER))
+    yield b''.join(buffer)
 
 
 def success_response(data=None, message="Success", status_code=200):
@@ -20,20 +137,26 @@ def success_response(data=None, message="Success", status_code=200):
     Returns:
         tuple: A tuple containing the response JSON and status code.
     """
-    response = {
-        'status': 'success',
-        'message': message
-    }
-    
-    if data is not None:
-        response['data'] = data
+    if _pretty_json():
+        response = {
+            'status': 'success',
+            'message': message
+        }
+        
+        if data is not None:
+            response['data'] = data
+        
+        return jsonify(response), status_code
     
-    return jsonify(response), status_code
+    return envelope_response(data, _MESSAGE_MEMBER + encode_json(message) + b',', status_code)
 
 
 def error_response(message="An error occurred", details=None, code=None, status_code=400):
     """Create a standardized error response.
     
+    Error bodies without details, or with a string as details, are encoded
+    once per application and reused, so repeated errors skip JSON encoding.
+    
     Args:
         message (str, optional): Error message. Defaults to "An error occurred".
         details (Any, optional): Additional error details. Defaults to None.
@@ -43,6 +166,14 @@ def error_response(message="An error occurred", details=None, code=None, status_
     Returns:
         tuple: A tuple containing the response JSON and status code.
     """
+    if details is None or isinstance(details, str):
+        return _encoded_error(message, details, code), status_code
+    
+    return jsonify(_error_payload(message, details, code)), status_code
+
+
+def _error_payload(message, details, code):
+    """Build the body of an error response."""
     response = {
         'status': 'error',
         'message': message
@@ -54,10 +185,23 @@ def error_response(message="An error occurred", details=None, code=None, status_
     if code is not None:
         response['code'] = code
     
-    return jsonify(response), status_code
+    return response
+
 
+def _encoded_error(message, details, code):
+    """Create an error response from a cached encoded body."""
+    bodies = current_app.extensions.setdefault('error_bodies', {})
+    key = (message, details, code)
+    body = bodies.get(key)
+    if body is None:
+        body = jsonify(_error_payload(message, details, code)).get_data()
+        # Messages can include request data, so the cache is bounded
+        if len(bodies) < MAX_CACHED_ERROR_BODIES:
+            bodies[key] = body
+    return current_app.response_class(body, mimetype=current_app.json.mimetype)
 
-def pagination_response(items, page, per_page, total):
+
+def pagination_response(items, page, per_page, total, stream=False):
     """Create a response for paginated results.
     
     Args:
@@ -65,6 +209,8 @@ def pagination_response(items, page, per_page, total):
         page (int): Current page number.
         per_page (int): Number of items per page.
         total (int): Total number of items.
+        stream (bool, optional): Whether to encode and send the items one at
+            a time. Defaults to False.
     
     Returns:
         tuple: A tuple containing the response JSON and status code.
@@ -74,6 +220,12 @@ def pagination_response(items, page, per_page, total):
     has_next = page < total_pages
     has_prev = page > 1
     
+    if not _pretty_json():
+        members = _PAGINATION_MEMBER % (
+            _BOOLEANS[has_next], _BOOLEANS[has_prev], page, per_page, total, total_pages
+        )
+        return envelope_response(items, members, stream=stream)
+    
     # Build response
     response = {
         'status': 'success',
@@ -0,0 +1,7 @@
+# benchmarks/__init__.py
+
+"""Benchmark package for the Flask application.
+
+This package contains the load-test harness and the data seeding helpers it
+shares with the micro-benchmarks.
+"""
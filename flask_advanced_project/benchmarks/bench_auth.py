@@ -0,0 +1,69 @@
+# benchmarks/bench_auth.py
+
+"""Micro-benchmarks for authentication and authorization overhead."""
+
+from flask_jwt_extended import jwt_required, get_jwt, decode_token
+
+from app.auth.authorization import Policy, authorize, admin_required
+
+# Admins, or the user named by the URL, as for profile routes
+_SELF_OR_ADMIN = Policy(roles=['admin'], owner_arg='user_id')
+
+
+@admin_required
+def _admin_view():
+    return 'ok'
+
+
+@authorize(_SELF_OR_ADMIN)
+def _profile_view(user_id):
+    return 'ok'
+
+
+@jwt_required()
+def _user_lookup_view():
+    # Role check as route code did before policies, after the user lookup
+    identity = get_jwt().get('sub', {})
+    return 'ok' if isinstance(identity, dict) and identity.get('role') == 'admin' else 'denied'
+
+
+def bench_admin_required(benchmark, bench_app, admin_token):
+    """Admin policy: token verification and a role check from the claims."""
+    headers = {'Authorization': f"Bearer {admin_token}"}
+    with bench_app.test_request_context('/api/products', headers=headers):
+        assert _admin_view() == 'ok'
+        benchmark(_admin_view)
+
+
+def bench_owner_policy(benchmark, bench_app, admin_token):
+    """Self-or-admin policy on a URL argument."""
+    headers = {'Authorization': f"Bearer {admin_token}"}
+    with bench_app.test_request_context('/api/users/x', headers=headers):
+        assert _profile_view(user_id='x') == 'ok'
+        benchmark(_profile_view, user_id='x')
+
+
+def bench_jwt_required_user_lookup(benchmark, bench_app, admin_token):
+    """jwt_required with the user lookup, the cost policies avoid."""
+    headers = {'Authorization': f"Bearer {admin_token}"}
+    with bench_app.test_request_context('/api/products', headers=headers):
+        assert _user_lookup_view() == 'ok'
+        benchmark(_user_lookup_view)
+
+
+def bench_decode_token_cached(benchmark, bench_app, admin_token):
+    """Token decoding served by the verified token cache."""
+    with bench_app.app_context():
+        decode_token(admin_token)
+        benchmark(decode_token, admin_token)
+
+
+def bench_decode_token_uncached(benchmark, bench_app, admin_token):
+    """Full token decoding and signature verification."""
+    with bench_app.app_context():
+        cache = bench_app.extensions.pop('token_cache', None)
+        try:
+            benchmark(decode_token, admin_token)
+        finally:
+            if cache is not None:
+                bench_app.extensions['token_cache'] = cache
@@ -0,0 +1,43 @@
+# benchmarks/bench_models.py
+
+"""Micro-benchmarks for model queries against the MongoDB stand-in."""
+
+from pymongo import MongoClient, ReadPreference
+
+from app.models.product import Product
+
+
+def bench_product_find(benchmark, app_context, seeded_products, page_size):
+    """BaseModel.find for a sorted first page of products."""
+    benchmark(Product.find, sort=[('created_at', -1)], limit=page_size)
+
+
+def bench_product_find_category(benchmark, app_context, seeded_products, page_size):
+    """BaseModel.find for a sorted first page filtered by category."""
+    benchmark(
+        Product.find,
+        filter_dict={'category': 'electronics'},
+        sort=[('created_at', -1)],
+        limit=page_size
+    )
+
+
+def bench_product_count(benchmark, app_context, seeded_products):
+    """BaseModel.count with a category filter."""
+    benchmark(Product.count, {'category': 'electronics'})
+
+
+def bench_get_collection(benchmark, app_context):
+    """BaseModel.get_collection returning the cached handle."""
+    benchmark(Product.get_collection)
+
+
+def bench_get_collection_variant(benchmark, app_context):
+    """BaseModel.get_collection for a cached read preference variant."""
+    benchmark(Product.get_collection, read_preference=ReadPreference.SECONDARY_PREFERRED)
+
+
+def bench_pymongo_collection_lookup(benchmark):
+    """Building a pymongo Collection per query, as database[name] does (no server needed)."""
+    database = MongoClient(connect=False)['bench']
+    benchmark(lambda: database[Product.collection_name])
@@ -0,0 +1,89 @@
+# benchmarks/bench_responses.py
+
+"""Micro-benchmarks for response building."""
+
+from flask import jsonify
+
+from app.models.product import ProductSchema
+from app.utils.response import success_response, pagination_response, error_response
+
+product_schema = ProductSchema()
+
+
+def bench_pagination_response(benchmark, app_context, product_documents):
+    """pagination_response over a serialized page."""
+    items = product_schema.dump(product_documents, many=True)
+    benchmark(pagination_response, items, 1, len(items), 10000)
+
+
+def bench_success_response(benchmark, app_context, product_document):
+    """success_response for a single serialized product."""
+    item = product_schema.dump(product_document)
+    benchmark(success_response, {'product': item})
+
+
+def bench_jsonify(benchmark, app_context, product_documents):
+    """Raw jsonify of a serialized page, including body encoding."""
+    items = product_schema.dump(product_documents, many=True)
+
+    def encode():
+        return jsonify({'status': 'success', 'data': items}).get_data()
+
+    benchmark(encode)
+
+
+def bench_error_response(benchmark, app_context):
+    """error_response for a repeated error, served from the encoded body cache."""
+    benchmark(error_response, "Product not found", code="not_found", status_code=404)
+
+
+def bench_error_response_jsonify(benchmark, app_context):
+    """The same error body encoded with jsonify on every call."""
+
+    def encode():
+        return jsonify({
+            'status': 'error',
+            'message': "Product not found",
+            'code': 'not_found'
+        }).get_data()
+
+    benchmark(encode)
+
+
+def _pagination_jsonify(items, page, per_page, total):
+    """The dict-building pagination response that envelopes replace."""
+    total_pages = (total // per_page) + (1 if total % per_page > 0 else 0)
+    return jsonify({
+        'status': 'success',
+        'data': items,
+        'pagination': {
+            'page': page,
+            'per_page': per_page,
+            'total_items': total,
+            'total_pages': total_pages,
+            'has_next': page < total_pages,
+            'has_prev': page > 1
+        }
+    })
+
+
+def bench_pagination_envelope(benchmark, app_context, compact_json, product_documents):
+    """pagination_response spliced from pre-encoded fragments, including body encoding."""
+    items = product_schema.dump(product_documents, many=True)
+    benchmark(lambda: pagination_response(items, 1, len(items), 10000)[0].get_data())
+
+
+def bench_pagination_envelope_stream(benchmark, app_context, compact_json, product_documents):
+    """Streamed pagination_response, encoding the items one at a time."""
+    items = product_schema.dump(product_documents, many=True)
+
+    def encode():
+        return b''.join(pagination_response(items, 1, len(items), 10000, stream=True)[0].response)
+
+    benchmark(encode)
+
+
+def bench_pagination_jsonify(benchmark, app_context, compact_json, product_documents):
+    """The same page built as nested dicts and encoded with jsonify."""
+    items = product_schema.dump(product_documents, many=True)
+    benchmark(lambda: _pagination_jsonify(items, 1, len(items), 10000).get_data())
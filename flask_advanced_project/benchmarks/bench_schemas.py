@@ -0,0 +1,101 @@
+# benchmarks/bench_schemas.py
+
+"""Micro-benchmarks for marshmallow schema hot paths."""
+
+from app.models.product import ProductSchema
+from app.models.user import UserSchema
+
+product_schema = ProductSchema()
+user_schema = UserSchema()
+
+
+def _product_payload(document):
+    """Build a create-product payload from a stored document."""
+    payload = product_schema.dump(document)
+    for key in ('id', 'created_at', 'updated_at', 'version'):
+        payload.pop(key, None)
+    return payload
+
+
+def bench_product_dump(benchmark, product_documents):
+    """ProductSchema.dump over a page of products."""
+    benchmark(product_schema.dump, product_documents, many=True)
+
+
+def bench_product_load(benchmark, product_documents):
+    """ProductSchema.load over a page of create payloads."""
+    payloads = [_product_payload(document) for document in product_documents]
+    benchmark(product_schema.load, payloads, many=True)
+
+
+def _price_changes(document):
+    """Build a partial update payload touching two product fields."""
+    return {'price': document['price'] + 1, 'inventory': document['inventory'] + 1}
+
+
+def bench_product_partial_load(benchmark, product_documents):
+    """ProductSchema.load_partial over a page of two-field updates."""
+    payloads = [_price_changes(document) for document in product_documents]
+
+    def load():
+        for payload in payloads:
+            ProductSchema.load_partial(payload)
+
+    benchmark(load)
+
+
+def bench_product_partial_load_uncached(benchmark, product_documents):
+    """A fresh ProductSchema(partial=True) per update, for comparison."""
+    payloads = [_price_changes(document) for document in product_documents]
+
+    def load():
+        for payload in payloads:
+            ProductSchema(only=tuple(payload), partial=True).load(payload)
+
+    benchmark(load)
+
+
+def bench_product_full_load_for_update(benchmark, product_documents):
+    """Full ProductSchema.load of each updated product, for comparison."""
+    payloads = [
+        dict(_product_payload(document), **_price_changes(document))
+        for document in product_documents
+    ]
+
+    def load():
+        for payload in payloads:
+            product_schema.load(payload)
+
+    benchmark(load)
+
+
+def bench_user_pre_load(benchmark, page_size):
+    """UserSchema pre_load normalization of email and username."""
+    payloads = [
+        {
+            'username': f"  User{index}  ",
+            'email': f"  User{index}@Example.COM ",
+            'password': 'benchmark-password',
+            'full_name': f"User {index}"
+        }
+        for index in range(page_size)
+    ]
+
+    def normalize():
+        for payload in payloads:
+            user_schema.process_input(dict(payload))
+
+    benchmark(normalize)
+
+
+def bench_user_load(benchmark, page_size):
+    """UserSchema.load, including pre_load normalization and validation."""
+    payloads = [
+        {
+            'username': f"User{index}",
+            'email': f"User{index}@Example.com",
+            'password': 'benchmark-password'
+        }
+        for index in range(page_size)
+    ]
+    benchmark(user_schema.load, payloads, many=True)
@@ -0,0 +1,89 @@
+# benchmarks/conftest.py
+
+"""Shared fixtures for the micro-benchmarks.
+
+Micro-benchmarks run against an in-process MongoDB stand-in and are
+parametrized by document width (extra tags and description words) and page
+size, the two dimensions that drive serialization cost.
+"""
+
+import random
+import pytest
+
+from benchmarks.seed import create_bench_app, make_product, seed_products, seed_users
+
+# Document widths and page sizes every relevant benchmark is parametrized by
+WIDTHS = [0, 5, 20]
+PAGE_SIZES = [20, 100]
+
+
+@pytest.fixture(scope='session')
+def bench_app():
+    """Application backed by the MongoDB stand-in, shared by all benchmarks."""
+    return create_bench_app()
+
+
+@pytest.fixture
+def app_context(bench_app):
+    """Push an application context for the duration of a benchmark."""
+    with bench_app.app_context() as context:
+        yield context
+
+
+@pytest.fixture
+def compact_json(bench_app):
+    """Encode JSON responses compactly, as in production, for one benchmark.
+
+    The testing configuration runs in debug mode, where Flask indents JSON.
+    """
+    bench_app.json.compact = True
+    yield
+    bench_app.json.compact = None
+
+
+@pytest.fixture(params=WIDTHS, ids=lambda width: f"width{width}")
+def width(request):
+    """Document width parameter."""
+    return request.param
+
+
+@pytest.fixture(params=PAGE_SIZES, ids=lambda size: f"page{size}")
+def page_size(request):
+    """Page size parameter."""
+    return request.param
+
+
+@pytest.fixture
+def product_documents(width, page_size):
+    """A page of raw product documents of the requested width."""
+    rng = random.Random(width)
+    return [make_product(rng, index, width) for index in range(page_size)]
+
+
+@pytest.fixture
+def product_document(width):
+    """A single raw product document of the requested width."""
+    return make_product(random.Random(width), 0, width)
+
+
+@pytest.fixture
+def seeded_products(bench_app, width):
+    """Products collection seeded with documents of the requested width."""
+    from app.models.product import Product
+
+    with bench_app.app_context():
+        Product.get_collection().delete_many({})
+        seed_products(500, seed=width, width=width)
+    yield
+    with bench_app.app_context():
+        Product.get_collection().delete_many({})
+
+
+@pytest.fixture(scope='session')
+def admin_token(bench_app):
+    """Access token for a seeded admin user."""
+    from flask_jwt_extended import create_access_token
+
+    with bench_app.app_context():
+        admin = seed_users(1, admins=1)[0]
+        return create_access_token(identity=admin)
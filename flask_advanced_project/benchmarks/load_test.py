@@ -0,0 +1,344 @@
+# benchmarks/load_test.py
+
+"""Load-test harness for the REST API.
+
+This script seeds the in-memory storage backend with users and products, drives the
+Flask application with concurrent clients through a set of scenarios and
+reports throughput and latency percentiles as JSON. Reports can be compared
+against a baseline to catch regressions between commits.
+
+Usage:
+    python -m benchmarks.load_test --users 200 --products 5000 \\
+        --concurrency 8 --requests 2000 --output results.json
+    python -m benchmarks.load_test --baseline results.json --max-regression 0.10
+    DATABASE_BACKEND=mongo python -m benchmarks.load_test  # against MongoDB
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from benchmarks.seed import BENCH_PASSWORD, WORDS, create_bench_app, seed_products, seed_users
+
+
+def percentile(sorted_values, fraction):
+    """Get a percentile from sorted values using the nearest-rank method.
+
+    Args:
+        sorted_values (list): Values sorted in ascending order.
+        fraction (float): The percentile as a fraction (0.95 for p95).
+
+    Returns:
+        float: The percentile value, or 0.0 for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def build_scenarios(context, depths):
+    """Build the scenario table.
+
+    Each scenario is a function that takes a random generator and returns the
+    request to send as (method, path, json_body, headers).
+
+    Args:
+        context (dict): Seeded IDs, users and tokens.
+        depths (list): Page numbers to exercise for list scenarios.
+
+    Returns:
+        dict: Scenario names mapped to request factories.
+    """
+    product_ids = context['product_ids']
+    users = context['users']
+    tokens = context['tokens']
+
+    scenarios = {}
+
+    for depth in depths:
+        scenarios[f"list_page_{depth}"] = (
+            lambda rng, depth=depth: ('GET', f"/api/products?page={depth}&per_page=20", None, None)
+        )
+
+    def list_category(rng):
+        from app.models.product import Product
+        category = rng.choice(Product.CATEGORIES)
+        return 'GET', f"/api/products?category={category}&active=true", None, None
+
+    def facets(rng):
+        return 'GET', '/api/products/facets', None, None
+
+    def search(rng):
+        return 'GET', f"/api/products/search?q={rng.choice(WORDS)}", None, None
+
+    def get_by_id(rng):
+        return 'GET', f"/api/products/{rng.choice(product_ids)}", None, None
+
+    def login_burst(rng):
+        user = rng.choice(users)
+        return 'POST', '/api/auth/login', {
+            'username': user['username'],
+            'password': BENCH_PASSWORD
+        }, None
+
+    def authenticated_read(rng):
+        index = rng.randrange(len(users))
+        headers = {'Authorization': f"Bearer {tokens[index]}"}
+        if rng.random() < 0.5:
+            return 'GET', '/api/auth/me', None, headers
+        return 'GET', f"/api/users/{users[index]['_id']}", None, headers
+
+    scenarios.update({
+        'list_category': list_category,
+        'facets': facets,
+        'search': search,
+        'get_by_id': get_by_id,
+        'login_burst': login_burst,
+        'authenticated_read': authenticated_read
+    })
+    return scenarios
+
+
+def run_scenario(app, factory, total_requests, concurrency, seed, headers):
+    """Run one scenario with concurrent clients.
+
+    Args:
+        app (Flask): The Flask application instance.
+        factory (function): The scenario's request factory.
+        total_requests (int): Number of requests to send.
+        concurrency (int): Number of concurrent clients.
+        seed (int): Random seed for the scenario.
+        headers (dict): Headers sent with every request.
+
+    Returns:
+        dict: Throughput, latency percentiles and status counts.
+    """
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    per_worker = [total_requests // concurrency] * concurrency
+    for index in range(total_requests % concurrency):
+        per_worker[index] += 1
+
+    def worker(worker_index):
+        rng = random.Random(seed * 1000 + worker_index)
+        client = app.test_client()
+        local_latencies = []
+        local_statuses = {}
+        for _ in range(per_worker[worker_index]):
+            method, path, body, extra_headers = factory(rng)
+            request_headers = dict(headers)
+            if extra_headers:
+                request_headers.update(extra_headers)
+            started = time.perf_counter()
+            response = client.open(path, method=method, json=body, headers=request_headers)
+            response.get_data()
+            local_latencies.append((time.perf_counter() - started) * 1000)
+            local_statuses[response.status_code] = local_statuses.get(response.status_code, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'duration_s': round(elapsed, 4),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            'p50': round(percentile(latencies, 0.50), 3),
+            'p90': round(percentile(latencies, 0.90), 3),
+            'p95': round(percentile(latencies, 0.95), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+            'max': round(latencies[-1], 3) if latencies else 0.0
+        }
+    }
+
+
+def prepare(app, args):
+    """Seed the in-memory database and issue tokens for authenticated scenarios.
+
+    Args:
+        app (Flask): The Flask application instance.
+        args (Namespace): Parsed command-line arguments.
+
+    Returns:
+        dict: Seeded product IDs, users and access tokens.
+    """
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        product_ids = seed_products(args.products, seed=args.seed, width=args.width)
+        users = seed_users(args.users)
+        tokens = [create_access_token(identity=user) for user in users]
+
+    return {'product_ids': product_ids, 'users': users, 'tokens': tokens}
+
+
+def git_commit():
+    """Get the current git commit, if available.
+
+    Returns:
+        str or None: The abbreviated commit hash.
+    """
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, max_regression):
+    """Compare a report against a baseline report.
+
+    A scenario regresses when its p95 latency grows, or its throughput drops,
+    by more than the allowed fraction.
+
+    Args:
+        report (dict): The current report.
+        baseline (dict): The baseline report.
+        max_regression (float): Allowed relative regression (0.10 for 10%).
+
+    Returns:
+        list: Human-readable descriptions of the regressions found.
+    """
+    regressions = []
+    for name, current in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+
+        old_p95 = previous['latency_ms']['p95']
+        new_p95 = current['latency_ms']['p95']
+        if old_p95 and new_p95 > old_p95 * (1 + max_regression):
+            regressions.append(f"{name}: p95 {old_p95:.2f}ms -> {new_p95:.2f}ms")
+
+        old_rps = previous['throughput_rps']
+        new_rps = current['throughput_rps']
+        if old_rps and new_rps < old_rps * (1 - max_regression):
+            regressions.append(f"{name}: throughput {old_rps:.1f}/s -> {new_rps:.1f}/s")
+    return regressions
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments.
+
+    Args:
+        argv (list, optional): Arguments to parse. Defaults to sys.argv.
+
+    Returns:
+        Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Load-test the REST API.")
+    parser.add_argument('--users', type=int, default=100, help="users to seed")
+    parser.add_argument('--products', type=int, default=2000, help="products to seed")
+    parser.add_argument('--width', type=int, default=0, help="extra product document width")
+    parser.add_argument('--concurrency', type=int, default=8, help="concurrent clients")
+    parser.add_argument('--requests', type=int, default=1000, help="requests per scenario")
+    parser.add_argument('--warmup', type=int, default=50, help="warmup requests per scenario")
+    parser.add_argument('--depths', default='1,10,50', help="comma-separated list page depths")
+    parser.add_argument('--scenarios', default='', help="comma-separated scenarios to run (default: all)")
+    parser.add_argument('--accept-encoding', default='', help="Accept-Encoding header to send")
+    parser.add_argument('--seed', type=int, default=42, help="random seed")
+    parser.add_argument('--output', help="write the JSON report to this file")
+    parser.add_argument('--baseline', help="baseline report to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.10,
+                        help="allowed relative regression before failing")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the load test.
+
+    Args:
+        argv (list, optional): Command-line arguments. Defaults to sys.argv.
+
+    Returns:
+        int: The process exit code (1 if regressions were found).
+    """
+    args = parse_args(argv)
+    app = create_bench_app()
+    context = prepare(app, args)
+
+    depths = [int(depth) for depth in args.depths.split(',') if depth.strip()]
+    scenarios = build_scenarios(context, depths)
+    if args.scenarios:
+        selected = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+        scenarios = {name: scenarios[name] for name in selected}
+
+    headers = {}
+    if args.accept_encoding:
+        headers['Accept-Encoding'] = args.accept_encoding
+
+    results = {}
+    for index, (name, factory) in enumerate(scenarios.items()):
+        if args.warmup:
+            run_scenario(app, factory, args.warmup, 1, args.seed + index, headers)
+        results[name] = run_scenario(
+            app, factory, args.requests, args.concurrency, args.seed + index, headers
+        )
+        print(
+            f"{name:<22} {results[name]['throughput_rps']:>9.1f} req/s  "
+            f"p50 {results[name]['latency_ms']['p50']:>8.2f}ms  "
+            f"p95 {results[name]['latency_ms']['p95']:>8.2f}ms  "
+            f"errors {results[name]['errors']}",
+            file=sys.stderr
+        )
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': {
+                'users': args.users,
+                'products': args.products,
+                'width': args.width,
+                'concurrency': args.concurrency,
+                'requests': args.requests,
+                'seed': args.seed,
+                'accept_encoding': args.accept_encoding
+            }
+        },
+        'scenarios': results
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        regressions = compare(report, baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
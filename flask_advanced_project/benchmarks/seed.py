@@ -0,0 +1,134 @@
+# benchmarks/seed.py
+
+"""Data seeding helpers for benchmarks.
+
+This module creates an application backed by the in-memory storage backend and
+fills it with deterministic users and products, so benchmark runs are
+reproducible and do not require a MongoDB server.
+"""
+
+import random
+from datetime import datetime, timedelta
+from bson import ObjectId
+
+from app import create_app
+
+# Password shared by every seeded user
+BENCH_PASSWORD = 'benchmark-password'
+
+# Vocabulary used to build product names, descriptions and search queries
+WORDS = [
+    'wireless', 'portable', 'premium', 'classic', 'compact', 'organic',
+    'vintage', 'smart', 'ultra', 'eco', 'deluxe', 'pro', 'mini', 'max',
+    'speaker', 'jacket', 'lamp', 'novel', 'racket', 'coffee', 'serum',
+    'puzzle', 'vitamin', 'charger', 'backpack', 'blender', 'headphones'
+]
+
+
+def create_bench_app():
+    """Create a testing application backed by the in-process MongoDB stand-in.
+
+    Returns:
+        Flask: The configured Flask application instance.
+    """
+    return create_app('testing')
+
+
+def make_product(rng, index, width=0, created_at=None):
+    """Build a product document.
+
+    Args:
+        rng (random.Random): The random generator to draw from.
+        index (int): The product index, used to build unique values.
+        width (int, optional): Number of extra tags and description words,
+            used to vary document size. Defaults to 0.
+        created_at (datetime, optional): Creation timestamp. Defaults to now.
+
+    Returns:
+        dict: The product document.
+    """
+    from app.models.product import Product
+
+    created_at = created_at or datetime.utcnow()
+    name_words = rng.sample(WORDS, 3)
+    description_words = [rng.choice(WORDS) for _ in range(20 + width * 10)]
+
+    return {
+        '_id': ObjectId(),
+        'name': f"{' '.join(name_words).title()} {index}",
+        'description': ' '.join(description_words),
+        'price': round(rng.uniform(1, 1000), 2),
+        'category': rng.choice(Product.CATEGORIES),
+        'sku': f"SKU-{index:08d}",
+        'image_url': f"https://cdn.example.com/products/{index}.jpg",
+        'inventory': rng.randint(0, 500),
+        'tags': rng.sample(WORDS, min(len(WORDS), 3 + width)),
+        'active': rng.random() > 0.1,
+        'created_at': created_at,
+        'updated_at': created_at,
+        'deleted_at': None
+    }
+
+
+def seed_products(count, seed=0, width=0):
+    """Insert deterministic products into the current application's database.
+
+    Must be called inside an application context.
+
+    Args:
+        count (int): Number of products to insert.
+        seed (int, optional): Random seed. Defaults to 0.
+        width (int, optional): Extra document width. Defaults to 0.
+
+    Returns:
+        list: The inserted product IDs, newest first.
+    """
+    from app.models.product import Product
+
+    rng = random.Random(seed)
+    start = datetime.utcnow() - timedelta(seconds=count)
+    documents = [
+        make_product(rng, index, width, start + timedelta(seconds=index))
+        for index in range(count)
+    ]
+    if documents:
+        Product.get_collection().insert_many(documents)
+    return [document['_id'] for document in reversed(documents)]
+
+
+def seed_users(count, admins=1):
+    """Insert users sharing the benchmark password.
+
+    The password is hashed once and reused, so seeding stays fast even with
+    expensive bcrypt settings. Must be called inside an application context.
+
+    Args:
+        count (int): Number of users to insert.
+        admins (int, optional): How many of them are admins. Defaults to 1.
+
+    Returns:
+        list: The inserted user documents.
+    """
+    from app.models.user import User
+
+    password_hash = User.hash_password(BENCH_PASSWORD)
+    now = datetime.utcnow()
+    documents = [
+        {
+            '_id': ObjectId(),
+            'username': f"user{index}",
+            'email': f"user{index}@example.com",
+            'password': password_hash,
+            'full_name': f"Benchmark User {index}",
+            'role': 'admin' if index < admins else 'user',
+            'active': True,
+            'last_login': None,
+            'created_at': now,
+            'updated_at': now,
+            'deleted_at': None
+        }
+        for index in range(count)
+    ]
+    if documents:
+        User.get_collection().insert_many(documents)
+    return documents
@@ -0,0 +1,61 @@
+# tests/conftest.py
+
+"""Shared fixtures for the test suite.
+
+Tests run against the testing configuration, which is backed by the
+in-process MongoDB stand-in, so every test gets a fresh database.
+"""
+
+import pytest
+
+from app import create_app
+
+PASSWORD = 'Password123!'
+
+
+def auth_headers(client, email, password=PASSWORD):
+    """Log in and build the Authorization header of the user's access token."""
+    response = client.post('/api/auth/login', json={'email': email, 'password': password})
+    assert response.status_code == 200, response.json
+    return {'Authorization': f"Bearer {response.json['data']['access_token']}"}
+
+
+@pytest.fixture
+def app():
+    """Application with an empty in-memory database."""
+    return create_app('testing')
+
+
+@pytest.fixture
+def client(app):
+    """Test client of the application."""
+    return app.test_client()
+
+
+@pytest.fixture
+def user(client):
+    """Register a user and return their credentials, ID and auth headers."""
+    credentials = {'username': 'alice', 'email': 'alice@example.com', 'password': PASSWORD}
+    response = client.post('/api/auth/register', json=credentials)
+    assert response.status_code == 201, response.json
+    return dict(
+        credentials,
+        id=response.json['data']['user']['id'],
+        headers={'Authorization': f"Bearer {response.json['data']['access_token']}"}
+    )
+
+
+@pytest.fixture
+def admin(app, client):
+    """Create an admin and return their ID and auth headers."""
+    from app.models.user import User
+
+    with app.app_context():
+        document = User.create({
+            'username': 'root',
+            'email': 'root@example.com',
+            'password': User.hash_password(PASSWORD),
+            'role': 'admin',
+            'active': True
+        })
+    return {'id': str(document['_id']), 'headers': auth_headers(client, 'root@example.com')}
@@ -0,0 +1,82 @@
+# tests/integration/test_conditional_updates.py
+
+"""Integration tests for conditional updates with If-Match and versions."""
+
+import pytest
+
+from app.models.base_model import VersionConflict
+from app.models.product import Product
+
+
+@pytest.fixture
+def product(app):
+    with app.app_context():
+        return Product.create({'name': 'Lamp', 'price': 20.0, 'category': 'home', 'inventory': 10, 'active': True})
+
+
+def put_product(client, admin, product, if_match=None, name='Desk lamp'):
+    headers = dict(admin['headers'])
+    if if_match is not None:
+        headers['If-Match'] = if_match
+    return client.put(f"/api/products/{product['_id']}", json={'name': name}, headers=headers)
+
+
+def test_matching_if_match_bumps_version(client, admin, product):
+    response = put_product(client, admin, product, if_match='"1"')
+
+    assert response.status_code == 200
+    assert response.json['data']['product']['version'] == 2
+    assert response.headers['ETag'] == '"2"'
+
+
+def test_stale_if_match_returns_412_with_current_etag(client, admin, product):
+    put_product(client, admin, product, if_match='"1"')
+
+    response = put_product(client, admin, product, if_match='"1"', name='Floor lamp')
+
+    assert response.status_code == 412
+    assert response.json['code'] == 'version_conflict'
+    assert response.json['details']['current_version'] == 2
+    assert response.headers['ETag'] == '"2"'
+
+
+def test_weak_if_match_returns_412(client, admin, product):
+    response = put_product(client, admin, product, if_match='W/"1"')
+
+    assert response.status_code == 412
+    assert response.headers['ETag'] == '"1"'
+
+
+@pytest.mark.parametrize('if_match', ['"one"', '"1", "2"'])
+def test_malformed_if_match_returns_400(client, admin, product, if_match):
+    response = put_product(client, admin, product, if_match=if_match)
+
+    assert response.status_code == 400
+    assert response.json['code'] == 'invalid_precondition'
+
+
+def test_update_with_retry_retries_after_conflict(app, product):
+    calls = []
+
+    def mutate(document):
+        calls.append(document['version'])
+        if len(calls) == 1:
+            # Another writer updates the product between the read and the write
+            Product.update(product['_id'], {'inventory': 5})
+        return {'inventory': document['inventory'] + 1}
+
+    with app.app_context():
+        updated = Product.update_with_retry(product['_id'], mutate)
+
+    assert calls == [1, 2]
+    assert updated['inventory'] == 6
+    assert updated['version'] == 3
+
+
+def test_update_with_retry_gives_up_after_retries(app, product):
+    def mutate(document):
+        Product.update(product['_id'], {'inventory': document['inventory'] + 1})
+        return {'name': 'Desk lamp'}
+
+    with app.app_context(), pytest.raises(VersionConflict):
+        Product.update_with_retry(product['_id'], mutate, retries=2)
@@ -0,0 +1,144 @@
+# tests/integration/test_jwt_keys.py
+
+"""Integration tests for asymmetric token signing and the published key set."""
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from flask_jwt_extended import decode_token
+
+from app import create_app
+from app.auth.keys import generate_key
+from app.config.testing import TestingConfig
+from tests.conftest import PASSWORD
+
+
+def write_key(directory, key, public_only=False):
+    """Store a key the way load_keys expects it."""
+    if public_only:
+        path = directory / f"{key.kid}.pub.pem"
+        data = key.public_key.public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+    else:
+        path = directory / f"{key.kid}.pem"
+        data = key.private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+    path.write_bytes(data)
+
+
+@pytest.fixture
+def keys_dir(tmp_path):
+    return tmp_path
+
+
+@pytest.fixture
+def make_app(keys_dir, monkeypatch):
+    """Create applications signing with the keys stored in keys_dir."""
+    def make_app(algorithm):
+        monkeypatch.setattr(TestingConfig, 'JWT_ALGORITHM', algorithm)
+        monkeypatch.setattr(TestingConfig, 'JWT_KEYS_DIR', str(keys_dir))
+        monkeypatch.setattr(TestingConfig, 'JWT_ACTIVE_KID', None)
+        return create_app('testing')
+    return make_app
+
+
+def register(client):
+    credentials = {'username': 'alice', 'email': 'alice@example.com', 'password': PASSWORD}
+    response = client.post('/api/auth/register', json=credentials)
+    assert response.status_code == 201, response.json
+    return response.json['data']['access_token']
+
+
+def me(client, token):
+    return client.get('/api/auth/me', headers={'Authorization': f"Bearer {token}"})
+
+
+def resign(app, token, key):
+    """Sign the claims of a token with another key."""
+    with app.app_context():
+        claims = decode_token(token)
+    return jwt.encode(claims, key.private_key, algorithm=key.algorithm, headers={'kid': key.kid})
+
+
+@pytest.mark.parametrize('algorithm', ['RS256', 'EdDSA'])
+def test_tokens_are_signed_with_the_active_key(make_app, keys_dir, algorithm):
+    write_key(keys_dir, generate_key(algorithm, kid='a'))
+    write_key(keys_dir, generate_key(algorithm, kid='b'))
+    app = make_app(algorithm)
+    client = app.test_client()
+
+    token = register(client)
+
+    assert jwt.get_unverified_header(token) == {'alg': algorithm, 'kid': 'b', 'typ': 'JWT'}
+    assert me(client, token).status_code == 200
+
+
+@pytest.mark.parametrize('algorithm', ['RS256', 'EdDSA'])
+def test_jwks_publishes_public_keys(make_app, keys_dir, algorithm):
+    write_key(keys_dir, generate_key(algorithm, kid='current'))
+    write_key(keys_dir, generate_key(algorithm, kid='retired'), public_only=True)
+    client = make_app(algorithm).test_client()
+
+    response = client.get('/.well-known/jwks.json')
+
+    assert response.status_code == 200
+    assert response.cache_control.public
+    assert response.cache_control.max_age == TestingConfig.JWKS_MAX_AGE
+    keys = response.json['keys']
+    assert [(key['kid'], key['alg'], key['use']) for key in keys] == \
+        [('current', algorithm, 'sig'), ('retired', algorithm, 'sig')]
+    assert all('d' not in key for key in keys)
+
+    etag, _ = response.get_etag()
+    cached = client.get('/.well-known/jwks.json', headers={'If-None-Match': f'"{etag}"'})
+    assert cached.status_code == 304
+    assert cached.data == b''
+
+
+def test_jwks_is_unavailable_with_a_shared_secret(client):
+    response = client.get('/.well-known/jwks.json')
+
+    assert response.status_code == 404
+    assert response.json['code'] == 'jwks_unavailable'
+
+
+def test_retired_key_still_verifies_its_tokens(make_app, keys_dir):
+    retired = generate_key('RS256', kid='a')
+    write_key(keys_dir, retired, public_only=True)
+    write_key(keys_dir, generate_key('EdDSA', kid='b'))
+    app = make_app('EdDSA')
+    client = app.test_client()
+    token = register(client)
+
+    response = me(client, resign(app, token, retired))
+
+    assert response.status_code == 200
+    assert response.json['data']['user']['email'] == 'alice@example.com'
+
+
+def test_unknown_kid_is_rejected(make_app, keys_dir):
+    write_key(keys_dir, generate_key('RS256', kid='a'))
+    app = make_app('RS256')
+    client = app.test_client()
+    token = register(client)
+
+    response = me(client, resign(app, token, generate_key('RS256', kid='stranger')))
+
+    assert response.status_code == 401
+    assert response.json['code'] == 'invalid_token'
+
+
+def test_key_must_use_the_token_algorithm(make_app, keys_dir):
+    key = generate_key('RS256', kid='a')
+    write_key(keys_dir, key)
+    app = make_app('RS256')
+    client = app.test_client()
+    token = register(client)
+
+    with app.app_context():
+        claims = decode_token(token)
+    forged = jwt.encode(claims, key.private_key, algorithm='RS512', headers={'kid': 'a'})
+
+    assert me(client, forged).status_code == 401
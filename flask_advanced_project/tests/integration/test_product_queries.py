@@ -0,0 +1,25 @@
+# tests/integration/test_product_queries.py
+
+"""Integration tests for the product list and search query arguments."""
+
+import pytest
+
+
+@pytest.mark.parametrize('query, code', [
+    ('page=x', 'invalid_query'),
+    ('min_price=abc', 'invalid_query'),
+    ('category=books&sort=price', 'unindexed_query'),
+])
+def test_list_rejects_bad_arguments(client, query, code):
+    response = client.get(f"/api/products?{query}")
+
+    assert response.status_code == 400
+    assert response.json['code'] == code
+
+
+@pytest.mark.parametrize('query', ['page=x', 'per_page=-1', 'min_price=abc', 'max_price=nan'])
+def test_search_rejects_bad_arguments(client, query):
+    response = client.get(f"/api/products/search?q=lamp&{query}")
+
+    assert response.status_code == 400
+    assert response.json['code'] == 'invalid_query'
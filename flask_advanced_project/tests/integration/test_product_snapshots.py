@@ -0,0 +1,113 @@
+# tests/integration/test_product_snapshots.py
+
+"""Integration tests for the pre-rendered product list pages."""
+
+import pytest
+
+from app.models.product import Product
+
+
+@pytest.fixture
+def products(app):
+    """25 products, alternating between two categories."""
+    with app.app_context():
+        return [
+            Product.create({
+                'name': f"Product {index}",
+                'price': 10.0 + index,
+                'category': 'books' if index % 2 else 'toys',
+                'inventory': 5,
+                'active': True
+            })
+            for index in range(25)
+        ]
+
+
+@pytest.fixture
+def snapshots(app):
+    return app.extensions['product_snapshots']
+
+
+def list_page(app, client, query=''):
+    """Get a list page from the snapshot and again by querying the database."""
+    served = client.get(f"/api/products{query}")
+    snapshots = app.extensions.pop('product_snapshots')
+    try:
+        queried = client.get(f"/api/products{query}")
+    finally:
+        app.extensions['product_snapshots'] = snapshots
+    assert served.status_code == queried.status_code == 200
+    return served, queried
+
+
+@pytest.mark.parametrize('query', ['', '?page=2', '?category=books', '?category=toys&active=true'])
+def test_snapshot_page_matches_queried_page(app, client, products, snapshots, query):
+    served, queried = list_page(app, client, query)
+
+    assert served.get_data() == queried.get_data()
+    assert snapshots._snapshots
+
+
+def test_create_invalidates_snapshot(app, client, products):
+    list_page(app, client, '?category=books')
+    with app.app_context():
+        created = Product.create({'name': 'New book', 'price': 5.0, 'category': 'books', 'inventory': 1, 'active': True})
+
+    served, queried = list_page(app, client, '?category=books')
+
+    assert served.get_data() == queried.get_data()
+    assert served.json['data'][0]['id'] == str(created['_id'])
+    assert served.json['pagination']['total_items'] == 13
+
+
+def test_delete_invalidates_snapshot(app, client, products):
+    list_page(app, client)
+    with app.app_context():
+        Product.delete(products[-1]['_id'])
+
+    served, queried = list_page(app, client)
+
+    assert served.get_data() == queried.get_data()
+    assert served.json['pagination']['total_items'] == 24
+    assert str(products[-1]['_id']) not in [item['id'] for item in served.json['data']]
+
+
+def test_category_change_invalidates_snapshots(app, client, products):
+    list_page(app, client, '?category=books')
+    list_page(app, client, '?category=toys')
+    moved = next(product for product in products if product['category'] == 'books')
+    with app.app_context():
+        Product.update(moved['_id'], {'category': 'toys'})
+
+    books, queried_books = list_page(app, client, '?category=books')
+    toys, queried_toys = list_page(app, client, '?category=toys')
+
+    assert books.get_data() == queried_books.get_data()
+    assert toys.get_data() == queried_toys.get_data()
+    assert books.json['pagination']['total_items'] == 11
+    assert toys.json['pagination']['total_items'] == 14
+
+
+def test_update_patches_listed_product(app, client, products):
+    list_page(app, client)
+    with app.app_context():
+        Product.update(products[-1]['_id'], {'name': 'Renamed'})
+
+    served, queried = list_page(app, client)
+
+    assert served.get_data() == queried.get_data()
+    assert served.json['data'][0]['name'] == 'Renamed'
+
+
+def test_patch_with_older_version_is_ignored(app, client, products, snapshots):
+    list_page(app, client)
+    with app.app_context():
+        stale = Product.find_by_id(products[-1]['_id'])
+        Product.update(products[-1]['_id'], {'name': 'Newest'})
+    before = client.get('/api/products').get_data()
+
+    # A listener of an earlier write running after the later one
+    snapshots._patch((None, False), dict(stale, name='Stale'))
+
+    assert client.get('/api/products').get_data() == before
+    assert client.get('/api/products').json['data'][0]['name'] == 'Newest'
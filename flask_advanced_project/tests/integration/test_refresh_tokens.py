@@ -0,0 +1,82 @@
+# tests/integration/test_refresh_tokens.py
+
+"""Integration tests for refresh token rotation and revocation."""
+
+from flask_jwt_extended import create_refresh_token
+
+from app.models.user import User
+from tests.conftest import PASSWORD
+
+
+def login(client, user):
+    response = client.post('/api/auth/login', json={'email': user['email'], 'password': user['password']})
+    assert response.status_code == 200, response.json
+    return response.json['data']
+
+
+def refresh(client, refresh_token):
+    return client.post('/api/auth/refresh', headers={'Authorization': f"Bearer {refresh_token}"})
+
+
+def legacy_refresh_token(app, user):
+    """Issue a refresh token the way it was issued before token families."""
+    with app.app_context():
+        return create_refresh_token(identity=User.find_by_email(user['email']))
+
+
+def test_refresh_rotates_tokens(client, user):
+    tokens = login(client, user)
+
+    response = refresh(client, tokens['refresh_token'])
+
+    assert response.status_code == 200
+    assert response.json['data']['refresh_token'] != tokens['refresh_token']
+    assert refresh(client, response.json['data']['refresh_token']).status_code == 200
+
+
+def test_reused_refresh_token_revokes_family(client, user):
+    tokens = login(client, user)
+    rotated = refresh(client, tokens['refresh_token']).json['data']
+
+    response = refresh(client, tokens['refresh_token'])
+
+    assert response.status_code == 401
+    assert response.json['code'] == 'refresh_token_reused'
+    assert refresh(client, rotated['refresh_token']).json['code'] == 'refresh_token_revoked'
+
+
+def test_logout_revokes_refresh_token(client, user):
+    tokens = login(client, user)
+
+    response = client.post('/api/auth/logout', headers={'Authorization': f"Bearer {tokens['access_token']}"})
+
+    assert response.status_code == 200
+    assert refresh(client, tokens['refresh_token']).json['code'] == 'refresh_token_revoked'
+
+
+def test_password_change_revokes_refresh_tokens(app, client, user):
+    tokens = login(client, user)
+    other = login(client, user)
+    legacy = legacy_refresh_token(app, user)
+
+    response = client.put(
+        '/api/auth/password',
+        json={'current_password': PASSWORD, 'new_password': 'NewPassword123!'},
+        headers={'Authorization': f"Bearer {tokens['access_token']}"}
+    )
+
+    assert response.status_code == 200
+    assert refresh(client, other['refresh_token']).json['code'] == 'refresh_token_revoked'
+    assert refresh(client, legacy).json['code'] == 'refresh_token_revoked'
+
+
+def test_legacy_refresh_token_starts_family_once(app, client, user):
+    legacy = legacy_refresh_token(app, user)
+    rotated = refresh(client, legacy)
+    assert rotated.status_code == 200
+
+    response = refresh(client, legacy)
+
+    assert response.status_code == 401
+    assert response.json['code'] == 'refresh_token_reused'
+    assert refresh(client, rotated.json['data']['refresh_token']).json['code'] == 'refresh_token_revoked'
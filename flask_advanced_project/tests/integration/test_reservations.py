@@ -0,0 +1,173 @@
+# tests/integration/test_reservations.py
+
+"""Integration tests for inventory reservations."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.models.product import Product
+from app.models.reservation import Reservation, ReservationError
+
+
+@pytest.fixture
+def product(app):
+    """A product with 10 units in stock."""
+    with app.app_context():
+        return Product.create({'name': 'Lamp', 'price': 20.0, 'category': 'home', 'inventory': 10, 'active': True})
+
+
+def auth_headers(client, email, password):
+    response = client.post('/api/auth/login', json={'email': email, 'password': password})
+    return {'Authorization': f"Bearer {response.json['data']['access_token']}"}
+
+
+@pytest.fixture
+def headers(client, user):
+    return auth_headers(client, user['email'], user['password'])
+
+
+def inventory(app, product):
+    with app.app_context():
+        return Product.get_collection().find_one({'_id': product['_id']})['inventory']
+
+
+def test_cart_with_missing_product_creates_nothing(app, client, headers, product):
+    missing = ObjectId()
+
+    response = client.post('/api/products/reserve', headers=headers, json={'items': [
+        {'product_id': str(product['_id']), 'quantity': 2},
+        {'product_id': str(missing), 'quantity': 1}
+    ]})
+
+    assert response.status_code == 404
+    assert response.json['code'] == 'product_not_found'
+    assert inventory(app, product) == 10
+    with app.app_context():
+        assert Product.get_collection().find_one({'_id': missing}) is None
+
+
+def test_owner_releases_reservation(app, client, headers, product):
+    response = client.post(f"/api/products/{product['_id']}/reserve", headers=headers, json={'quantity': 3})
+    assert response.status_code == 200
+    assert inventory(app, product) == 7
+
+    reservation_id = response.json['data']['reservation_id']
+    response = client.post(f"/api/products/reservations/{reservation_id}/release", headers=headers)
+
+    assert response.status_code == 200
+    assert inventory(app, product) == 10
+    response = client.post(f"/api/products/reservations/{reservation_id}/release", headers=headers)
+    assert response.json['code'] == 'reservation_not_found'
+    assert inventory(app, product) == 10
+
+
+def test_other_user_cannot_release_reservation(app, client, headers, product):
+    reservation_id = client.post(
+        f"/api/products/{product['_id']}/reserve", headers=headers, json={'quantity': 3}
+    ).json['data']['reservation_id']
+    client.post('/api/auth/register', json={'username': 'bob', 'email': 'bob@example.com', 'password': 'Password123!'})
+
+    response = client.post(
+        f"/api/products/reservations/{reservation_id}/release",
+        headers=auth_headers(client, 'bob@example.com', 'Password123!')
+    )
+
+    assert response.status_code == 404
+    assert inventory(app, product) == 7
+
+
+def test_active_reservations_are_limited(app, client, headers, product):
+    app.config['RESERVATION_MAX_ACTIVE'] = 2
+    for _ in range(2):
+        client.post(f"/api/products/{product['_id']}/reserve", headers=headers, json={'quantity': 1})
+
+    response = client.post(f"/api/products/{product['_id']}/reserve", headers=headers, json={'quantity': 1})
+
+    assert response.status_code == 429
+    assert response.json['code'] == 'reservation_limit'
+    assert inventory(app, product) == 8
+
+
+def test_expired_reservations_return_units(app, client, headers, product):
+    client.post(f"/api/products/{product['_id']}/reserve", headers=headers, json={'quantity': 10})
+    with app.app_context():
+        Reservation.get_collection().update_many({}, {'$set': {'expires_at': datetime.utcnow() - timedelta(seconds=1)}})
+
+    response = client.post(f"/api/products/{product['_id']}/reserve", headers=headers, json={'quantity': 4})
+
+    assert response.status_code == 200
+    assert inventory(app, product) == 6
+    with app.app_context():
+        assert Reservation.get_collection().count_documents({'status': Reservation.EXPIRED}) == 1
+
+
+def test_insufficient_inventory_is_a_conflict(app, client, headers, product):
+    response = client.post(f"/api/products/{product['_id']}/reserve", headers=headers, json={'quantity': 11})
+
+    assert response.status_code == 409
+    assert response.json['code'] == 'insufficient_inventory'
+    assert response.json['details'] == {'product_id': str(product['_id']), 'available': 10}
+    assert inventory(app, product) == 10
+    with app.app_context():
+        assert Reservation.get_collection().count_documents({}) == 0
+
+
+def test_failed_reservation_frees_its_slot(app, client, headers, product):
+    app.config['RESERVATION_MAX_ACTIVE'] = 1
+    assert client.post(
+        f"/api/products/{product['_id']}/reserve", headers=headers, json={'quantity': 11}
+    ).status_code == 409
+
+    response = client.post(f"/api/products/{product['_id']}/reserve", headers=headers, json={'quantity': 1})
+
+    assert response.status_code == 200
+
+
+def test_released_reservation_frees_its_slot(app, client, headers, product):
+    app.config['RESERVATION_MAX_ACTIVE'] = 1
+    reservation_id = client.post(
+        f"/api/products/{product['_id']}/reserve", headers=headers, json={'quantity': 1}
+    ).json['data']['reservation_id']
+    client.post(f"/api/products/reservations/{reservation_id}/release", headers=headers)
+
+    response = client.post(f"/api/products/{product['_id']}/reserve", headers=headers, json={'quantity': 1})
+
+    assert response.status_code == 200
+
+
+def test_limit_holds_under_concurrent_requests(app, user, product, monkeypatch):
+    reserve_many = Product.reserve_many
+    racing = []
+
+    def reserve_while_another_request_holds(items):
+        # A second request from the user arrives while the first is reserving
+        if not racing:
+            racing.append(None)
+            try:
+                racing[0] = Reservation.hold(user['id'], items, ttl=60, max_active=1)
+            except ReservationError as err:
+                racing[0] = err.code
+        reserve_many(items)
+
+    monkeypatch.setattr(Product, 'reserve_many', reserve_while_another_request_holds)
+
+    with app.app_context():
+        Reservation.hold(user['id'], [(product['_id'], 1)], ttl=60, max_active=1)
+
+        assert racing == ['reservation_limit']
+        assert Reservation.get_collection().count_documents({'status': Reservation.HELD}) == 1
+
+
+def test_counter_starts_from_reservations_held_before_counters(app, user, product):
+    with app.app_context():
+        Reservation.hold(user['id'], [(product['_id'], 1)], ttl=60, max_active=5)
+        Reservation.hold(user['id'], [(product['_id'], 1)], ttl=60, max_active=5)
+        app.extensions['database'][Reservation.counter_collection].delete_many({})
+
+        Reservation.hold(user['id'], [(product['_id'], 1)], ttl=60, max_active=3)
+        with pytest.raises(ReservationError):
+            Reservation.hold(user['id'], [(product['_id'], 1)], ttl=60, max_active=3)
+
+        assert app.extensions['database'][Reservation.counter_collection].find_one({'_id': user['id']})['active'] == 3
@@ -0,0 +1,182 @@
+# tests/integration/test_soft_delete.py
+
+"""Integration tests for soft delete, restore and archival."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.models.base_model import MIGRATIONS_COLLECTION, register_write_listener
+from app.models.product import Product
+
+
+def new_product(name='Lamp', **fields):
+    return Product.create(dict({'name': name, 'price': 20.0, 'category': 'home', 'inventory': 3, 'active': True}, **fields))
+
+
+def raw(app, name):
+    return app.extensions['database'][name]
+
+
+def age_deletion(app, product_id, days):
+    """Pretend a product was deleted `days` ago."""
+    raw(app, 'products').update_one(
+        {'_id': product_id}, {'$set': {'deleted_at': datetime.utcnow() - timedelta(days=days)}}
+    )
+
+
+@pytest.fixture
+def archiver(app):
+    return app.extensions['archiver']
+
+
+def test_deleted_product_disappears_from_reads(app, client, admin):
+    with app.app_context():
+        product = new_product()
+    url = f"/api/products/{product['_id']}"
+
+    assert client.delete(url, headers=admin['headers']).status_code == 200
+
+    assert client.get(url).status_code == 404
+    assert client.delete(url, headers=admin['headers']).status_code == 404
+    with app.app_context():
+        assert Product.find_by_id(product['_id']) is None
+        assert Product.count({'category': 'home'}) == 0
+    document = raw(app, 'products').find_one({'_id': product['_id']})
+    assert isinstance(document['deleted_at'], datetime)
+    assert document['version'] == product['version'] + 1
+
+
+def test_restore_undoes_soft_delete(app, client):
+    with app.app_context():
+        product = new_product()
+        assert Product.delete(product['_id'])
+
+        restored = Product.restore(product['_id'])
+
+        assert restored['deleted_at'] is None
+        assert restored['version'] == product['version'] + 2
+        assert Product.find_by_id(product['_id'])['name'] == 'Lamp'
+    assert client.get(f"/api/products/{product['_id']}").status_code == 200
+
+
+def test_restore_needs_a_soft_deleted_document(app):
+    with app.app_context():
+        product = new_product()
+
+        assert Product.restore(product['_id']) is None
+        assert Product.restore(ObjectId()) is None
+        assert Product.restore('not-an-id') is None
+
+
+def test_delete_and_restore_notify_listeners(app):
+    writes = []
+    register_write_listener(app, 'products', lambda before, after: writes.append((before, after)))
+
+    with app.app_context():
+        product = new_product()
+        Product.delete(product['_id'])
+        Product.restore(product['_id'])
+
+    assert [(before is None, after is None) for before, after in writes] == \
+        [(True, False), (False, True), (True, False)]
+    assert writes[1][0]['deleted_at'] is None
+    assert writes[2][1]['deleted_at'] is None
+
+
+def test_backfill_gives_old_documents_a_null_deleted_at(app):
+    migrations = raw(app, MIGRATIONS_COLLECTION)
+    migrations.delete_one({'_id': 'products.deleted_at'})
+    old_id = raw(app, 'products').insert_one({'name': 'Old', 'category': 'home', 'version': 1}).inserted_id
+
+    with app.app_context():
+        assert Product.find_by_id(old_id) is None
+        Product._backfill_deleted_at()
+        assert Product.find_by_id(old_id)['name'] == 'Old'
+
+    assert migrations.find_one({'_id': 'products.deleted_at'})['documents'] == 1
+
+
+def test_backfill_runs_once(app):
+    assert raw(app, MIGRATIONS_COLLECTION).find_one({'_id': 'products.deleted_at'}) is not None
+    later_id = raw(app, 'products').insert_one({'name': 'Later', 'version': 1}).inserted_id
+
+    with app.app_context():
+        Product._backfill_deleted_at()
+
+    assert 'deleted_at' not in raw(app, 'products').find_one({'_id': later_id})
+
+
+def test_archiver_moves_old_deletions(app, archiver):
+    with app.app_context():
+        old, recent, live = new_product('Old'), new_product('Recent'), new_product('Live')
+        Product.delete(old['_id'])
+        Product.delete(recent['_id'])
+        age_deletion(app, old['_id'], archiver.deleted_after_days + 1)
+        age_deletion(app, recent['_id'], archiver.deleted_after_days - 1)
+
+        assert archiver.run_once() == {'users': 0, 'products': 1}
+
+    assert raw(app, 'products').find_one({'_id': old['_id']}) is None
+    archived = raw(app, 'products_archive').find_one({'_id': old['_id']})
+    assert archived['name'] == 'Old'
+    assert isinstance(archived['archived_at'], datetime)
+    assert {document['_id'] for document in raw(app, 'products').find({})} == {recent['_id'], live['_id']}
+
+    with app.app_context():
+        assert archiver.run_once() == {'users': 0, 'products': 0}
+        assert Product.restore(old['_id']) is None
+
+
+def test_archiver_works_in_batches(app, archiver, monkeypatch):
+    monkeypatch.setattr(archiver, 'batch_size', 2)
+    with app.app_context():
+        products = [new_product(f"Product {index}") for index in range(5)]
+        for product in products:
+            Product.delete(product['_id'])
+            age_deletion(app, product['_id'], archiver.deleted_after_days + 1)
+
+        assert archiver.run_once()['products'] == 5
+
+    assert raw(app, 'products').count_documents({}) == 0
+    assert raw(app, 'products_archive').count_documents({}) == 5
+
+
+def test_archiver_moves_long_inactive_documents(app, archiver, monkeypatch):
+    monkeypatch.setattr(archiver, 'inactive_after_days', 10)
+    writes = []
+    register_write_listener(app, 'products', lambda before, after: writes.append((before, after)))
+    with app.app_context():
+        stale = new_product('Stale', active=False)
+        new_product('Fresh', active=False)
+        raw(app, 'products').update_one(
+            {'_id': stale['_id']}, {'$set': {'updated_at': datetime.utcnow() - timedelta(days=11)}}
+        )
+        writes.clear()
+
+        assert archiver.run_once()['products'] == 1
+
+    assert raw(app, 'products_archive').find_one({'_id': stale['_id']})['name'] == 'Stale'
+    assert [(before['_id'], after) for before, after in writes] == [(stale['_id'], None)]
+
+
+def test_archiver_keeps_documents_restored_during_a_batch(app, archiver, monkeypatch):
+    with app.app_context():
+        product = new_product()
+        Product.delete(product['_id'])
+        age_deletion(app, product['_id'], archiver.deleted_after_days + 1)
+
+        archive = raw(app, 'products_archive')
+        copy = archive.bulk_write
+
+        def copy_then_restore(requests, **kwargs):
+            result = copy(requests, **kwargs)
+            Product.restore(product['_id'])
+            return result
+
+        monkeypatch.setattr(archive, 'bulk_write', copy_then_restore)
+
+        assert archiver.run_once()['products'] == 0
+        assert Product.find_by_id(product['_id']) is not None
+    assert archive.count_documents({}) == 0
@@ -0,0 +1,97 @@
+# tests/integration/test_token_cache.py
+
+"""Integration tests for the verified token cache.
+
+CachingJWTManager overrides JWTManager._decode_jwt_from_config, a private
+method of flask-jwt-extended; these tests catch an upgrade that renames it
+or changes its signature.
+"""
+
+import inspect
+from datetime import timedelta
+
+import jwt
+from flask_jwt_extended import JWTManager, create_access_token, decode_token
+
+from app.auth.token_cache import CachingJWTManager
+from app.models.user import User
+
+
+def me(client, headers):
+    return client.get('/api/auth/me', headers=headers)
+
+
+def token_of(headers):
+    return headers['Authorization'].split(' ', 1)[1]
+
+
+def test_overridden_decode_matches_flask_jwt_extended(app):
+    assert isinstance(app.extensions['flask-jwt-extended'], CachingJWTManager)
+    overridden = inspect.signature(JWTManager._decode_jwt_from_config).parameters
+    override = inspect.signature(CachingJWTManager._decode_jwt_from_config).parameters
+    assert [(name, p.default) for name, p in overridden.items()] == \
+        [(name, p.default) for name, p in override.items()]
+
+
+def test_cache_hit_skips_signature_verification(app, client, user, monkeypatch):
+    assert me(client, user['headers']).status_code == 200
+    assert len(app.extensions['token_cache']) == 1
+
+    def decode(*args, **kwargs):
+        raise AssertionError("cached token verified again")
+
+    monkeypatch.setattr(jwt, 'decode', decode)
+
+    assert me(client, user['headers']).status_code == 200
+
+
+def test_cache_miss_verifies_signature(app, client, user, monkeypatch):
+    verified = []
+    original = jwt.decode
+
+    def decode(*args, **kwargs):
+        # The manager also reads the unverified claims to pick a decode key
+        if kwargs.get('options', {}).get('verify_signature', True):
+            verified.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(jwt, 'decode', decode)
+
+    assert me(client, user['headers']).status_code == 200
+    assert me(client, user['headers']).status_code == 200
+    assert len(verified) == 1
+
+
+def test_expired_token_is_rejected(app, client, user):
+    with app.app_context():
+        token = create_access_token(
+            identity=User.find_by_email(user['email']), expires_delta=timedelta(seconds=-1)
+        )
+
+    response = me(client, {'Authorization': f"Bearer {token}"})
+
+    assert response.status_code == 401
+    assert len(app.extensions['token_cache']) == 0
+
+
+def test_cached_token_expires_with_its_exp_claim(app, client, user):
+    token = token_of(user['headers'])
+    assert me(client, user['headers']).status_code == 200
+    cache = app.extensions['token_cache']
+    with app.app_context():
+        exp = decode_token(token)['exp']
+
+    assert cache.get(token, now=exp - 1) is not None
+    assert cache.get(token, now=exp) is None
+    assert len(cache) == 0
+
+
+def test_blocklisted_token_is_evicted(app, client, user):
+    assert me(client, user['headers']).status_code == 200
+    cache = app.extensions['token_cache']
+    assert cache.get(token_of(user['headers'])) is not None
+
+    assert client.post('/api/auth/logout', headers=user['headers']).status_code == 200
+
+    assert cache.get(token_of(user['headers'])) is None
+    assert me(client, user['headers']).status_code == 401
@@ -0,0 +1,136 @@
+# tests/integration/test_users.py
+
+"""Integration tests for the user routes."""
+
+from app.models.base_model import WriteOutcome, register_write_listener
+from app.models.user import User
+
+
+def test_update_ignores_managed_fields(app, client, user):
+    response = client.put(
+        f"/api/users/{user['id']}",
+        json={'full_name': 'Alice', 'deleted_at': '2020-01-01', 'version': 99, 'created_at': '2020-01-01'},
+        headers=user['headers']
+    )
+
+    assert response.status_code == 200
+    profile = client.get(f"/api/users/{user['id']}", headers=user['headers'])
+    assert profile.status_code == 200
+    assert profile.json['data']['user']['full_name'] == 'Alice'
+    assert profile.json['data']['user']['version'] == 2
+    with app.app_context():
+        document = User.get_collection().find_one({'email': user['email']})
+    assert document['deleted_at'] is None
+    assert document['created_at'].year != 2020
+
+
+def test_update_if_ignores_managed_fields(app, user):
+    with app.app_context():
+        User.update_if(user['id'], {}, {'deleted_at': '2020-01-01', 'version': 99})
+        document = User.find_by_id(user['id'])
+
+    assert document is not None
+    assert document['version'] == 2
+
+
+def set_active(client, admin, user_id, active):
+    action = 'activate' if active else 'deactivate'
+    return client.put(f"/api/users/{user_id}/{action}", headers=admin['headers'])
+
+
+def test_deactivate_and_activate_user(app, client, admin, user):
+    response = set_active(client, admin, user['id'], False)
+    assert response.status_code == 200
+    assert response.json['message'] == "User deactivated successfully"
+    with app.app_context():
+        assert User.find_by_id(user['id'])['active'] is False
+
+    response = set_active(client, admin, user['id'], True)
+    assert response.status_code == 200
+    assert response.json['message'] == "User activated successfully"
+    with app.app_context():
+        assert User.find_by_id(user['id'])['active'] is True
+
+
+def test_activate_reports_already_active_user(app, client, admin, user):
+    with app.app_context():
+        version = User.find_by_id(user['id'])['version']
+
+    response = set_active(client, admin, user['id'], True)
+
+    assert response.status_code == 200
+    assert response.json['message'] == "User is already active"
+    with app.app_context():
+        assert User.find_by_id(user['id'])['version'] == version
+
+
+def test_deactivate_reports_already_inactive_user(client, admin, user):
+    assert set_active(client, admin, user['id'], False).status_code == 200
+
+    response = set_active(client, admin, user['id'], False)
+
+    assert response.status_code == 200
+    assert response.json['message'] == "User is already inactive"
+
+
+def test_users_without_active_field_count_as_active(app, client, admin, user):
+    with app.app_context():
+        User.get_collection().update_one({'email': user['email']}, {'$unset': {'active': ''}})
+
+    assert set_active(client, admin, user['id'], True).json['message'] == "User is already active"
+    assert set_active(client, admin, user['id'], False).json['message'] == "User deactivated successfully"
+
+
+def test_activate_unknown_user(client, admin):
+    for active in (True, False):
+        response = set_active(client, admin, '0123456789abcdef01234567', active)
+
+        assert response.status_code == 404
+        assert response.json['code'] == 'user_not_found'
+
+
+def test_activate_deleted_user(app, client, admin, user):
+    with app.app_context():
+        User.delete(user['id'])
+
+    response = set_active(client, admin, user['id'], False)
+
+    assert response.status_code == 404
+    assert response.json['code'] == 'user_not_found'
+
+
+def test_admin_cannot_deactivate_self(client, admin):
+    response = set_active(client, admin, admin['id'], False)
+
+    assert response.status_code == 400
+    assert response.json['code'] == 'self_deactivation_prevented'
+
+
+def test_activate_requires_admin(client, user):
+    response = client.put(f"/api/users/{user['id']}/activate", headers=user['headers'])
+
+    assert response.status_code == 403
+
+
+def test_update_if_outcomes(app, user):
+    with app.app_context():
+        assert User.update_if(user['id'], {'active': False}, {'active': True}) == WriteOutcome.NOOP
+        assert User.update_if(user['id'], {'active': True}, {'active': False}) == WriteOutcome.UPDATED
+        assert User.find_by_id(user['id'])['active'] is False
+        assert User.update_if('0123456789abcdef01234567', {}, {'active': True}) == WriteOutcome.NOT_FOUND
+        assert User.update_if('not-an-id', {}, {'active': True}) == WriteOutcome.NOT_FOUND
+
+
+def test_update_if_notifies_write_listeners(app, user):
+    writes = []
+    register_write_listener(app, User.collection_name, lambda before, after: writes.append((before, after)))
+
+    with app.app_context():
+        assert User.update_if(user['id'], {'active': False}, {'active': True}) == WriteOutcome.NOOP
+        assert User.update_if(user['id'], {'active': True}, {'active': False}) == WriteOutcome.UPDATED
+        assert User.update_if('0123456789abcdef01234567', {}, {'active': True}) == WriteOutcome.NOT_FOUND
+
+    assert len(writes) == 1
+    before, after = writes[0]
+    assert (before['active'], after['active']) == (True, False)
+    assert after['version'] == before['version'] + 1
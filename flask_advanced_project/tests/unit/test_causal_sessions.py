@@ -0,0 +1,91 @@
+# tests/unit/test_causal_sessions.py
+
+"""Unit tests for causal sessions shared across workers through the client."""
+
+import pytest
+from bson import Int64, Timestamp
+from flask import Flask, g
+
+from app.models.causal_sessions import CausalSessions, _end_session, _send_position, current_session
+
+CLUSTER_TIME = {'clusterTime': Timestamp(1700000000, 7), 'signature': {'hash': b'\x01' * 20, 'keyId': Int64(7)}}
+OPERATION_TIME = Timestamp(1700000000, 7)
+
+
+class FakeSession:
+    def __init__(self):
+        self.cluster_time = None
+        self.operation_time = None
+
+    def advance_cluster_time(self, cluster_time):
+        self.cluster_time = cluster_time
+
+    def advance_operation_time(self, operation_time):
+        self.operation_time = operation_time
+
+    def end_session(self):
+        pass
+
+
+class FakeClient:
+    def start_session(self, causal_consistency):
+        assert causal_consistency
+        return FakeSession()
+
+
+def make_worker(secret_key='secret'):
+    """An application standing in for one worker process."""
+    app = Flask(__name__)
+    app.extensions['causal_sessions'] = CausalSessions(FakeClient(), secret_key, ttl=300)
+    app.after_request(_send_position)
+    app.teardown_request(_end_session)
+    return app
+
+
+@pytest.fixture
+def position_token():
+    """Position token returned by a write served by one worker."""
+    app = make_worker()
+    with app.test_request_context():
+        session = current_session(write=True)
+        session.cluster_time, session.operation_time = CLUSTER_TIME, OPERATION_TIME
+        response = app.process_response(app.response_class())
+    return response.headers['X-Causal-Position']
+
+
+def test_write_returns_position_cookie():
+    app = make_worker()
+    with app.test_request_context():
+        session = current_session(write=True)
+        session.cluster_time, session.operation_time = CLUSTER_TIME, OPERATION_TIME
+        response = app.process_response(app.response_class())
+
+    assert 'causal_position=' in response.headers['Set-Cookie']
+
+
+def test_other_worker_reads_from_returned_position(position_token):
+    app = make_worker()
+    with app.test_request_context(headers={'Cookie': f"causal_position={position_token}"}):
+        session = current_session()
+
+        assert session.cluster_time == CLUSTER_TIME
+        assert session.operation_time == OPERATION_TIME
+        assert g.db_session_causal
+
+
+def test_position_header_is_accepted(position_token):
+    app = make_worker()
+    with app.test_request_context(headers={'X-Causal-Position': position_token}):
+        assert current_session().operation_time == OPERATION_TIME
+
+
+def test_reads_without_position_run_without_session():
+    app = make_worker()
+    with app.test_request_context():
+        assert current_session() is None
+
+
+def test_forged_position_is_ignored(position_token):
+    app = make_worker(secret_key='other secret')
+    with app.test_request_context(headers={'X-Causal-Position': position_token}):
+        assert current_session() is None
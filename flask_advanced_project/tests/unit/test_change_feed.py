@@ -0,0 +1,67 @@
+# tests/unit/test_change_feed.py
+
+"""Unit tests for the polling change feed."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.models.change_feed import ChangeFeed
+from app.models.memory_store import MemoryDatabase
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def database():
+    return MemoryDatabase('test')
+
+
+@pytest.fixture
+def feed():
+    return ChangeFeed(None, ['products'], mode='poll', poll_lag=5.0)
+
+
+def insert(database, seconds):
+    """Insert a document stamped `seconds` after NOW."""
+    updated_at = NOW + timedelta(seconds=seconds)
+    document = {'_id': ObjectId(), 'created_at': updated_at, 'updated_at': updated_at}
+    database['products'].insert_one(document)
+    return document
+
+
+def position_of(document):
+    return {'updated_at': document['updated_at'], '_id': document['_id']}
+
+
+def test_poll_delivers_new_changes_once(database, feed):
+    first = insert(database, 0)
+    second = insert(database, 1)
+
+    documents, advanced = feed._poll(database, 'products', None)
+
+    assert [document['_id'] for document in documents] == [first['_id'], second['_id']]
+    assert advanced == 2
+    assert feed._poll(database, 'products', position_of(second)) == ([], 0)
+
+
+def test_poll_delivers_late_commit_behind_position_once(database, feed):
+    position = insert(database, 10)
+    feed._poll(database, 'products', position_of(position))
+    # Stamped by a writer before the position, committed after it was reached
+    late = insert(database, 7)
+
+    documents, advanced = feed._poll(database, 'products', position_of(position))
+
+    assert [document['_id'] for document in documents] == [late['_id']]
+    assert advanced == 0
+    assert feed._poll(database, 'products', position_of(position)) == ([], 0)
+
+
+def test_poll_ignores_changes_older_than_lag(database, feed):
+    position = insert(database, 10)
+    feed._poll(database, 'products', position_of(position))
+    insert(database, 1)
+
+    assert feed._poll(database, 'products', position_of(position)) == ([], 0)
@@ -0,0 +1,56 @@
+# tests/unit/test_converters.py
+
+"""Unit tests for the URL converters."""
+
+import pytest
+from bson import ObjectId
+from flask import url_for
+from werkzeug.exceptions import NotFound
+
+from app.models.product import Product
+
+PRODUCT_ID = '0123456789abcdefABCDEF01'
+
+
+@pytest.fixture
+def urls(app):
+    return app.url_map.bind('localhost')
+
+
+def test_valid_id_reaches_the_view_as_an_object_id(urls):
+    endpoint, args = urls.match(f"/api/products/{PRODUCT_ID}")
+
+    assert endpoint == 'products.get_product'
+    assert args == {'product_id': ObjectId(PRODUCT_ID)}
+    assert isinstance(args['product_id'], ObjectId)
+
+
+@pytest.mark.parametrize('value', ['not-an-id', PRODUCT_ID[:-1], PRODUCT_ID + '0', 'g' * 24])
+def test_malformed_id_does_not_match(urls, value):
+    with pytest.raises(NotFound):
+        urls.match(f"/api/products/{value}")
+
+
+def test_malformed_id_is_rejected_before_the_view(client, monkeypatch):
+    def find_by_id(*args, **kwargs):
+        raise AssertionError("view called with a malformed ID")
+
+    monkeypatch.setattr(Product, 'find_by_id', find_by_id)
+
+    response = client.get('/api/products/not-an-id')
+
+    assert response.status_code == 404
+    assert response.json['code'] == 'not_found'
+
+
+def test_unknown_id_reaches_the_view(client):
+    response = client.get(f"/api/products/{PRODUCT_ID}")
+
+    assert response.status_code == 404
+    assert response.json['code'] == 'product_not_found'
+
+
+def test_url_for_accepts_object_ids(app):
+    with app.test_request_context():
+        assert url_for('products.get_product', product_id=ObjectId(PRODUCT_ID)) == \
+            f"/api/products/{PRODUCT_ID.lower()}"
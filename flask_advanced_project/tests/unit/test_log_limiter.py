@@ -0,0 +1,49 @@
+# tests/unit/test_log_limiter.py
+
+"""Unit tests for log rate limiting."""
+
+import logging
+
+from app import create_app
+from app.utils.log_limiter import RATE_LIMITED_LOGGERS, RateLimitFilter
+
+
+def rate_limit_filters(logger):
+    return [f for f in logger.filters if isinstance(f, RateLimitFilter)]
+
+
+def test_filter_limits_each_call_site():
+    log_filter = RateLimitFilter(rate=2, interval=60)
+    records = [logging.LogRecord('test', logging.ERROR, 'a.py', 1, "Failed: %s", ('x',), None) for _ in range(4)]
+    other = logging.LogRecord('test', logging.ERROR, 'a.py', 2, "Other", (), None)
+
+    assert [log_filter.filter(record) for record in records] == [True, True, False, False]
+    assert log_filter.filter(other)
+
+
+def test_next_record_reports_suppressed_records(monkeypatch):
+    log_filter = RateLimitFilter(rate=1, interval=60)
+    clock = [0.0]
+    monkeypatch.setattr('app.utils.log_limiter.time.monotonic', lambda: clock[0])
+    for _ in range(3):
+        log_filter.filter(logging.LogRecord('test', logging.ERROR, 'a.py', 1, "Failed: %s", ('x',), None))
+
+    clock[0] = 61.0
+    record = logging.LogRecord('test', logging.ERROR, 'a.py', 1, "Failed: %s", ('x',), None)
+
+    assert log_filter.filter(record)
+    assert record.getMessage() == "Failed: x (2 similar messages suppressed)"
+
+
+def test_application_and_job_loggers_share_one_filter(app):
+    log_filter = rate_limit_filters(app.logger)[0]
+
+    for name in RATE_LIMITED_LOGGERS:
+        assert rate_limit_filters(logging.getLogger(name)) == [log_filter]
+
+
+def test_filters_are_replaced_not_stacked(app):
+    latest = create_app('testing')
+
+    for logger in [latest.logger] + [logging.getLogger(name) for name in RATE_LIMITED_LOGGERS]:
+        assert len(rate_limit_filters(logger)) == 1
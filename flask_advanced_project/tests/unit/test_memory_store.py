@@ -0,0 +1,237 @@
+# tests/unit/test_memory_store.py
+
+"""Unit tests for the in-process MongoDB stand-in."""
+
+import re
+
+import pytest
+from pymongo.collection import ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from app.models import memory_store
+from app.models.memory_store import MemoryDatabase, matches
+
+
+@pytest.fixture
+def collection():
+    return MemoryDatabase('test')['items']
+
+
+def ids(cursor):
+    return [document['_id'] for document in cursor]
+
+
+# Filters
+
+def test_type_null_excludes_missing_fields():
+    assert matches({'deleted_at': None}, {'deleted_at': {'$type': 'null'}})
+    assert not matches({}, {'deleted_at': {'$type': 'null'}})
+    assert matches({}, {'deleted_at': None})
+    assert matches({'deleted_at': None}, {'deleted_at': None})
+    assert matches({}, {'deleted_at': {'$exists': False}})
+    assert not matches({'deleted_at': None}, {'deleted_at': {'$exists': False}})
+
+
+def test_type_aliases_and_codes():
+    assert matches({'price': 3}, {'price': {'$type': 'number'}})
+    assert matches({'price': 3.5}, {'price': {'$type': 1}})
+    assert not matches({'price': '3'}, {'price': {'$type': ['int', 'double']}})
+    assert matches({'tags': ['a', 1]}, {'tags': {'$type': 'int'}})
+
+
+def test_in_matches_any_value_and_array_elements():
+    assert matches({'category': 'books'}, {'category': {'$in': ['toys', 'books']}})
+    assert not matches({'category': 'games'}, {'category': {'$in': ['toys', 'books']}})
+    assert matches({'tags': ['new', 'sale']}, {'tags': {'$in': ['sale']}})
+    assert matches({}, {'category': {'$in': [None, 'books']}})
+    assert not matches({'active': 1}, {'active': {'$in': [True]}})
+
+
+def test_or_and_nor():
+    query = {'$or': [{'category': 'books'}, {'price': {'$lt': 5}}]}
+
+    assert matches({'category': 'books', 'price': 20}, query)
+    assert matches({'category': 'toys', 'price': 2}, query)
+    assert not matches({'category': 'toys', 'price': 20}, query)
+    assert not matches({'category': 'books'}, {'$nor': [{'category': 'books'}]})
+
+
+def test_regex_with_options_and_compiled_patterns():
+    assert matches({'name': 'Desk Lamp'}, {'name': {'$regex': 'lamp', '$options': 'i'}})
+    assert not matches({'name': 'Desk Lamp'}, {'name': {'$regex': 'lamp'}})
+    assert matches({'name': 'Desk Lamp'}, {'name': {'$regex': '^Desk'}})
+    assert matches({'name': 'Desk Lamp'}, {'name': re.compile('LAMP', re.IGNORECASE)})
+    assert matches({'tags': ['red', 'blue']}, {'tags': {'$regex': '^bl'}})
+    assert not matches({'name': 42}, {'name': {'$regex': '4'}})
+
+
+def test_unknown_operators_are_rejected():
+    with pytest.raises(OperationFailure):
+        matches({'price': 1}, {'price': {'$near': 1}})
+    with pytest.raises(OperationFailure):
+        matches({'price': 1}, {'$where': 'true'})
+
+
+# Sorting
+
+def test_sort_follows_bson_type_order(collection):
+    collection.insert_many([
+        {'_id': 1, 'value': 'text'}, {'_id': 2, 'value': 3}, {'_id': 3},
+        {'_id': 4, 'value': None}, {'_id': 5, 'value': 1.5}
+    ])
+
+    assert ids(collection.find({}, sort=[('value', 1)])) == [3, 4, 5, 2, 1]
+
+
+@pytest.mark.parametrize('direction', [1, -1])
+@pytest.mark.parametrize('index', [None, [('price', 1)], [('price', 1), ('name', 1)]])
+def test_sort_ties_keep_insertion_order(collection, index, direction):
+    if index:
+        collection.create_index(index)
+    collection.insert_many([
+        {'_id': 0, 'price': 2, 'name': 'z'}, {'_id': 1, 'price': 1, 'name': 'y'},
+        {'_id': 2, 'price': 2, 'name': 'a'}, {'_id': 3, 'price': 1, 'name': 'b'},
+        {'_id': 4, 'price': 2, 'name': 'm'}
+    ])
+
+    expected = [1, 3, 0, 2, 4] if direction == 1 else [0, 2, 4, 1, 3]
+    assert ids(collection.find({}, sort=[('price', direction)])) == expected
+    assert ids(collection.find({}, sort=[('price', direction)], skip=1, limit=3)) == expected[1:4]
+
+
+def test_sort_on_several_keys(collection):
+    collection.insert_many([
+        {'_id': 0, 'category': 'b', 'price': 1}, {'_id': 1, 'category': 'a', 'price': 1},
+        {'_id': 2, 'category': 'a', 'price': 3}, {'_id': 3, 'category': 'b', 'price': 2}
+    ])
+
+    assert ids(collection.find({}).sort([('category', 1), ('price', -1)])) == [2, 1, 3, 0]
+
+
+# Updates
+
+def test_find_one_and_update_upserts_from_the_filter(collection):
+    document = collection.find_one_and_update(
+        {'user_id': 'u1', 'status': 'held'},
+        {'$inc': {'count': 1}, '$setOnInsert': {'created': True}},
+        upsert=True, return_document=ReturnDocument.AFTER
+    )
+
+    assert {key: value for key, value in document.items() if key != '_id'} == \
+        {'user_id': 'u1', 'status': 'held', 'count': 1, 'created': True}
+
+    document = collection.find_one_and_update(
+        {'user_id': 'u1', 'status': 'held'},
+        {'$inc': {'count': 1}, '$setOnInsert': {'created': False}},
+        upsert=True, return_document=ReturnDocument.AFTER
+    )
+
+    assert (document['count'], document['created']) == (2, True)
+    assert collection.count_documents({}) == 1
+
+
+def test_find_one_and_update_upsert_returns_none_before(collection):
+    assert collection.find_one_and_update({'_id': 'a'}, {'$set': {'x': 1}}, upsert=True) is None
+    assert collection.find_one({'_id': 'a'}) == {'_id': 'a', 'x': 1}
+
+
+def test_find_one_and_update_upsert_conflicts_on_an_existing_id(collection):
+    collection.insert_one({'_id': 'a', 'count': 5})
+
+    with pytest.raises(DuplicateKeyError):
+        collection.find_one_and_update({'_id': 'a', 'count': {'$lt': 5}}, {'$inc': {'count': 1}}, upsert=True)
+
+
+def test_results_are_copies(collection):
+    collection.insert_one({'_id': 1, 'tags': ['a']})
+
+    collection.find_one({'_id': 1})['tags'].append('b')
+
+    assert collection.find_one({'_id': 1})['tags'] == ['a']
+
+
+# Indexes
+
+def test_partial_unique_index(collection):
+    collection.create_index(
+        [('email', 1)], unique=True, partialFilterExpression={'deleted_at': {'$type': 'null'}}
+    )
+    collection.insert_one({'email': 'a@example.com', 'deleted_at': None})
+
+    with pytest.raises(DuplicateKeyError):
+        collection.insert_one({'email': 'a@example.com', 'deleted_at': None})
+
+    collection.update_one({'email': 'a@example.com'}, {'$set': {'deleted_at': 1}})
+    collection.insert_one({'email': 'a@example.com', 'deleted_at': None})
+    assert collection.count_documents({'email': 'a@example.com'}) == 2
+
+
+def count_matches(monkeypatch):
+    """Count the documents a query evaluates its filter against."""
+    calls = []
+    original = memory_store.matches
+
+    def counting(document, filter_dict):
+        calls.append(document['_id'])
+        return original(document, filter_dict)
+
+    monkeypatch.setattr(memory_store, 'matches', counting)
+    return calls
+
+
+@pytest.fixture
+def catalog(collection):
+    collection.insert_many([
+        {'_id': index, 'category': ('books', 'toys', 'games', 'tools')[index % 4], 'price': index}
+        for index in range(100)
+    ])
+    return collection
+
+
+def test_equality_uses_an_index_instead_of_a_full_scan(catalog, monkeypatch):
+    calls = count_matches(monkeypatch)
+    assert len(ids(catalog.find({'category': 'books'}))) == 25
+    assert len(calls) == 100
+
+    catalog.create_index([('category', 1)])
+    calls.clear()
+
+    assert len(ids(catalog.find({'category': 'books'}))) == 25
+    assert len(calls) == 25
+
+
+def test_range_uses_a_sorted_index(catalog, monkeypatch):
+    catalog.create_index([('price', 1)])
+    calls = count_matches(monkeypatch)
+
+    assert ids(catalog.find({'price': {'$gte': 10, '$lt': 13}})) == [10, 11, 12]
+    assert len(calls) == 3
+
+
+def test_planner_picks_the_most_selective_index(catalog):
+    catalog.create_index([('category', 1)])
+    catalog.create_index([('price', 1)])
+
+    assert catalog._candidate_ids({'category': 'books', 'price': {'$lt': 8}}) == [0, 1, 2, 3, 4, 5, 6, 7]
+    assert catalog._candidate_ids({'name': 'x'}) is None
+
+
+def test_sorted_limit_stops_early_on_an_ordered_index(catalog, monkeypatch):
+    catalog.create_index([('category', 1), ('price', -1)])
+    calls = count_matches(monkeypatch)
+
+    assert ids(catalog.find({'category': 'toys'}, sort=[('price', -1)], limit=2)) == [97, 93]
+    assert len(calls) <= 2
+
+
+def test_partial_index_only_serves_queries_repeating_its_filter(collection):
+    collection.create_index([('category', 1)], partialFilterExpression={'deleted_at': {'$type': 'null'}})
+    collection.insert_many([
+        {'_id': 1, 'category': 'books', 'deleted_at': None},
+        {'_id': 2, 'category': 'books', 'deleted_at': 5},
+        {'_id': 3, 'category': 'books'}
+    ])
+
+    assert collection._candidate_ids({'category': 'books', 'deleted_at': {'$type': 'null'}}) == [1]
+    assert collection._candidate_ids({'category': 'books'}) is None
+    assert ids(collection.find({'category': 'books'})) == [1, 2, 3]
@@ -0,0 +1,80 @@
+# tests/unit/test_query_compiler.py
+
+"""Unit tests for compiling list query arguments."""
+
+import pytest
+
+from app.models.product import Product
+from app.models.query_compiler import InvalidQuery
+from app.models.user import User
+
+
+def test_filters_are_canonical():
+    query = Product.compile_query({
+        'min_price': '10', 'max_price': '50', 'category': 'books', 'active': 'false'
+    })
+
+    assert query.filter == {'active': False, 'category': 'books', 'price': {'$gte': 10.0, '$lte': 50.0}}
+    assert list(query.filter) == ['active', 'category', 'price']
+
+
+def test_false_filters_are_kept():
+    assert Product.compile_query({'active': 'false'}).filter == {'active': False}
+    assert Product.compile_query({'active': ''}).filter == {}
+
+
+def test_pagination_and_sort():
+    query = Product.compile_query({'page': '3', 'per_page': '1000', 'sort': '-price'})
+
+    assert (query.page, query.per_page, query.skip) == (3, 100, 200)
+    assert query.sort == [('price', -1)]
+    assert Product.compile_query({}).sort == [('created_at', -1)]
+
+
+def test_shape_key_ignores_values_and_argument_order():
+    first = Product.compile_query({'category': 'books', 'active': 'true'})
+    second = Product.compile_query({'active': 'false', 'category': 'toys'})
+
+    assert first.shape == second.shape == 'products?active=eq&category=eq|-created_at'
+    assert Product.compile_query({'category': 'books'}).shape != first.shape
+
+
+def test_index_follows_equality_then_sort():
+    assert Product.compile_query({'category': 'books'}).index == 'live_category_1_created_at_-1'
+    assert Product.compile_query({'sort': 'price'}).index == 'live_price_1'
+
+
+def test_unindexed_combination_is_rejected():
+    with pytest.raises(InvalidQuery) as first:
+        Product.compile_query({'category': 'books', 'sort': 'price'})
+    with pytest.raises(InvalidQuery) as second:
+        Product.compile_query({'category': 'toys', 'sort': 'price'})
+
+    assert first.value.code == 'unindexed_query'
+    assert first.value.details == {'filters': ['category'], 'sort': ['price']}
+    # The cached rejection is raised as a new exception every time
+    assert first.value is not second.value
+
+
+@pytest.mark.parametrize('args, argument', [
+    ({'page': '0'}, 'page'),
+    ({'per_page': 'x'}, 'per_page'),
+    ({'sort': 'name'}, 'sort'),
+    ({'min_price': 'abc'}, 'min_price'),
+    ({'min_price': 'nan'}, 'min_price'),
+    ({'max_price': 'inf'}, 'max_price'),
+    ({'min_price': '50', 'max_price': '10'}, 'min_price'),
+    ({'active': 'maybe'}, 'active'),
+])
+def test_malformed_arguments_are_rejected(args, argument):
+    with pytest.raises(InvalidQuery) as error:
+        Product.compile_query(args)
+
+    assert error.value.code == 'invalid_query'
+    assert argument in error.value.details
+
+
+def test_choices_are_enforced():
+    assert User.compile_query({'role': 'admin'}).filter == {'role': 'admin'}
+    with pytest.raises(InvalidQuery):
+        User.compile_query({'role': 'superuser'})
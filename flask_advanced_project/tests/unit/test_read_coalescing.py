@@ -0,0 +1,111 @@
+# tests/unit/test_read_coalescing.py
+
+"""Unit tests for single-flight reads and the read cache."""
+
+import threading
+
+from app.models.memory_store import MemoryDatabase
+from app.models.read_coalescing import ReadCoalescer, SharedReadCache, _refresh_due, query_key
+
+KEY = query_key('test', 'products', 'find', {'category': 'books'})
+
+
+def blocking_loader(release, calls, value):
+    """A loader that blocks until released, counting its calls."""
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return value
+    return load
+
+
+def run_concurrently(count, target):
+    results = [None] * count
+    threads = [
+        threading.Thread(target=lambda index=index: results.__setitem__(index, target()))
+        for index in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_identical_reads_share_one_load():
+    coalescer = ReadCoalescer()
+    release, calls = threading.Event(), []
+    loader = blocking_loader(release, calls, [{'name': 'Lamp'}])
+
+    threads, results = run_concurrently(8, lambda: coalescer.read(KEY, loader))
+    while not calls or coalescer._flights[(0,) + KEY].waiters < 7:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [[{'name': 'Lamp'}]] * 8
+
+
+def test_write_stops_sharing_reads_started_before_it():
+    coalescer = ReadCoalescer()
+    release, calls = threading.Event(), []
+    threads, _ = run_concurrently(1, lambda: coalescer.read(KEY, blocking_loader(release, calls, ['old'])))
+    while not calls:
+        threading.Event().wait(0.01)
+
+    coalescer.invalidate('products')
+    result = coalescer.read(KEY, lambda: ['new'])
+    release.set()
+    threads[0].join()
+
+    assert result == ['new']
+
+
+def test_write_drops_cached_results():
+    coalescer = ReadCoalescer()
+    assert coalescer.read(KEY, lambda: ['old'], max_age=60) == ['old']
+    assert coalescer.read(KEY, lambda: ['unused'], max_age=60) == ['old']
+
+    coalescer.invalidate('products')
+
+    assert coalescer.read(KEY, lambda: ['new'], max_age=60) == ['new']
+    # Other collections keep their entries
+    coalescer.invalidate('users')
+    assert coalescer.read(KEY, lambda: ['unused'], max_age=60) == ['new']
+
+
+def test_callers_get_independent_copies():
+    coalescer = ReadCoalescer()
+    first = coalescer.read(KEY, lambda: [{'tags': ['a']}], max_age=60)
+    first[0]['tags'].append('mutated')
+
+    second = coalescer.read(KEY, lambda: [{'tags': ['unused']}], max_age=60)
+
+    assert second == [{'tags': ['a']}]
+
+
+def test_xfetch_refreshes_only_near_expiry():
+    # Fast reads are not refreshed early; every caller refreshes once expired
+    assert not any(_refresh_due(100.0, 0.0, 1.0, 99.0) for _ in range(100))
+    assert all(_refresh_due(100.0, 0.01, 1.0, 100.0) for _ in range(100))
+    # Slow reads are refreshed early by some callers
+    assert any(_refresh_due(100.0, 5.0, 1.0, 95.0) for _ in range(100))
+
+
+def test_equivalent_filters_share_a_key():
+    assert query_key('test', 'products', 'find', {'a': 1, 'b': {'$lt': 2, '$gt': 0}}) == \
+        query_key('test', 'products', 'find', {'b': {'$gt': 0, '$lt': 2}, 'a': 1})
+    assert query_key('test', 'products', 'find', {'a': {'x': 1, 'y': 2}}) != \
+        query_key('test', 'products', 'find', {'a': {'y': 2, 'x': 1}})
+
+
+def test_shared_cache_is_invalidated_for_every_worker():
+    database = MemoryDatabase('test')
+    first = ReadCoalescer(shared=SharedReadCache(database))
+    second = ReadCoalescer(shared=SharedReadCache(database))
+    assert first.read(KEY, lambda: ['old'], max_age=60) == ['old']
+    assert second.read(KEY, lambda: ['unused'], max_age=60) == ['old']
+
+    first.invalidate('products')
+
+    assert ReadCoalescer(shared=SharedReadCache(database)).read(KEY, lambda: ['new'], max_age=60) == ['new']
@@ -0,0 +1,80 @@
+# tests/unit/test_response.py
+
+"""Unit tests for the response helpers.
+
+The testing configuration runs in debug mode, where the helpers fall back to
+jsonify, so these tests turn debug off to exercise the pre-encoded envelopes.
+"""
+
+from datetime import datetime
+
+import pytest
+from flask import jsonify
+
+from app.utils.response import STREAM_CHUNK_SIZE, pagination_response, success_response
+
+ITEMS = [
+    {'name': 'Lämp', 'price': 19.5, 'tags': ['home', 'light'], 'created_at': datetime(2024, 1, 2, 3, 4, 5)},
+    {'price': 3, 'name': 'Mug "classic"', 'stock': None, 'active': True},
+]
+
+
+@pytest.fixture
+def production_app(app):
+    app.debug = False
+    with app.test_request_context():
+        yield app
+
+
+def body(result):
+    response, status_code = result
+    return response.get_data(), status_code
+
+
+@pytest.mark.parametrize('data', [None, {'user': ITEMS[0]}, ITEMS, [], 'text', 0])
+def test_success_response_matches_jsonify(production_app, data):
+    expected = {'status': 'success', 'message': 'Done'}
+    if data is not None:
+        expected['data'] = data
+
+    assert body(success_response(data, 'Done', 201)) == (jsonify(expected).get_data(), 201)
+
+
+@pytest.mark.parametrize('stream', [False, True])
+@pytest.mark.parametrize('items, page, total', [(ITEMS, 1, 2), (ITEMS, 2, 7), ([], 1, 0)])
+def test_pagination_response_matches_jsonify(production_app, items, page, total, stream):
+    expected = jsonify({
+        'status': 'success',
+        'data': items,
+        'pagination': {
+            'page': page,
+            'per_page': 2,
+            'total_items': total,
+            'total_pages': (total + 1) // 2,
+            'has_next': page < (total + 1) // 2,
+            'has_prev': page > 1
+        }
+    }).get_data()
+
+    assert body(pagination_response(iter(items) if stream else items, page, 2, total, stream=stream)) == \
+        (expected, 200)
+
+
+def test_streamed_pagination_is_sent_in_chunks(production_app):
+    items = [dict(ITEMS[0], index=index) for index in range(2000)]
+
+    response, _ = pagination_response(iter(items), 1, len(items), len(items), stream=True)
+    chunks = list(response.response)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) < 2 * STREAM_CHUNK_SIZE for chunk in chunks)
+    assert b''.join(chunks) == body(pagination_response(items, 1, len(items), len(items)))[0]
+
+
+def test_debug_mode_indents_like_jsonify(app):
+    with app.test_request_context():
+        assert app.debug
+        response, _ = success_response({'id': 1}, 'Done')
+
+        assert response.get_data() == jsonify({'status': 'success', 'message': 'Done', 'data': {'id': 1}}).get_data()
+        assert b'\n  ' in response.get_data()